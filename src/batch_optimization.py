@@ -0,0 +1,196 @@
+"""
+Batched optimization: several shapes (or several starts of one shape) packed into a single
+block-diagonal problem, so f1/f2/f3 for all of them run in one forward/backward pass.
+"""
+import torch
+from dataclasses import dataclass
+from typing import List, Sequence, Union
+from shape_topology import ShapeTopology, get_topology
+from constants import SUPPORT_TOL
+
+
+class ShapeBatch:
+    """
+    Packs shapes with possibly different vertex counts into one (N, 2) vertex tensor.
+    Every vertex, loop edge and smoothing triple carries the index of the shape it belongs to,
+    so per-shape quantities are segment reductions (index_add / scatter_reduce).
+    """
+    def __init__(self, vertices_list: Sequence[torch.Tensor], edges_list: Sequence[Union[list, torch.Tensor, ShapeTopology]]):
+        if len(vertices_list) != len(edges_list):
+            raise ValueError("Need one edge list per shape.")
+        self.batch_size = len(vertices_list)
+        self.counts = [int(V.shape[0]) for V in vertices_list]
+        device = vertices_list[0].device if vertices_list else torch.device('cpu')
+        loop_from, loop_to, loop_shape, loop_ids = [], [], [], []
+        prev, cur, nxt, triple_shape = [], [], [], []
+        vertex_offset = 0
+        loop_offset = 0
+        for b, (V, E) in enumerate(zip(vertices_list, edges_list)):
+            topo = get_topology(E, V.shape[0])
+            loop_from.append(topo.loop_from + vertex_offset)
+            loop_to.append(topo.loop_to + vertex_offset)
+            loop_ids.append(topo.loop_ids + loop_offset)
+            loop_shape.append(torch.full((topo.num_loops,), b, dtype=torch.long))
+            p, c, n = topo.triples
+            prev.append(p + vertex_offset)
+            cur.append(c + vertex_offset)
+            nxt.append(n + vertex_offset)
+            triple_shape.append(torch.full((c.shape[0],), b, dtype=torch.long))
+            vertex_offset += V.shape[0]
+            loop_offset += topo.num_loops
+        self.num_vertices = vertex_offset
+        self.num_loops = loop_offset
+        self.vertices = torch.cat(list(vertices_list), dim=0) if vertices_list else torch.empty((0, 2))
+        self.shape_ids = torch.repeat_interleave(torch.arange(self.batch_size), torch.tensor(self.counts, dtype=torch.long)).to(device)
+        self.loop_from = torch.cat(loop_from).to(device)
+        self.loop_to = torch.cat(loop_to).to(device)
+        self.loop_ids = torch.cat(loop_ids).to(device)
+        self.loop_shape = torch.cat(loop_shape).to(device)
+        self.edge_shape = self.loop_shape[self.loop_ids]
+        self.triples = (torch.cat(prev).to(device), torch.cat(cur).to(device), torch.cat(nxt).to(device))
+        self.triple_shape = torch.cat(triple_shape).to(device)
+
+    @classmethod
+    def from_stack(cls, V: torch.Tensor, E: Union[list, torch.Tensor, ShapeTopology]) -> 'ShapeBatch':
+        """Batch from a (B, n, 2) stack of vertex sets sharing one edge list (e.g. N starts of one shape)."""
+        return cls(list(V.unbind(0)), [E] * V.shape[0])
+
+    def pack(self, vertices_list: Sequence[torch.Tensor]) -> torch.Tensor:
+        """Concatenates per-shape tensors in the batch layout (e.g. the original vertices for f3)."""
+        return torch.cat(list(vertices_list), dim=0)
+
+    def split(self, V: torch.Tensor) -> List[torch.Tensor]:
+        """Splits a packed (N, 2) tensor back into per-shape tensors."""
+        return list(torch.split(V, self.counts, dim=0))
+
+    def _segment_sum(self, values: torch.Tensor, index: torch.Tensor) -> torch.Tensor:
+        out = torch.zeros((self.batch_size,) + values.shape[1:], dtype=values.dtype, device=values.device)
+        return out.index_add(0, index, values)
+
+
+def batched_f1(batch: ShapeBatch, V: torch.Tensor) -> torch.Tensor:
+    """Per-shape 0.5 * (com_x - c*_x)^2, with c* the mean x of each shape's lowest vertices."""
+    ids = batch.shape_ids
+    inf = torch.full((batch.batch_size,), float('inf'), dtype=V.dtype, device=V.device)
+    min_y = inf.scatter_reduce(0, ids, V[:, 1].detach(), reduce='amin')
+    support = (torch.abs(V[:, 1] - min_y[ids]) < SUPPORT_TOL).to(V.dtype)
+    c_star_x = batch._segment_sum(V[:, 0] * support, ids) / batch._segment_sum(support, ids).clamp(min=1.0)
+
+    ends = V[torch.stack([batch.loop_from, batch.loop_to])]
+    v1, v2 = ends[0], ends[1]
+    cross_product = v1[:, 0] * v2[:, 1] - v1[:, 1] * v2[:, 0]
+    terms = torch.stack([cross_product,
+                         (v1[:, 0] + v2[:, 0]) * cross_product,
+                         (v1[:, 1] + v2[:, 1]) * cross_product], dim=1)
+    moments = batch._segment_sum(terms, batch.edge_shape)
+    twice_area = moments[:, 0]
+    degenerate = torch.abs(0.5 * twice_area) < 1e-9
+    safe = torch.where(degenerate, torch.ones_like(twice_area), twice_area)
+    com_x = moments[:, 1] / (3.0 * safe)
+    mean_x = batch._segment_sum(V[:, 0], ids) / torch.tensor(batch.counts, dtype=V.dtype, device=V.device).clamp(min=1.0)
+    com_x = torch.where(degenerate, mean_x, com_x)
+    return 0.5 * (com_x - c_star_x) ** 2
+
+
+def batched_f2(batch: ShapeBatch, V: torch.Tensor) -> torch.Tensor:
+    """Per-shape smoothing energy over the loop-traced neighbour triples."""
+    prev, cur, nxt = batch.triples
+    on_support = torch.abs(V[:, 1]) < SUPPORT_TOL
+    skip = on_support[cur] & (on_support[prev] | on_support[nxt])
+    d = V[cur] - 0.5 * (V[prev] + V[nxt])
+    energy = 0.5 * torch.sum(d * d, dim=1) * (~skip).to(V.dtype)
+    return batch._segment_sum(energy, batch.triple_shape)
+
+
+def batched_f3(batch: ShapeBatch, V: torch.Tensor, V_og: torch.Tensor) -> torch.Tensor:
+    """Per-shape 0.5 * ||V - V_og||^2."""
+    D = V - V_og
+    return 0.5 * batch._segment_sum(torch.sum(D * D, dim=1), batch.shape_ids)
+
+
+def batched_total_loss(batch: ShapeBatch, V: torch.Tensor, V_og: torch.Tensor, lambda1=0.33, lambda2=0.33, lambda3=0.34,
+                       mu1=1.0, mu2=1.0, mu3=1.0) -> torch.Tensor:
+    """Per-shape total loss, a (B,) tensor matching optimization.total_loss for each shape."""
+    return (lambda1 * mu1 * batched_f1(batch, V)
+            + lambda2 * mu2 * batched_f2(batch, V)
+            + lambda3 * mu3 * batched_f3(batch, V, V_og))
+
+
+@dataclass
+class BatchOptimizationResult:
+    vertices: List[torch.Tensor]
+    loss_history: List[torch.Tensor]
+    iterations: List[int]
+    final_loss: torch.Tensor
+
+
+def batched_gradient_descent(batch: ShapeBatch, V_og: torch.Tensor = None, lr=0.01, tol=SUPPORT_TOL, max_iters=1000,
+                             verbose=False, check_every=10, grad_tol=1e-6, rel_tol=1e-7, **loss_kwargs) -> BatchOptimizationResult:
+    """
+    Gradient descent on every shape of the batch at once.
+    Every check_every steps each shape is checked like optimization.gradient_descent checks a single
+    shape (loss below tol, support-masked gradient norm below grad_tol, relative loss change since the
+    previous check below rel_tol); a shape that passes one of them stops updating there, so its
+    iteration count matches the single-shape run.
+    Args:
+        batch: packed shapes; batch.vertices is the starting point
+        V_og: packed original vertices for f3 (defaults to the starting point)
+        lr: learning rate
+        tol: per-shape loss tolerance
+        max_iters: maximum number of iterations
+        verbose: if True, prints the number of active shapes every 100 steps
+        check_every: steps between the per-shape convergence checks (each one is a host sync)
+        grad_tol: per-shape tolerance on the norm of the support-masked gradient
+        rel_tol: per-shape tolerance on the relative loss change between two checks
+        loss_kwargs: lambda/mu weights forwarded to batched_total_loss
+    Returns:
+        BatchOptimizationResult with per-shape vertices, loss histories and iteration counts
+    """
+    V0 = batch.vertices
+    if V_og is None:
+        V_og = V0.clone()
+    V = V0.clone().detach().requires_grad_(True)
+    # Support vertices (y close to 0) stay fixed, as in optimization.gradient_descent
+    support_mask = torch.abs(V0[:, 1]) < SUPPORT_TOL
+    free = (~support_mask).to(V0.dtype).unsqueeze(1)
+    active = torch.ones(batch.batch_size, dtype=torch.bool, device=V0.device)
+    iterations = torch.full((batch.batch_size,), max_iters, dtype=torch.long, device=V0.device)
+    history = torch.empty((max_iters, batch.batch_size), dtype=V0.dtype, device=V0.device)
+    previous_check = None
+
+    steps = 0
+    for i in range(max_iters):
+        if V.grad is not None:
+            V.grad.zero_()
+        losses = batched_total_loss(batch, V, V_og, **loss_kwargs)
+        history[i] = losses.detach()
+        steps = i + 1
+        losses.sum().backward()
+        if i % check_every == 0 or i == max_iters - 1:
+            with torch.no_grad():
+                current = losses.detach()
+                grad_norm = torch.sqrt(batch._segment_sum(torch.sum((V.grad * free) ** 2, dim=1), batch.shape_ids))
+                converged = (current < tol) | (grad_norm <= grad_tol)
+                if previous_check is not None:
+                    scale = torch.clamp(torch.abs(previous_check), min=1e-12)
+                    converged |= torch.abs(previous_check - current) <= rel_tol * scale
+                converged &= active
+                iterations.masked_fill_(converged, i)
+                active &= ~converged
+                previous_check = current
+            if verbose and i % 100 == 0:
+                print(f"Iter {i}: {int(active.sum())}/{batch.batch_size} shapes active, mean loss = {losses.mean().item():.6f}")
+            if not bool(active.any()):
+                break
+        with torch.no_grad():
+            frozen = support_mask | ~active[batch.shape_ids]
+            V.grad.masked_fill_(frozen[:, None], 0.0)
+            V -= lr * V.grad
+
+    with torch.no_grad():
+        final_loss = batched_total_loss(batch, V, V_og, **loss_kwargs)
+    counts = iterations.tolist()
+    histories = [history[:min(counts[b] + 1, steps), b].clone() for b in range(batch.batch_size)]
+    if verbose:
+        print(f"Stopping after {steps} iterations; final losses: {final_loss.tolist()}")
+    return BatchOptimizationResult(batch.split(V.detach()), histories, counts, final_loss)
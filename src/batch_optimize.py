@@ -0,0 +1,256 @@
+"""
+Headless batch optimizer: runs a registered optimizer (see optimizers.py) over a directory (or glob) of
+Shape2D JSON files in a process pool and writes the optimized shapes plus a summary table.
+Does not import PyQt5, so it runs on machines without a display.
+
+Usage:
+    python src/batch_optimize.py shapes/ --out optimized_shapes --iters 1000 --lr 0.05
+    python src/batch_optimize.py shapes/ --carve --thickness 0.05   # joint (V, carving line) optimization
+    python src/batch_optimize.py shapes/ --telemetry csv   # per-iteration metrics in <name>_telemetry.csv
+    python src/batch_optimize.py shapes/ --batched   # all shapes in one process, one forward/backward per step
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from constants import WALL_THICKNESS
+from shape_binary import SHAPE_EXTENSIONS
+
+SUMMARY_COLUMNS = ['shape', 'vertices', 'initial_loss', 'final_loss', 'iterations', 'wall_time_s',
+                   'stable_before', 'stable_after', 'cut_b', 'cut_c', 'output']
+
+
+def collect_shape_paths(inputs):
+    """Expands directories and glob patterns into a sorted list of shape files."""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(os.path.join(item, f) for f in os.listdir(item) if f.endswith(SHAPE_EXTENSIONS))
+        else:
+            paths.extend(glob.glob(item))
+    return sorted(set(paths))
+
+
+def optimize_shape_file(path, out_dir, max_iters=1000, lr=0.05, lambda1=0.33, lambda2=0.33, lambda3=0.34, analytic=False,
+                        method='gradient_descent', carve=False, thickness=WALL_THICKNESS, telemetry=None):
+    """Optimizes one shape file and returns its summary row. Runs inside a worker process."""
+    import torch
+    from shape2d import Shape2D
+    from optimization import total_loss, total_loss_and_grad, quadratic_hessian
+    from optimization import optimize_carved, total_loss_carved, carved_center_of_mass, initial_cut
+    from optimizers import run_optimizer
+    from shape_stability import is_shape_stable
+    from optimization_telemetry import TelemetryRecorder, loss_terms, carved_loss_terms
+
+    # One process per core already; keep torch from oversubscribing inside each worker
+    torch.set_num_threads(1)
+    start = time.perf_counter()
+    shape = Shape2D.load(path)
+    V_og = shape.vertices
+    E = shape.topology
+
+    def loss_fn(V):
+        return total_loss(V, E, V_og, lambda1=lambda1, lambda2=lambda2, lambda3=lambda3)
+
+    def loss_and_grad_fn(V):
+        return total_loss_and_grad(V, E, V_og, lambda1=lambda1, lambda2=lambda2, lambda3=lambda3)
+
+    stable_before, _, _, _ = is_shape_stable(V_og, E)
+    name, ext = os.path.splitext(os.path.basename(path))
+    # The optimized shape keeps the input's format
+    out_path = os.path.join(out_dir, f"{name}_optimized{ext}")
+    cut_b = cut_c = ''
+    weights = {'lambda1': lambda1, 'lambda2': lambda2, 'lambda3': lambda3}
+    recorder = None
+    if telemetry:
+        terms_fn = carved_loss_terms(E, V_og, thickness, **weights) if carve else loss_terms(E, V_og, **weights)
+        recorder = TelemetryRecorder(capacity=max_iters, terms_fn=terms_fn)
+    if carve:
+        # Joint (V, b, c) optimization; the method/analytic options do not apply
+        V_opt, b, c, info = optimize_carved(V_og, E, lr=lr, max_iters=max_iters, thickness=thickness,
+                                            return_info=True, telemetry=recorder, **weights)
+        b0, c0 = initial_cut(V_og)
+        with torch.no_grad():
+            initial_loss = total_loss_carved(V_og, b0, c0, E, V_og, thickness, **weights).item()
+            final_loss = total_loss_carved(V_opt, b, c, E, V_og, thickness, **weights).item()
+            _, com = carved_center_of_mass(V_opt, E, b, c, thickness)
+        stable_after, _, _, _ = is_shape_stable(V_opt, E, com=com)
+        cut_b, cut_c = b.item(), c.item()
+        with open(os.path.join(out_dir, f"{name}_optimized_cut.json"), 'w') as f:
+            json.dump({'b': cut_b, 'c': cut_c, 'thickness': thickness}, f, indent=2)
+    else:
+        options = {'lr': lr} if method == 'gradient_descent' else {}
+        if analytic:
+            options['grad_fn'] = loss_and_grad_fn
+        if method == 'newton':
+            options['hessian'] = quadratic_hessian(V_og, E, lambda2=lambda2, lambda3=lambda3)
+        V_opt, info = run_optimizer(method, loss_fn, V_og.clone(), max_iters=max_iters, return_info=True,
+                                    telemetry=recorder, **options)
+        with torch.no_grad():
+            initial_loss = loss_fn(V_og).item()
+            final_loss = loss_fn(V_opt).item()
+        stable_after, _, _, _ = is_shape_stable(V_opt, E)
+
+    Shape2D(V_opt, shape.edges).save(out_path)
+    if recorder is not None:
+        telemetry_path = os.path.join(out_dir, f"{name}_telemetry.{telemetry}")
+        if telemetry == 'csv':
+            recorder.to_csv(telemetry_path)
+        else:
+            recorder.to_npz(telemetry_path)
+    return {
+        'shape': os.path.basename(path),
+        'vertices': int(V_og.shape[0]),
+        'initial_loss': initial_loss,
+        'final_loss': final_loss,
+        'iterations': info['iterations'],
+        'wall_time_s': time.perf_counter() - start,
+        'stable_before': bool(stable_before),
+        'stable_after': bool(stable_after),
+        'cut_b': cut_b,
+        'cut_c': cut_c,
+        'output': out_path,
+    }
+
+
+def optimize_batched(paths, out_dir, max_iters=1000, lr=0.05, lambda1=0.33, lambda2=0.33, lambda3=0.34):
+    """
+    Optimizes all shape files together with batch_optimization.batched_gradient_descent and returns
+    (summary rows, number of files that could not be loaded). Runs in this process; every step is a
+    single forward/backward over the packed shapes, which beats the process pool for many small shapes.
+    A shape stops once its loss is below tol; the wall time of each row is its share of the whole run.
+    """
+    import torch
+    from shape2d import Shape2D
+    from batch_optimization import ShapeBatch, batched_gradient_descent, batched_total_loss
+    from shape_stability import is_shape_stable
+
+    start = time.perf_counter()
+    loaded = []
+    for path in paths:
+        try:
+            loaded.append((path, Shape2D.load(path)))
+        except Exception as e:
+            print(f"Failed on {path}: {e}")
+    if not loaded:
+        return [], len(paths)
+    weights = {'lambda1': lambda1, 'lambda2': lambda2, 'lambda3': lambda3}
+    batch = ShapeBatch([shape.vertices for _, shape in loaded], [shape.topology for _, shape in loaded])
+    with torch.no_grad():
+        initial_losses = batched_total_loss(batch, batch.vertices, batch.vertices, **weights).tolist()
+    result = batched_gradient_descent(batch, lr=lr, max_iters=max_iters, **weights)
+    final_losses = result.final_loss.tolist()
+    wall_time = (time.perf_counter() - start) / len(loaded)
+
+    rows = []
+    for b, (path, shape) in enumerate(loaded):
+        V_og, V_opt, E = shape.vertices, result.vertices[b], shape.topology
+        stable_before, _, _, _ = is_shape_stable(V_og, E)
+        stable_after, _, _, _ = is_shape_stable(V_opt, E)
+        name, ext = os.path.splitext(os.path.basename(path))
+        out_path = os.path.join(out_dir, f"{name}_optimized{ext}")
+        Shape2D(V_opt, shape.edges).save(out_path)
+        rows.append({
+            'shape': os.path.basename(path),
+            'vertices': int(V_og.shape[0]),
+            'initial_loss': initial_losses[b],
+            'final_loss': final_losses[b],
+            'iterations': result.iterations[b],
+            'wall_time_s': wall_time,
+            'stable_before': bool(stable_before),
+            'stable_after': bool(stable_after),
+            'cut_b': '',
+            'cut_c': '',
+            'output': out_path,
+        })
+    return rows, len(paths) - len(loaded)
+
+
+def format_summary(rows):
+    """Formats summary rows as a fixed-width text table."""
+    header = f"{'shape':<28} {'n':>6} {'initial':>12} {'final':>12} {'iters':>7} {'time[s]':>8}  stable"
+    lines = [header, '-' * len(header)]
+    for r in rows:
+        stable = f"{'yes' if r['stable_before'] else 'no'} -> {'yes' if r['stable_after'] else 'no'}"
+        lines.append(f"{r['shape']:<28} {r['vertices']:>6} {r['initial_loss']:>12.6g} {r['final_loss']:>12.6g} "
+                     f"{r['iterations']:>7} {r['wall_time_s']:>8.2f}  {stable}")
+    return '\n'.join(lines)
+
+
+def write_summary_csv(rows, path):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def optimize_in_pool(paths, args):
+    """Optimizes each shape file in its own worker process; returns (summary rows, number of failures)."""
+    l1, l2, l3 = args.lambdas
+    rows = []
+    failures = 0
+    with ProcessPoolExecutor(max_workers=max(1, min(args.workers, len(paths)))) as pool:
+        futures = {pool.submit(optimize_shape_file, p, args.out, args.iters, args.lr, l1, l2, l3,
+                               args.analytic, args.method, args.carve, args.thickness, args.telemetry): p for p in paths}
+        for future in as_completed(futures):
+            try:
+                rows.append(future.result())
+            except Exception as e:
+                failures += 1
+                print(f"Failed on {futures[future]}: {e}")
+    return rows, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Optimize a directory of Shape2D JSON files without the GUI.')
+    parser.add_argument('inputs', nargs='+', help='shape directories, files or glob patterns')
+    parser.add_argument('--out', default='optimized_shapes', help='output directory for optimized shapes')
+    parser.add_argument('--iters', type=int, default=1000, help='maximum iterations per shape')
+    parser.add_argument('--lr', type=float, default=0.05, help='learning rate (gradient_descent only)')
+    parser.add_argument('--method', default='gradient_descent', choices=['gradient_descent', 'lbfgs', 'newton'],
+                        help='optimizer from the optimizers registry')
+    parser.add_argument('--lambdas', type=float, nargs=3, default=[0.33, 0.33, 0.34], metavar=('L1', 'L2', 'L3'),
+                        help='weights of f1 (stability), f2 (smoothing) and f3 (similarity)')
+    parser.add_argument('--analytic', action='store_true', help='use closed-form gradients (gradient_descent only)')
+    parser.add_argument('--carve', action='store_true',
+                        help='optimize the vertices and a carving line y = b x + c together (ignores --method)')
+    parser.add_argument('--thickness', type=float, default=WALL_THICKNESS,
+                        help='wall thickness of the carved-away part (with --carve)')
+    parser.add_argument('--telemetry', choices=['csv', 'npz'], default=None,
+                        help='record per-iteration metrics (loss, weighted f1/f2/f3, gradient norm, step size, '
+                             'wall time) and write them to <out>/<name>_telemetry.<csv|npz>')
+    parser.add_argument('--batched', action='store_true',
+                        help='optimize all shapes together in this process with batched gradient descent '
+                             '(gradient_descent only; not with --carve, --analytic or --telemetry)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='number of worker processes')
+    parser.add_argument('--summary', default=None, help='summary CSV path (default: <out>/summary.csv)')
+    args = parser.parse_args(argv)
+    if args.batched and (args.method != 'gradient_descent' or args.carve or args.analytic or args.telemetry):
+        parser.error('--batched only supports plain gradient_descent')
+
+    paths = collect_shape_paths(args.inputs)
+    if not paths:
+        print('No shape files found.')
+        return 1
+    os.makedirs(args.out, exist_ok=True)
+    l1, l2, l3 = args.lambdas
+
+    if args.batched:
+        rows, failures = optimize_batched(paths, args.out, args.iters, args.lr, l1, l2, l3)
+    else:
+        rows, failures = optimize_in_pool(paths, args)
+    rows.sort(key=lambda r: r['shape'])
+
+    print(format_summary(rows))
+    summary_path = args.summary or os.path.join(args.out, 'summary.csv')
+    write_summary_csv(rows, summary_path)
+    print(f"\nSummary written to {summary_path}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
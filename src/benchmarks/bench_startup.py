@@ -0,0 +1,107 @@
+"""
+Startup benchmark of the GUI: import time of the modules needed for the first window (measured with
+python -X importtime) and, with --window, the wall time until the Visualize tab is on screen.
+Fails (exit status 1) when a budget is exceeded or when torch is imported before the first window.
+
+Usage:
+    python src/benchmarks/bench_startup.py [--import-budget-ms 500] [--window] [--window-budget-ms 1000]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+# What main.py imports before the window is shown (the Visualize tab is built inside ShapeGUI)
+STARTUP_IMPORTS = 'import viewer.shape_gui, viewer.tab_visualize'
+# Modules that must stay out of the startup path
+DEFERRED_MODULES = ('torch', 'optimization', 'optimizers', 'shape2d')
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+WINDOW_SCRIPT = """
+import sys
+from PyQt5.QtWidgets import QApplication
+from viewer.shape_gui import ShapeGUI
+app = QApplication(sys.argv)
+gui = ShapeGUI()
+gui.show()
+# Checked before the event loop runs: the first shape and the catalog refresh load torch from zero-delay timers
+print('shown', flush=True)
+print('torch loaded' if 'torch' in sys.modules else 'torch deferred', flush=True)
+"""
+
+
+def measure_imports(repeats=3):
+    """(best total ms, {module: cumulative ms} of that run) for the startup imports, in a fresh interpreter each time."""
+    best = None
+    for _ in range(repeats):
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', STARTUP_IMPORTS], cwd=SRC_DIR,
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            sys.exit(f"Startup imports failed:\n{proc.stderr[-2000:]}")
+        rows = [(int(m.group(2)) / 1000.0, len(m.group(3)), m.group(4))
+                for m in map(IMPORTTIME_LINE.match, proc.stderr.splitlines()) if m is not None]
+        modules = {name: cumulative_ms for cumulative_ms, _, name in rows}
+        # The least indented imports are the top-level ones; their cumulative times add up to the total
+        top_depth = min(depth for _, depth, _ in rows)
+        total = sum(cumulative_ms for cumulative_ms, depth, _ in rows if depth == top_depth)
+        if best is None or total < best[0]:
+            best = (total, modules)
+    return best
+
+
+def measure_window():
+    """(ms until the first window is shown, torch loaded before show()) for a fresh interpreter."""
+    env = dict(os.environ)
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, '-c', WINDOW_SCRIPT], cwd=SRC_DIR, env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    elapsed_ms = (time.perf_counter() - start) * 1000.0
+    if line.strip() != 'shown':
+        proc.kill()
+        sys.exit(f"GUI failed to start:\n{proc.stderr.read()[-2000:]}")
+    torch_loaded = proc.stdout.readline().strip() == 'torch loaded'
+    proc.wait()
+    return elapsed_ms, torch_loaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--import-budget-ms', type=float, default=500.0)
+    parser.add_argument('--window', action='store_true', help='also time the first window (needs a Qt platform)')
+    parser.add_argument('--window-budget-ms', type=float, default=1000.0)
+    parser.add_argument('--top', type=int, default=10, help='number of slowest modules to list')
+    args = parser.parse_args(argv)
+
+    ok = True
+    total, modules = measure_imports()
+    print(f"Startup imports: {total:.0f} ms (budget {args.import_budget_ms:.0f} ms)")
+    for name, ms in sorted(modules.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {ms:8.1f} ms  {name}")
+    loaded = [name for name in DEFERRED_MODULES if name in modules]
+    if loaded:
+        print(f"FAIL: imported at startup: {', '.join(loaded)}")
+        ok = False
+    if total > args.import_budget_ms:
+        print("FAIL: import budget exceeded")
+        ok = False
+
+    if args.window:
+        elapsed_ms, torch_loaded = measure_window()
+        print(f"First window: {elapsed_ms:.0f} ms (budget {args.window_budget_ms:.0f} ms), "
+              f"torch {'loaded' if torch_loaded else 'deferred'}")
+        if elapsed_ms > args.window_budget_ms:
+            print("FAIL: window budget exceeded")
+            ok = False
+        if torch_loaded:
+            print("FAIL: torch imported before the first window")
+            ok = False
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
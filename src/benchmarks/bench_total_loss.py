@@ -0,0 +1,61 @@
+"""
+Microbenchmark: forward + backward time of optimization.total_loss against the fused
+(eager and torch.compile) variant on the bundled shapes/*.json.
+
+Usage:
+    python src/benchmarks/bench_total_loss.py [--iters 2000]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import torch
+from shape2d import Shape2D
+from optimization import total_loss
+from fused_loss import make_fused_total_loss
+
+SHAPES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'shapes')
+
+
+def time_loss(loss_fn, V0, iters, warmup=20):
+    """Mean seconds per forward + backward evaluation."""
+    V = V0.clone().requires_grad_(True)
+    for _ in range(warmup):
+        V.grad = None
+        loss_fn(V).backward()
+    start = time.perf_counter()
+    for _ in range(iters):
+        V.grad = None
+        loss_fn(V).backward()
+    return (time.perf_counter() - start) / iters
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iters', type=int, default=2000)
+    parser.add_argument('--shapes', default=os.path.join(SHAPES_DIR, '*.json'))
+    args = parser.parse_args(argv)
+
+    torch.set_num_threads(1)
+    print(f"{'shape':<26} {'n':>4} {'total_loss[us]':>15} {'fused[us]':>10} {'compiled[us]':>13} {'speedup':>8}")
+    for path in sorted(glob.glob(args.shapes)):
+        shape = Shape2D.load(path)
+        V_og = shape.vertices
+        E = shape.topology
+        V0 = V_og + 0.01 * torch.randn_like(V_og)
+        V0[torch.abs(V_og[:, 1]) < 1e-3] = V_og[torch.abs(V_og[:, 1]) < 1e-3]
+
+        baseline = time_loss(lambda V: total_loss(V, E, V_og), V0, args.iters)
+        eager = time_loss(make_fused_total_loss(E, V_og, compile=False), V0, args.iters)
+        compiled = time_loss(make_fused_total_loss(E, V_og, compile=True), V0, args.iters)
+        best = min(eager, compiled)
+        print(f"{os.path.basename(path):<26} {V_og.shape[0]:>4} {baseline * 1e6:>15.1f} {eager * 1e6:>10.1f} "
+              f"{compiled * 1e6:>13.1f} {baseline / best:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
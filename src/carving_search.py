@@ -0,0 +1,188 @@
+"""
+Global search for the carving line y = b x + c.
+
+Gradient descent on (b, c) only finds the local minimum next to its starting cut, so the search
+runs in three stages:
+  1. a coarse grid of line angles and offsets, evaluated in one batched pass (shape_moments),
+  2. pruning of every cut whose carved center of mass falls outside the support interval
+     reported by is_shape_stable,
+  3. multi-start joint (V, b, c) gradient descent (optimization.optimize_carved) from the best
+     surviving cuts, one start per worker process.
+
+Usage:
+    python src/carving_search.py shapes/man.json --starts 8 --iters 500
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import List
+
+import torch
+from shape2d import Shape2D
+from shape_moments import PolygonMoments
+from shape_stability import is_shape_stable
+from shape_topology import ShapeTopology, get_topology
+from optimization import carved_centers_of_mass, support_center_x
+from constants import WALL_THICKNESS
+
+
+@dataclass
+class CutCandidate:
+    seed_b: float
+    seed_c: float
+    b: float
+    c: float
+    loss: float
+    f1: float
+    stable: bool
+    iterations: int
+    vertices: torch.Tensor = field(default=None, repr=False)
+
+
+@dataclass
+class CarvingSearchResult:
+    best: CutCandidate
+    candidates: List[CutCandidate]  # all refined starts, best first
+    grid_size: int
+    survivors: int
+    wall_time_s: float
+
+
+def line_grid(V: torch.Tensor, num_angles=19, num_offsets=40, max_angle=60.0):
+    """
+    (K, 2) grid of lines (b, c) with b = tan(angle), angle in [-max_angle, max_angle] degrees.
+    Each line passes through (x_mid, y_k) with y_k spread over the height of the shape, so every
+    angle gets the same coverage. Also returns the (K, 2) (angle, offset) grid indices.
+    """
+    V = V.detach()
+    x_mid = 0.5 * (V[:, 0].min() + V[:, 0].max())
+    y_min, y_max = V[:, 1].min(), V[:, 1].max()
+    angles = torch.deg2rad(torch.linspace(-max_angle, max_angle, num_angles, dtype=V.dtype))
+    # Offsets strictly inside the shape's height: the cuts at the extremes carve nothing or everything
+    heights = y_min + (y_max - y_min) * (torch.arange(1, num_offsets + 1, dtype=V.dtype) / (num_offsets + 1))
+    b = torch.tan(angles).repeat_interleave(num_offsets)
+    c = heights.repeat(num_angles) - b * x_mid
+    index = torch.stack([torch.arange(num_angles).repeat_interleave(num_offsets),
+                         torch.arange(num_offsets).repeat(num_angles)], dim=1)
+    return torch.stack([b, c], dim=1), index
+
+
+def evaluate_cuts(V: torch.Tensor, E, cuts: torch.Tensor, thickness=WALL_THICKNESS):
+    """Carved masses (K,) and centers of mass (K, 2) of every cut, in one batched pass."""
+    with torch.no_grad():
+        moments = PolygonMoments(V, get_topology(E, V.shape[0]))
+        return carved_centers_of_mass(moments, cuts.to(V.dtype), thickness)
+
+
+def select_starts(scores: torch.Tensor, index: torch.Tensor, survivors: torch.Tensor, num_starts: int) -> List[int]:
+    """Best-scoring surviving cuts, skipping grid neighbours of cuts already chosen."""
+    order = torch.argsort(torch.where(survivors, scores, torch.full_like(scores, float('inf'))))
+    chosen = []
+    for k in order.tolist():
+        if not survivors[k]:
+            break
+        if all(torch.max(torch.abs(index[k] - index[j])).item() > 1 for j in chosen):
+            chosen.append(k)
+            if len(chosen) == num_starts:
+                break
+    return chosen
+
+
+def _refine_start(V_og: torch.Tensor, edges, b0: float, c0: float, max_iters: int, lr: float, thickness: float,
+                  weights: dict) -> CutCandidate:
+    """One multi-start run of the joint optimization. Runs inside a worker process."""
+    from optimization import optimize_carved, total_loss_carved, f1_carved, carved_center_of_mass
+
+    # One process per start already; keep torch from oversubscribing inside each worker
+    torch.set_num_threads(1)
+    E = get_topology(edges, V_og.shape[0])
+    V, b, c, info = optimize_carved(V_og, E, b0=b0, c0=c0, lr=lr, max_iters=max_iters, thickness=thickness,
+                                    return_info=True, **weights)
+    with torch.no_grad():
+        loss = total_loss_carved(V, b, c, E, V_og, thickness, **weights).item()
+        f1 = f1_carved(V, E, b, c, thickness).item()
+        _, com = carved_center_of_mass(V, E, b, c, thickness)
+    stable, _, _, _ = is_shape_stable(V, E, com=com)
+    return CutCandidate(b0, c0, b.item(), c.item(), loss, f1, bool(stable), info['iterations'], V)
+
+
+def search_carving(V: torch.Tensor, edges, num_angles=19, num_offsets=40, max_angle=60.0, num_starts=8, max_iters=500,
+                   lr=0.05, thickness=WALL_THICKNESS, workers=None, **weights) -> CarvingSearchResult:
+    """
+    Grid evaluation, pruning and multi-start refinement of the carving line (see module docstring).
+    If no grid cut keeps the carved CoM over the support, the best-scoring cuts are refined anyway.
+    """
+    start = time.perf_counter()
+    E = get_topology(edges, V.shape[0])
+    cuts, index = line_grid(V, num_angles, num_offsets, max_angle)
+    _, com = evaluate_cuts(V, E, cuts, thickness)
+
+    _, _, x_left, x_right = is_shape_stable(V, E)
+    survivors = (com[:, 0] >= x_left) & (com[:, 0] <= x_right)
+    num_survivors = int(survivors.sum())
+    with torch.no_grad():
+        scores = 0.5 * (com[:, 0] - support_center_x(V)) ** 2
+    starts = select_starts(scores, index, survivors if num_survivors > 0 else torch.ones_like(survivors), num_starts)
+
+    if isinstance(edges, ShapeTopology):
+        # Its directed loop edges describe the same shape and pickle as a plain list
+        edge_list = torch.stack([E.loop_from, E.loop_to], dim=1).tolist()
+    else:
+        edge_list = edges.tolist() if isinstance(edges, torch.Tensor) else [list(e) for e in edges]
+    jobs = [(V.detach().clone(), edge_list, cuts[k, 0].item(), cuts[k, 1].item(), max_iters, lr, thickness, weights)
+            for k in starts]
+    with ProcessPoolExecutor(max_workers=max(1, min(workers or os.cpu_count() or 1, len(jobs)))) as pool:
+        candidates = list(pool.map(_refine_start, *zip(*jobs)))
+
+    # Stable results first, then by loss
+    candidates.sort(key=lambda cand: (not cand.stable, cand.loss))
+    return CarvingSearchResult(candidates[0], candidates, cuts.shape[0], num_survivors, time.perf_counter() - start)
+
+
+def format_candidates(result: CarvingSearchResult, top=5) -> str:
+    """Fixed-width table of the best cut and its runners-up."""
+    header = f"{'rank':>4} {'seed b':>9} {'seed c':>9} {'b':>9} {'c':>9} {'loss':>12} {'f1':>12} {'iters':>6}  stable"
+    lines = [header, '-' * len(header)]
+    for rank, cand in enumerate(result.candidates[:top], start=1):
+        lines.append(f"{rank:>4} {cand.seed_b:>9.4f} {cand.seed_c:>9.4f} {cand.b:>9.4f} {cand.c:>9.4f} "
+                     f"{cand.loss:>12.6g} {cand.f1:>12.6g} {cand.iterations:>6}  {'yes' if cand.stable else 'no'}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Global search for the carving line of a Shape2D JSON file.')
+    parser.add_argument('shape', help='shape file (.json or .s2d)')
+    parser.add_argument('--angles', type=int, default=19, help='number of line angles in the coarse grid')
+    parser.add_argument('--offsets', type=int, default=40, help='number of line offsets per angle')
+    parser.add_argument('--max-angle', type=float, default=60.0, help='largest line angle in degrees')
+    parser.add_argument('--starts', type=int, default=8, help='number of multi-start refinements')
+    parser.add_argument('--iters', type=int, default=500, help='gradient descent iterations per start')
+    parser.add_argument('--lr', type=float, default=0.05, help='learning rate')
+    parser.add_argument('--thickness', type=float, default=WALL_THICKNESS, help='wall thickness of the carved part')
+    parser.add_argument('--lambdas', type=float, nargs=3, default=[0.33, 0.33, 0.34], metavar=('L1', 'L2', 'L3'),
+                        help='weights of f1 (stability), f2 (smoothing) and f3 (similarity)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='number of worker processes')
+    parser.add_argument('--top', type=int, default=5, help='rows of the runners-up table')
+    parser.add_argument('--out', default=None, help='save the best optimized shape to this file (.json or .s2d)')
+    args = parser.parse_args(argv)
+
+    shape = Shape2D.load(args.shape)
+    l1, l2, l3 = args.lambdas
+    result = search_carving(shape.vertices, shape.topology, args.angles, args.offsets, args.max_angle, args.starts,
+                            args.iters, args.lr, args.thickness, args.workers, lambda1=l1, lambda2=l2, lambda3=l3)
+    print(f"Grid: {result.grid_size} cuts, {result.survivors} keep the carved CoM over the support "
+          f"({result.wall_time_s:.2f} s total)")
+    best = result.best
+    print(f"Best cut: y = {best.b:.4f} x + {best.c:.4f} (loss {best.loss:.6g}, {'stable' if best.stable else 'not stable'})\n")
+    print(format_candidates(result, args.top))
+    if args.out:
+        Shape2D(best.vertices, shape.edges).save(args.out)
+        print(f"\nBest shape written to {args.out}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
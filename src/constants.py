@@ -1,2 +1,5 @@
 # Universal constant for support-plane and numerical tolerance
-SUPPORT_TOL = 1e-3 
\ No newline at end of file
+SUPPORT_TOL = 1e-3
+
+# Default wall thickness of the carved-away part of a shape (joint carving optimization)
+WALL_THICKNESS = 0.05
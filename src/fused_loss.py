@@ -0,0 +1,77 @@
+"""
+Fused total_loss for a fixed topology. All index tensors (loop edges, smoothing triples,
+support vertices) are traced once and baked into a single function of V, which is
+compiled with torch.compile when available so f1, f2 and f3 run as one fused kernel.
+"""
+import warnings
+import torch
+from shape_topology import get_topology
+from constants import SUPPORT_TOL
+
+
+def _build_fused_fn(E, V_og: torch.Tensor, lambda1=0.33, lambda2=0.33, lambda3=0.34, mu1=1.0, mu2=1.0, mu3=1.0):
+    n = V_og.shape[0]
+    device = V_og.device
+    topo = get_topology(E, n).to(device)
+    V_og = V_og.detach()
+    y = V_og[:, 1]
+
+    # f1: the support vertices (lowest y) are frozen during optimization, so their indices are static
+    support_idx = torch.nonzero(torch.abs(y - y.min()) < SUPPORT_TOL).flatten()
+    loop_ends = torch.stack([topo.loop_from, topo.loop_to])
+
+    # f2: triplets with both (v0, v1) or (v1, v2) on the support plane are dropped once, up front
+    prev, cur, nxt = topo.triples
+    on_support = torch.abs(y) < SUPPORT_TOL
+    keep = ~(on_support[cur] & (on_support[prev] | on_support[nxt]))
+    prev, cur, nxt = prev[keep], cur[keep], nxt[keep]
+
+    w1, w2, w3 = lambda1 * mu1, lambda2 * mu2, lambda3 * mu3
+
+    def fused_total_loss(V: torch.Tensor) -> torch.Tensor:
+        ends = V[loop_ends]
+        v1, v2 = ends[0], ends[1]
+        cross_product = v1[:, 0] * v2[:, 1] - v1[:, 1] * v2[:, 0]
+        area2 = torch.sum(cross_product)
+        sx = torch.sum((v1[:, 0] + v2[:, 0]) * cross_product)
+        # Branch-free degenerate-area fallback to the vertex mean (no graph break)
+        degenerate = torch.abs(0.5 * area2) < 1e-9
+        com_x = torch.where(degenerate, V[:, 0].mean(), sx / (3.0 * torch.where(degenerate, torch.ones_like(area2), area2)))
+        c_star_x = V[support_idx, 0].mean()
+        f1 = 0.5 * (com_x - c_star_x) ** 2
+
+        d = V[cur] - 0.5 * (V[prev] + V[nxt])
+        f2 = 0.5 * torch.sum(d * d)
+
+        D = V - V_og
+        f3 = 0.5 * torch.sum(D * D)
+        return w1 * f1 + w2 * f2 + w3 * f3
+
+    return fused_total_loss
+
+
+class FusedTotalLoss:
+    """
+    Callable loss V -> total_loss(V, E, V_og, ...) specialised to one topology.
+    Assumes the support vertices of V_og stay fixed, as every optimizer in this repo does.
+    Falls back to the eager function (with a warning) if compilation fails.
+    """
+    def __init__(self, E, V_og: torch.Tensor, compile: bool = True, **weights):
+        self.eager = _build_fused_fn(E, V_og, **weights)
+        self.compiled = None
+        if compile and hasattr(torch, 'compile'):
+            self.compiled = torch.compile(self.eager, dynamic=False)
+
+    def __call__(self, V: torch.Tensor) -> torch.Tensor:
+        if self.compiled is not None:
+            try:
+                return self.compiled(V)
+            except Exception as e:
+                warnings.warn(f"torch.compile failed ({e}); using the eager fused loss.")
+                self.compiled = None
+        return self.eager(V)
+
+
+def make_fused_total_loss(E, V_og: torch.Tensor, compile: bool = True, **weights) -> FusedTotalLoss:
+    """Builds the fused total loss for the topology of E; weights are total_loss's lambda/mu keywords."""
+    return FusedTotalLoss(E, V_og, compile=compile, **weights)
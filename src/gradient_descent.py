@@ -1,9 +1,24 @@
-def gradient_descent(f, x0, b0, c0, lr, tol = 1e-6, max_iters = 1000):
+import torch
+
+def gradient_descent(f, x0, b0, c0, lr, tol = 1e-6, max_iters = 1000, check_every = 10, grad_tol = 1e-6, rel_tol = 1e-7, frozen = None, return_info = False, callback = None, telemetry = None):
+	# frozen: optional bool mask of rows of x that keep their initial value (e.g. the support vertices)
+	# grad_tol: stop when the norm of the (frozen-masked) gradient of x, b, c falls below this
+	# rel_tol: stop when the relative loss change between two checks falls below this
+	# callback: optional callback(iteration, loss, x, b, c) run at every check; returning True stops the descent
+	# telemetry: optional optimization_telemetry.TelemetryRecorder, recorded with x, b, c as the terms_fn parameters
+	# info (return_info): 'iterations', 'loss_history' (tensor of the loss at every step) and 'stop_reason'
 	x = x0.clone().detach().requires_grad_(True) 
 	b = b0.clone().detach().requires_grad_(True)
 	c = c0.clone().detach().requires_grad_(True)
 
 	loss = None
+	# preallocated so recording the loss every step stays on the device
+	history = torch.empty(max_iters, dtype=x.dtype, device=x.device)
+	iterations = 0
+	previous_check = None
+	stop_reason = f"reached max_iters = {max_iters}"
+	if telemetry is not None:
+		telemetry.start()
 
 	for i in range(0, max_iters):
 		# reset all gradients from previous iterations to 0 
@@ -13,17 +28,42 @@ def gradient_descent(f, x0, b0, c0, lr, tol = 1e-6, max_iters = 1000):
 
 		loss = f(x, b, c) # treated as a 0-D torch tensor
 
-		# check stopping condition
-		if loss.item() < tol:
-			break
-
 		# backpropagate and update the param grads with the results
 		loss.backward()
+		if frozen is not None:
+			x.grad[frozen] = 0.0
+		history[i] = loss.detach()
+
+		if telemetry is not None and telemetry.wants(i):
+			grad_norm = torch.sqrt(sum(torch.sum(param.grad ** 2) for param in (x, b, c)))
+			telemetry.record(i, loss, grad_norm, lr * grad_norm, x.detach(), b.detach(), c.detach())
+
+		# check stopping condition only every check_every steps to avoid a host sync per iteration
+		if i % check_every == 0 or i == max_iters - 1:
+			loss_value = loss.item()
+			if callback is not None and callback(i, loss_value, x.detach(), b.detach(), c.detach()):
+				stop_reason = "stopped by callback"
+				break
+			if loss_value < tol:
+				stop_reason = f"loss {loss_value:.6g} < tol {tol}"
+				break
+			grad_norm = torch.sqrt(sum(torch.sum(param.grad ** 2) for param in (x, b, c))).item()
+			if grad_norm <= grad_tol:
+				stop_reason = f"gradient norm {grad_norm:.3g} <= grad_tol {grad_tol}"
+				break
+			if previous_check is not None and abs(previous_check - loss_value) <= rel_tol * max(abs(previous_check), 1e-12):
+				stop_reason = f"relative loss change below rel_tol {rel_tol}"
+				break
+			previous_check = loss_value
 
 		# do the update step in torch.no_grad() so it is not counted in future backpropagation
 		with torch.no_grad():
 			x -= lr * x.grad 
 			b -= lr * b.grad 
 			c -= lr * c.grad
+		iterations = i + 1
 
+	if return_info:
+		recorded = min(iterations + 1, max_iters) if loss is not None else 0
+		return x, b, c, {'iterations': iterations, 'loss_history': history[:recorded].clone(), 'stop_reason': stop_reason}
 	return x, b, c
@@ -1,56 +1,138 @@
-import gpytoolbox as gpy
-import torch
-import polyscope as ps
-import matplotlib.pyplot as plt
-
-
-
-V = torch.tensor([
-    [-2, 0], [-2, 2], [0, 2], [0, 0],
-    [2, 0], [2, -2], [0, -2]
-])
-E=torch.tensor([
-    [0, 1], [1, 2], [2, 3], [3, 0],
-    [3, 4], [4, 5], [5, 6], [6, 3]
-])
-
-
-line=torch.tensor([1,-0.3]) #r and c that define the line by cos(r)x+sin(r)y=c
-
-r=line[0] % (2*torch.pi) # make r in [0,2pi)
-c=line[1]
-#normal of the line, orientated
-n=torch.tensor([torch.cos(r),torch.sin(r)])
-#line in y=mx+b format
-m=-torch.cos(r) / (torch.sin(r)+1e-12)
-b=c / (torch.sin(r)+1e-12)
-
-
-#calculate the intersection loop
-intersec=torch.empty((1, 2))
-
-for edge in E:
-    v0=V[edge[0]]
-    v1=V[edge[1]]
-    # the line of the edge
-    m0 = (v1[1] - v0[1]) / (v1[0] - v0[0]+1e-12)
-    b0 = v0[1] - m0 * v0[0]
-    #compute intersection
-    if m  != m0 and b != b0:
-        x = (b0 - b) / (m  - m0+1e-12)
-        y = m  * x + b
-        i = torch.tensor([[x,y]])
-        #check if it is in the edge
-        if torch.min(v0[0], v1[0]) - 1e-12 <= x <= torch.max(v0[0], v1[0]) + 1e-12 and torch.min(v0[1], v1[1]) - 1e-12 <= y <= torch.max(v0[1], v1[1]) + 1e-12:
-            intersec = torch.cat((intersec, i), dim=0)
-            print(edge,"here")
-        #else it doesn't is in the edge
-intersec=intersec[1:, :]
-print(intersec)
-
-
-
-
-
-
-
+"""
+Carving a shape with straight lines.
+
+A line is given by (r, c), meaning cos(r) x + sin(r) y = c (see notes.md). For a batch of
+K lines everything is evaluated in one vectorized pass over the (edges x lines) grid:
+the edge/line intersection points, which edges each line crosses, and the carved polygon
+(the part of the shape with cos(r) x + sin(r) y <= c) together with its area and center of mass.
+"""
+import torch
+from typing import NamedTuple
+from shape_topology import ShapeTopology, get_topology
+
+
+class CarvingResult(NamedTuple):
+    points: torch.Tensor          # (E, K, 2) intersection point of edge e with line k (edge start where not crossed)
+    crossed: torch.Tensor         # (E, K) True where line k crosses edge e
+    crossed_edges: torch.Tensor   # (M, 2) (edge index, line index) pairs of all crossings
+    segments: torch.Tensor        # (L, K, 2, 2) boundary segments of the carved polygon, one per loop edge
+    segment_mask: torch.Tensor    # (L, K) True where the loop edge keeps a (possibly clipped) segment
+    area: torch.Tensor            # (K,) area of the carved polygon
+    center_of_mass: torch.Tensor  # (K, 2) center of mass of the carved polygon
+
+
+def _line_frames(lines: torch.Tensor):
+    """Unit normal n = (cos r, sin r), tangent t = (-sin r, cos r) and offset c of each line."""
+    lines = lines.reshape(-1, 2)
+    r = lines[:, 0] % (2 * torch.pi)
+    c = lines[:, 1]
+    n = torch.stack([torch.cos(r), torch.sin(r)], dim=1)
+    t = torch.stack([-torch.sin(r), torch.cos(r)], dim=1)
+    return n, t, c
+
+
+def signed_distances(V: torch.Tensor, lines: torch.Tensor) -> torch.Tensor:
+    """(N, K) values of cos(r) x + sin(r) y - c; the kept side of a cut is where this is <= 0."""
+    n, _, c = _line_frames(lines)
+    return V @ n.T - c
+
+
+def _edge_crossings(a: torch.Tensor, b: torch.Tensor, s_a: torch.Tensor, s_b: torch.Tensor):
+    """Crossing mask and intersection points for edges a->b against every line (no slope-intercept forms)."""
+    crossed = (s_a <= 0) != (s_b <= 0)
+    denom = torch.where(crossed, s_a - s_b, torch.ones_like(s_a))
+    t = torch.where(crossed, s_a / denom, torch.zeros_like(s_a))
+    points = a.unsqueeze(1) + t.unsqueeze(2) * (b - a).unsqueeze(1)
+    return crossed, points
+
+
+def line_edge_intersections(V: torch.Tensor, E: torch.Tensor, lines: torch.Tensor):
+    """
+    Intersections of every edge with every line.
+    Returns:
+        points: (E, K, 2) intersection points (edge start where the line does not cross)
+        crossed: (E, K) bool mask of crossings
+    """
+    E = torch.as_tensor(E, dtype=torch.long, device=V.device)
+    s = signed_distances(V, lines)
+    crossed, points = _edge_crossings(V[E[:, 0]], V[E[:, 1]], s[E[:, 0]], s[E[:, 1]])
+    return points, crossed
+
+
+def carve(V: torch.Tensor, E, lines: torch.Tensor, keep_positive: bool = False) -> CarvingResult:
+    """
+    Carves the shape (V, E) with K lines at once.
+    The carved polygon keeps the side cos(r) x + sin(r) y <= c (or >= c with keep_positive).
+    Its boundary is every loop edge clipped to that side plus chords along the line from each
+    exit point to the next entry point; since chord endpoints lie on the line, the chord
+    moments are sums of per-point polynomials and no pairing of the points is needed.
+    Everything is differentiable with respect to V and the line parameters.
+    """
+    lines = lines.reshape(-1, 2)
+    if keep_positive:
+        # The same line with flipped normal: (r + pi, -c)
+        lines = torch.stack([lines[:, 0] + torch.pi, -lines[:, 1]], dim=1)
+    n, t, c = _line_frames(lines)
+    if isinstance(E, ShapeTopology):
+        topo = E.to(V.device)
+        E_t = torch.stack([topo.loop_from, topo.loop_to], dim=1)
+    else:
+        E_t = torch.as_tensor(E, dtype=torch.long, device=V.device)
+        topo = get_topology(E_t, V.shape[0]).to(V.device)
+
+    s = V @ n.T - c
+    # Intersections with the raw edge list
+    crossed, points = _edge_crossings(V[E_t[:, 0]], V[E_t[:, 1]], s[E_t[:, 0]], s[E_t[:, 1]])
+
+    # Clip the directed loop edges to the kept side
+    a, b = V[topo.loop_from], V[topo.loop_to]
+    s_a, s_b = s[topo.loop_from], s[topo.loop_to]
+    inside_a, inside_b = s_a <= 0, s_b <= 0
+    _, X = _edge_crossings(a, b, s_a, s_b)
+    start = torch.where(inside_a.unsqueeze(2), a.unsqueeze(1), X)
+    end = torch.where(inside_b.unsqueeze(2), b.unsqueeze(1), X)
+    segment_mask = inside_a | inside_b
+    w = segment_mask.to(V.dtype)
+
+    cross = (start[..., 0] * end[..., 1] - start[..., 1] * end[..., 0]) * w
+    area2 = cross.sum(dim=0)
+    sx = ((start[..., 0] + end[..., 0]) * cross).sum(dim=0)
+    sy = ((start[..., 1] + end[..., 1]) * cross).sum(dim=0)
+
+    # Chords along the line: entry points count +g(u), exit points -g(u), with u = X . t
+    sign = ((~inside_a & inside_b).to(V.dtype) - (inside_a & ~inside_b).to(V.dtype))
+    u = torch.einsum('lkd,kd->lk', X, t)
+    area2 = area2 + (sign * c * u).sum(dim=0)
+    sx = sx + (sign * (2 * c * c * n[:, 0] * u + c * t[:, 0] * u * u)).sum(dim=0)
+    sy = sy + (sign * (2 * c * c * n[:, 1] * u + c * t[:, 1] * u * u)).sum(dim=0)
+
+    # Normalize the traced orientation so the full shape has positive area
+    full = V[topo.loop_from, 0] * V[topo.loop_to, 1] - V[topo.loop_from, 1] * V[topo.loop_to, 0]
+    orientation = 1.0 - 2.0 * (full.sum() < 0).to(V.dtype)
+    area = 0.5 * area2 * orientation
+
+    degenerate = torch.abs(area) < 1e-9
+    safe = torch.where(degenerate, torch.ones_like(area2), area2)
+    com = torch.stack([sx, sy], dim=1) / (3.0 * safe).unsqueeze(1)
+    com = torch.where(degenerate.unsqueeze(1), V.mean(dim=0).expand_as(com), com)
+
+    return CarvingResult(points, crossed, torch.nonzero(crossed), torch.stack([start, end], dim=2),
+                         segment_mask, area, com)
+
+
+if __name__ == '__main__':
+    # The hourglass example from notes.md
+    V = torch.tensor([
+        [-2, 0], [-2, 2], [0, 2], [0, 0],
+        [2, 0], [2, -2], [0, -2]
+    ], dtype=torch.float32)
+    E = torch.tensor([
+        [0, 1], [1, 2], [2, 3], [3, 0],
+        [3, 4], [4, 5], [5, 6], [6, 3]
+    ])
+    line = torch.tensor([[1, -0.3]])  # r and c that define the line by cos(r)x+sin(r)y=c
+    result = carve(V, E, line)
+    for edge_idx, _ in result.crossed_edges.tolist():
+        print(E[edge_idx].tolist(), "here")
+    print(result.points[result.crossed])
+    print(f"Carved area: {result.area.item():.4f}, center of mass: {result.center_of_mass[0].tolist()}")
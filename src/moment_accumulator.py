@@ -0,0 +1,104 @@
+"""
+Incrementally maintained area and first moments of a Shape2D.
+
+Moving one vertex only changes the terms of the loop edges that touch it, so the accumulator
+keeps every per-edge term (the same cross products as shape_mass_center._segment_moments) and
+running totals, and applies the difference of the touched edges on each move. The totals are
+re-summed from the stored terms every resum_every updates to keep rounding drift bounded.
+"""
+import torch
+from typing import Tuple
+
+# Number of incremental updates between two exact re-sums of the totals
+RESUM_EVERY = 256
+
+
+class MomentAccumulator:
+    """
+    Area and center of mass of a Shape2D, kept up to date under vertex moves in O(degree) per vertex.
+    Edits made directly on shape.vertices / shape.edges are detected on the next query (through the
+    tensor version counter and the edge list length) and trigger a full rebuild.
+    """
+    def __init__(self, shape, resum_every: int = RESUM_EVERY):
+        self.shape = shape
+        self.resum_every = resum_every
+        self.rebuild()
+
+    def _sync_key(self) -> tuple:
+        V, E = self.shape.vertices, self.shape.edges
+        return (id(V), V._version, V.shape[0], id(E), len(E))
+
+    def rebuild(self):
+        """Traces the topology (cached) and recomputes every edge term and the totals."""
+        V = self.shape.vertices.detach().to(torch.float64)
+        topo = self.shape.topology
+        self.loop_from, self.loop_to = topo.loop_from, topo.loop_to
+        num_edges = self.loop_from.shape[0]
+        # Vertex -> incident loop edges, as CSR offsets into an edge index array
+        ends = torch.cat([self.loop_from, self.loop_to])
+        order = torch.argsort(ends, stable=True)
+        self._incident = torch.cat([torch.arange(num_edges), torch.arange(num_edges)])[order]
+        counts = torch.bincount(ends, minlength=V.shape[0])
+        self._offsets = [0] + torch.cumsum(counts, dim=0).tolist()
+        self.terms = self._edge_terms(V, self.loop_from, self.loop_to)
+        self.resum(V)
+        self._key = self._sync_key()
+
+    @staticmethod
+    def _edge_terms(V: torch.Tensor, i: torch.Tensor, j: torch.Tensor) -> torch.Tensor:
+        """(k, 3) terms (cross, (x1 + x2) cross, (y1 + y2) cross) of the edges i -> j."""
+        v1, v2 = V[i], V[j]
+        cross = v1[:, 0] * v2[:, 1] - v1[:, 1] * v2[:, 0]
+        return torch.stack([cross, (v1[:, 0] + v2[:, 0]) * cross, (v1[:, 1] + v2[:, 1]) * cross], dim=1)
+
+    def resum(self, V: torch.Tensor = None):
+        """Exact totals from the stored edge terms (and the vertex sum for the degenerate fallback)."""
+        if V is None:
+            V = self.shape.vertices.detach().to(torch.float64)
+        self.totals = self.terms.sum(dim=0)
+        self.vertex_sum = V.sum(dim=0)
+        self._updates = 0
+
+    def move_vertex(self, idx: int, x: float, y: float):
+        """Moves vertex idx of the shape to (x, y) and updates the moments of its incident edges."""
+        self.move_vertices([idx], [[x, y]])
+
+    def move_vertices(self, indices, positions):
+        """Moves k vertices at once in O(k * degree)."""
+        self._ensure_synced()
+        V = self.shape.vertices
+        idx = torch.as_tensor(indices, dtype=torch.long)
+        new = torch.as_tensor(positions, dtype=V.dtype).reshape(-1, 2)
+        self.vertex_sum += (new.to(torch.float64) - V[idx].detach().to(torch.float64)).sum(dim=0)
+        with torch.no_grad():
+            V[idx] = new
+        edges = torch.cat([self._incident[self._offsets[i]:self._offsets[i + 1]] for i in idx.tolist()]).unique()
+        V64 = V.detach().to(torch.float64) if V.dtype != torch.float64 else V.detach()
+        updated = self._edge_terms(V64, self.loop_from[edges], self.loop_to[edges])
+        self.totals += (updated - self.terms[edges]).sum(dim=0)
+        self.terms[edges] = updated
+        self._updates += 1
+        if self._updates >= self.resum_every:
+            self.resum()
+        self._key = self._sync_key()
+
+    def _ensure_synced(self):
+        if self._key != self._sync_key():
+            self.rebuild()
+
+    def area_and_center_of_mass(self) -> Tuple[float, Tuple[float, float]]:
+        """(area, (cx, cy)) from the running totals, like calculate_center_of_mass."""
+        self._ensure_synced()
+        area2, sx, sy = self.totals.tolist()
+        n = self.shape.vertices.shape[0]
+        if abs(0.5 * area2) < 1e-9 or n == 0:
+            if n == 0:
+                return 0.0, (0.0, 0.0)
+            mx, my = (self.vertex_sum / n).tolist()
+            return 0.0, (mx, my)
+        return abs(0.5 * area2), (sx / (3.0 * area2), sy / (3.0 * area2))
+
+    def center_of_mass(self) -> torch.Tensor:
+        """Center of mass as a (2,) tensor in the dtype of the shape's vertices."""
+        _, com = self.area_and_center_of_mass()
+        return torch.tensor(com, dtype=self.shape.vertices.dtype)
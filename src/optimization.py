@@ -1,11 +1,18 @@
 import torch
 from shape2d import Shape2D
-from shape_smoothing import calculate_smoothing_score
+from shape_smoothing import calculate_smoothing_score, smoothing_energy_operator
 from shape_similarity import calculate_shape_similarity
 from shape_mass_center import calculate_center_of_mass
-from constants import SUPPORT_TOL
+from shape_topology import get_topology
+from shape_moments import PolygonMoments
+from gradient_descent import gradient_descent as joint_gradient_descent
+from constants import SUPPORT_TOL, WALL_THICKNESS
 
-def f1(V: torch.Tensor, E: torch.Tensor, support_y=None) -> torch.Tensor:
+def support_center_x(V: torch.Tensor, support_y=None) -> torch.Tensor:
+    """
+    x of the support center c* that f1 and f1_carved pull the center of mass over:
+    the mean x of the vertices at support_y (by default the lowest y).
+    """
     # Use the lowest y as the support if not specified
     if support_y is None:
         min_y = V[:, 1].min()
@@ -17,71 +24,253 @@ def f1(V: torch.Tensor, E: torch.Tensor, support_y=None) -> torch.Tensor:
     if support_mask.sum() == 0:
         # If still no support, just use the lowest y vertex
         support_mask = (V[:, 1] == V[:, 1].min())
-    c_star_x = V[support_mask, 0].mean()
-    area, com = calculate_center_of_mass(V, E)
+    return V[support_mask, 0].mean()
+
+def f1(V: torch.Tensor, E: torch.Tensor, support_y=None) -> torch.Tensor:
+    c_star_x = support_center_x(V, support_y)
+    # E may be an edge tensor or a ShapeTopology; either way the loops are traced once per topology
+    area, com = calculate_center_of_mass(V, get_topology(E, V.shape[0]))
     return 0.5 * (com[0] - c_star_x) ** 2
 
-def f2(V: torch.Tensor) -> torch.Tensor:
-    return calculate_smoothing_score(V)
+def f2(V: torch.Tensor, E: torch.Tensor = None) -> torch.Tensor:
+    return calculate_smoothing_score(V, E)
 
 def f3(V: torch.Tensor, V_og: torch.Tensor) -> torch.Tensor:
     return calculate_shape_similarity(V, V_og)
 
 # --- Total loss function using the shared modules ---
 def total_loss(V: torch.Tensor, E: torch.Tensor, V_og: torch.Tensor, lambda1=0.33, lambda2=0.33, lambda3=0.34, mu1=1.0, mu2=1.0, mu3=1.0) -> torch.Tensor:
-    return lambda1 * mu1 * f1(V, E) + lambda2 * mu2 * f2(V) + lambda3 * mu3 * f3(V, V_og)
+    # Resolve the topology once; f1 and f2 then reuse its loops and cached smoothing operator
+    E = get_topology(E, V.shape[0])
+    return lambda1 * mu1 * f1(V, E) + lambda2 * mu2 * f2(V, E) + lambda3 * mu3 * f3(V, V_og)
+
+# --- Carving: f1 of the carved shape, optimized jointly with the cut line y = b x + c ---
+def carved_centers_of_mass(moments: PolygonMoments, cuts: torch.Tensor, thickness=WALL_THICKNESS) -> tuple:
+    """
+    Masses (K,) and centers of mass (K, 2) of the shape carved by K lines y = b x + c, given as
+    (K, 2) rows (b, c), from the precomputed moments of the shape (see carved_center_of_mass).
+    """
+    solid = moments.below(cuts)
+    walls = moments.boundary_above(cuts)
+    mass = solid[:, 0] + thickness * walls[:, 0]
+    safe = torch.where(torch.abs(mass) < 1e-12, torch.ones_like(mass), mass)
+    return mass, (solid[:, 1:3] + thickness * walls[:, 1:]) / safe.unsqueeze(1)
+
+def carved_center_of_mass(V: torch.Tensor, E, b: torch.Tensor, c: torch.Tensor, thickness=WALL_THICKNESS) -> tuple:
+    """
+    Mass and center of mass of the shape carved by the line y = b x + c (see notes.md).
+    The part below the line stays solid; the part above is hollowed out, leaving walls of the
+    given thickness along its boundary, modelled as thin walls lying on the boundary itself.
+    The two parts are mixed as c = sum m_i c_i / sum m_i. Differentiable with respect to V, b and c.
+    """
+    moments = PolygonMoments(V, get_topology(E, V.shape[0]))
+    cut = torch.stack([b.reshape(()), c.reshape(())]).unsqueeze(0)
+    mass, com = carved_centers_of_mass(moments, cut, thickness)
+    return mass[0], com[0]
+
+def f1_carved(V: torch.Tensor, E, b: torch.Tensor, c: torch.Tensor, thickness=WALL_THICKNESS, support_y=None) -> torch.Tensor:
+    """f1 with the center of mass of the carved shape (solid part plus shell walls)."""
+    c_star_x = support_center_x(V, support_y)
+    mass, com = carved_center_of_mass(V, E, b, c, thickness)
+    return 0.5 * (com[0] - c_star_x) ** 2
+
+def total_loss_carved(V: torch.Tensor, b: torch.Tensor, c: torch.Tensor, E, V_og: torch.Tensor, thickness=WALL_THICKNESS,
+                      lambda1=0.33, lambda2=0.33, lambda3=0.34, mu1=1.0, mu2=1.0, mu3=1.0) -> torch.Tensor:
+    """total_loss with f1 evaluated on the carved shape; a function of (V, b, c) for gradient_descent.py."""
+    return lambda1 * mu1 * f1_carved(V, E, b, c, thickness) + lambda2 * mu2 * f2(V, E) + lambda3 * mu3 * f3(V, V_og)
+
+def initial_cut(V: torch.Tensor) -> tuple:
+    """Horizontal cut halfway up the shape, the default starting point of the joint optimization."""
+    y = V[:, 1].detach()
+    return torch.zeros((), dtype=V.dtype, device=V.device), 0.5 * (y.min() + y.max())
+
+def optimize_carved(V_og: torch.Tensor, E, b0=None, c0=None, lr=0.05, max_iters=1000, thickness=WALL_THICKNESS,
+                    tol=SUPPORT_TOL, check_every=10, return_info=False, callback=None, telemetry=None, **weights):
+    """
+    Joint optimization of the vertices and the carving line with gradient_descent.py.
+    One backward pass per step gives the gradients of V, b and c together; the topology is
+    traced once and shared by f1 and f2. The support vertices stay fixed.
+    callback(iteration, loss, V, b, c) runs at every check and stops the descent by returning True;
+    telemetry is an optional TelemetryRecorder (see optimization_telemetry.carved_loss_terms).
+    Returns:
+        (V, b, c), or (V, b, c, info) if return_info
+    """
+    E = get_topology(E, V_og.shape[0])
+    b_init, c_init = initial_cut(V_og)
+    b0 = b_init if b0 is None else torch.as_tensor(b0, dtype=V_og.dtype)
+    c0 = c_init if c0 is None else torch.as_tensor(c0, dtype=V_og.dtype)
+    frozen = torch.abs(V_og[:, 1]) < SUPPORT_TOL
+
+    def loss_fn(V, b, c):
+        return total_loss_carved(V, b, c, E, V_og, thickness, **weights)
+
+    V, b, c, info = joint_gradient_descent(loss_fn, V_og, b0, c0, lr, tol=tol, max_iters=max_iters,
+                                           check_every=check_every, frozen=frozen, return_info=True,
+                                           callback=callback, telemetry=telemetry)
+    if return_info:
+        return V.detach(), b.detach(), c.detach(), info
+    return V.detach(), b.detach(), c.detach()
+
+# --- Closed-form (loss, grad) of total_loss, no autograd graph ---
+def f1_and_grad(V: torch.Tensor, E) -> tuple:
+    """f1 and its gradient from the polygon moment formulas (default support, lowest y)."""
+    n = V.shape[0]
+    min_y = V[:, 1].min()
+    support_mask = torch.abs(V[:, 1] - min_y) < SUPPORT_TOL
+    support_w = support_mask.to(V.dtype) / support_mask.sum().to(V.dtype)
+    c_star_x = torch.sum(V[:, 0] * support_w)
+
+    topo = get_topology(E, n).to(V.device)
+    grad_cx = torch.zeros_like(V)
+    area2 = None
+    if topo.num_loops > 0:
+        i, j = topo.loop_from, topo.loop_to
+        xi, yi, xj, yj = V[i, 0], V[i, 1], V[j, 0], V[j, 1]
+        cross = xi * yj - yi * xj
+        sx = xi + xj
+        area2 = cross.sum()
+    if area2 is None or torch.abs(0.5 * area2) < 1e-9:
+        # Degenerate area: the CoM falls back to the vertex mean
+        cx = V[:, 0].mean()
+        grad_cx[:, 0] = 1.0 / n
+    else:
+        cx = torch.sum(sx * cross) / (3.0 * area2)
+        # d(Sx) - 3 cx d(A2), accumulated onto both ends of every loop edge
+        gi = torch.stack([cross + sx * yj - 3.0 * cx * yj, -sx * xj + 3.0 * cx * xj], dim=1)
+        gj = torch.stack([cross - sx * yi + 3.0 * cx * yi, sx * xi - 3.0 * cx * xi], dim=1)
+        grad_cx.index_add_(0, i, gi)
+        grad_cx.index_add_(0, j, gj)
+        grad_cx /= 3.0 * area2
+    r = cx - c_star_x
+    grad = r * grad_cx
+    grad[:, 0] -= r * support_w
+    return 0.5 * r ** 2, grad
+
+def f2_and_grad(V: torch.Tensor, E=None) -> tuple:
+    """f2 = 0.5 * ||W D V||^2 and its gradient D^T W D V (W: 0/1 support weights of the triplet rows)."""
+    operator = smoothing_energy_operator(V, E)
+    DV = torch.sparse.mm(operator.difference, V) * operator.support_weights(V)[:, None]
+    return 0.5 * torch.sum(DV * DV), torch.sparse.mm(operator.difference_t, DV)
+
+def f3_and_grad(V: torch.Tensor, V_og: torch.Tensor) -> tuple:
+    D = V - V_og
+    return 0.5 * torch.sum(D * D), D
+
+def total_loss_and_grad(V: torch.Tensor, E, V_og: torch.Tensor, lambda1=0.33, lambda2=0.33, lambda3=0.34, mu1=1.0, mu2=1.0, mu3=1.0) -> tuple:
+    """
+    Returns (loss, grad) of total_loss from closed-form expressions, without building an autograd graph.
+    """
+    with torch.no_grad():
+        V = V.detach()
+        l1, g1 = f1_and_grad(V, E)
+        l2, g2 = f2_and_grad(V, E)
+        l3, g3 = f3_and_grad(V, V_og)
+        w1, w2, w3 = lambda1 * mu1, lambda2 * mu2, lambda3 * mu3
+        return w1 * l1 + w2 * l2 + w3 * l3, w1 * g1 + w2 * g2 + w3 * g3
+
+def quadratic_hessian(V: torch.Tensor, E, lambda2=0.33, lambda3=0.34, mu2=1.0, mu3=1.0):
+    """
+    Hessian-vector product of lambda2*mu2*f2 + lambda3*mu3*f3, i.e. X -> w2 D^T W D X + w3 X.
+    The operator is sparse, acts on x and y independently and stays constant while the
+    support vertices are frozen.
+    """
+    operator = smoothing_energy_operator(V, E)
+    D, Dt = operator.difference, operator.difference_t
+    weights = operator.support_weights(V)[:, None]
+    w2, w3 = lambda2 * mu2, lambda3 * mu3
+    def hvp(X: torch.Tensor) -> torch.Tensor:
+        return w2 * torch.sparse.mm(Dt, weights * torch.sparse.mm(D, X)) + w3 * X
+    return hvp
 
 # --- Simple gradient descent optimizer for V only ---
-def gradient_descent(f, V0, lr=0.01, tol=SUPPORT_TOL, max_iters=1000, verbose=False):
+def _descent_step(V: torch.Tensor, grad: torch.Tensor, free: torch.Tensor, lr: float) -> None:
+    """In-place update V -= lr * grad on the free (non-support) rows; pure tensor ops, no host sync."""
+    V.sub_(lr * grad * free)
+
+def gradient_descent(f, V0, lr=0.01, tol=SUPPORT_TOL, max_iters=1000, verbose=False, return_info=False, grad_fn=None,
+                     check_every=10, grad_tol=1e-6, rel_tol=1e-7, log_every=100, E=None, callback=None,
+                     telemetry=None):
     """
     Simple gradient descent optimizer for V only.
+    Convergence is checked every check_every steps only, so the loop does not synchronize with
+    the host on every iteration; the loss history lives in a preallocated tensor.
     Args:
-        f: loss function taking V
+        f: loss function taking V (unused when grad_fn is given)
         V0: initial vertices (torch.Tensor)
         lr: learning rate
         tol: loss tolerance for early stopping
         max_iters: maximum number of iterations
-        verbose: if True, prints loss every 100 steps and stopping reason
+        verbose: if True, prints loss every log_every steps and stopping reason
+        return_info: if True, also returns a dict with 'iterations', 'loss_history' and 'stop_reason'
+        grad_fn: optional function of V returning (loss, grad), e.g. total_loss_and_grad; skips autograd
+        check_every: number of steps between convergence checks
+        grad_tol: stop when the norm of the (support-masked) gradient falls below this
+        rel_tol: stop when the relative loss change between two checks falls below this
+        log_every: logging interval in steps when verbose
+        E: optional edges or ShapeTopology, used to report stability at the end when verbose
+        callback: optional callback(iteration, loss, V) run at every check; returning True stops the descent
+        telemetry: optional optimization_telemetry.TelemetryRecorder
     Returns:
-        Optimized vertices (torch.Tensor)
+        Optimized vertices (torch.Tensor), or (vertices, info) if return_info
     """
-    V = V0.clone().detach().requires_grad_(True)
+    V = V0.clone().detach()
+    if grad_fn is None:
+        V.requires_grad_(True)
     
-    # Identify support vertices (those at y=0 or very close to it)
+    # Identify support vertices (those at y=0 or very close to it); their gradient is masked out
     support_mask = torch.abs(V0[:, 1]) < SUPPORT_TOL
+    free = (~support_mask).to(V.dtype).unsqueeze(1)
+    history = torch.empty(max_iters, dtype=V.dtype, device=V.device)
+    iterations = 0
+    previous_check = None
+    stop_reason = f"reached max_iters = {max_iters}"
+    loss = None
+    if telemetry is not None:
+        telemetry.start()
     
     for i in range(max_iters):
-        if V.grad is not None:
-            V.grad.zero_()
-        loss = f(V)
-        if verbose and i % 100 == 0:
-            print(f"Iter {i}: loss = {loss.item():.6f}")
-        if loss.item() < tol:
-            if verbose:
-                print(f"Stopping: loss {loss.item():.6g} < tol {tol}")
-            break
-        loss.backward()
+        if grad_fn is not None:
+            loss, grad = grad_fn(V)
+        else:
+            if V.grad is not None:
+                V.grad.zero_()
+            loss = f(V)
+            loss.backward()
+            grad = V.grad
+        history[i] = loss.detach()
+        if telemetry is not None and telemetry.wants(i):
+            grad_norm = torch.linalg.vector_norm(grad * free)
+            telemetry.record(i, loss, grad_norm, lr * grad_norm, V.detach())
+        if i % check_every == 0 or i == max_iters - 1 or (verbose and i % log_every == 0):
+            loss_value = loss.item()
+            if verbose and i % log_every == 0:
+                print(f"Iter {i}: loss = {loss_value:.6f}")
+            if callback is not None and callback(i, loss_value, V.detach()):
+                stop_reason = "stopped by callback"
+                break
+            if loss_value < tol:
+                stop_reason = f"loss {loss_value:.6g} < tol {tol}"
+                break
+            grad_norm = torch.linalg.vector_norm(grad * free).item()
+            if grad_norm <= grad_tol:
+                stop_reason = f"gradient norm {grad_norm:.3g} <= grad_tol {grad_tol}"
+                break
+            if previous_check is not None and abs(previous_check - loss_value) <= rel_tol * max(abs(previous_check), 1e-12):
+                stop_reason = f"relative loss change below rel_tol {rel_tol}"
+                break
+            previous_check = loss_value
         with torch.no_grad():
-            # Zero out gradients for support vertices to keep them fixed
-            V.grad[support_mask] = 0.0
-            V -= lr * V.grad
-    else:
-        if verbose:
-            print(f"Stopping: reached max_iters = {max_iters}")
+            _descent_step(V, grad, free, lr)
+        iterations = i + 1
     if verbose:
-        print(f"Final loss: {loss.item():.6f}")
-        try:
+        print(f"Stopping: {stop_reason}")
+        if loss is not None:
+            print(f"Final loss: {loss.item():.6f}")
+        if E is not None:
             from shape_stability import is_shape_stable
-            # Try to infer E from closure if possible
-            E = None
-            if hasattr(f, '__closure__') and f.__closure__ is not None:
-                for cell in f.__closure__:
-                    val = cell.cell_contents
-                    if isinstance(val, torch.Tensor) and val.dtype == torch.long and val.dim() == 2:
-                        E = val
-            if E is not None:
-                is_stable, _, _, _ = is_shape_stable(V.detach(), E)
-                print(f"Shape stable at end? {'YES' if is_stable else 'NO'}")
-        except Exception as e:
-            pass
+            is_stable, _, _, _ = is_shape_stable(V.detach(), E)
+            print(f"Shape stable at end? {'YES' if is_stable else 'NO'}")
+    if return_info:
+        recorded = min(iterations + 1, max_iters) if loss is not None else 0
+        return V.detach(), {'iterations': iterations, 'loss_history': history[:recorded].clone(), 'stop_reason': stop_reason}
     return V.detach()
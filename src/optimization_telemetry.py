@@ -0,0 +1,142 @@
+"""
+Per-iteration telemetry of the optimizers.
+
+A TelemetryRecorder is passed to an optimizer as telemetry=...; the optimizer calls record()
+on every sample_every-th iteration with tensors it already has (loss, gradient norm, step
+size), which are copied into a preallocated ring buffer on the loss's device without a host
+sync. The weighted terms lambda_i mu_i f_i cost an extra forward pass, so they are only
+evaluated every terms_every iterations (NaN elsewhere). Callbacks receive the latest sample
+as a dict of floats; the buffer exports to CSV or NPZ for plotting.
+
+Usage:
+    recorder = TelemetryRecorder(capacity=10000, terms_fn=loss_terms(E, V_og))
+    V = gradient_descent(f, V0, max_iters=10000, telemetry=recorder)
+    recorder.to_csv('loss.csv')
+"""
+import csv
+import time
+from typing import Callable, Dict, List
+import numpy as np
+import torch
+from optimization import f1, f2, f3, f1_carved
+from constants import WALL_THICKNESS
+
+# Columns of the buffer; f1, f2 and f3 are the weighted terms of the loss
+METRICS = ('iteration', 'loss', 'f1', 'f2', 'f3', 'grad_norm', 'step_size', 'wall_time')
+
+
+def loss_terms(E, V_og: torch.Tensor, lambda1=0.33, lambda2=0.33, lambda3=0.34, mu1=1.0, mu2=1.0, mu3=1.0) -> Callable:
+    """terms_fn(V) returning the weighted (f1, f2, f3) of optimization.total_loss."""
+    def terms(V):
+        return torch.stack([lambda1 * mu1 * f1(V, E), lambda2 * mu2 * f2(V, E), lambda3 * mu3 * f3(V, V_og)])
+    return terms
+
+
+def carved_loss_terms(E, V_og: torch.Tensor, thickness=WALL_THICKNESS, lambda1=0.33, lambda2=0.33, lambda3=0.34,
+                      mu1=1.0, mu2=1.0, mu3=1.0) -> Callable:
+    """terms_fn(V, b, c) returning the weighted (f1, f2, f3) of optimization.total_loss_carved."""
+    def terms(V, b, c):
+        return torch.stack([lambda1 * mu1 * f1_carved(V, E, b, c, thickness), lambda2 * mu2 * f2(V, E),
+                            lambda3 * mu3 * f3(V, V_og)])
+    return terms
+
+
+class TelemetryRecorder:
+    """
+    Fixed-size ring buffer of METRICS rows; once full, the oldest rows are overwritten.
+    Args:
+        capacity: number of rows kept
+        sample_every: record every sample_every-th iteration
+        terms_fn: optional function of the optimizer parameters returning the 3 weighted loss terms
+        terms_every: evaluate terms_fn on recorded iterations that are multiples of this
+        callbacks: functions called with the latest sample (dict of floats) every callback_every records
+        callback_every: records between two callback calls; each call syncs with the device
+    """
+    def __init__(self, capacity=10000, sample_every=1, terms_fn=None, terms_every=100, callbacks=(), callback_every=1):
+        self.capacity = capacity
+        self.sample_every = max(1, sample_every)
+        self.terms_fn = terms_fn
+        self.terms_every = max(1, terms_every)
+        self.callbacks: List[Callable] = list(callbacks)
+        self.callback_every = max(1, callback_every)
+        self.buffer = None
+        self.count = 0
+        self._t0 = None
+
+    def add_callback(self, callback: Callable):
+        self.callbacks.append(callback)
+
+    def start(self):
+        """Starts the wall clock; called by the optimizers before their first iteration."""
+        if self._t0 is None:
+            self._t0 = time.perf_counter()
+
+    def wants(self, iteration: int) -> bool:
+        return iteration % self.sample_every == 0
+
+    def record(self, iteration: int, loss, grad_norm, step_size, *params):
+        """
+        Stores one row. loss, grad_norm and step_size may be floats or 0-D tensors; params are
+        passed to terms_fn (e.g. V, or V, b, c).
+        """
+        self.start()
+        if self.buffer is None:
+            device = loss.device if isinstance(loss, torch.Tensor) else 'cpu'
+            self.buffer = torch.full((self.capacity, len(METRICS)), float('nan'), dtype=torch.float64, device=device)
+        row = self.buffer[self.count % self.capacity]
+        row[0] = iteration
+        row[1] = loss.detach() if isinstance(loss, torch.Tensor) else loss
+        if self.terms_fn is not None and iteration % self.terms_every == 0:
+            with torch.no_grad():
+                row[2:5] = self.terms_fn(*params)
+        else:
+            row[2:5] = float('nan')
+        row[5] = grad_norm.detach() if isinstance(grad_norm, torch.Tensor) else grad_norm
+        row[6] = step_size.detach() if isinstance(step_size, torch.Tensor) else step_size
+        row[7] = time.perf_counter() - self._t0
+        self.count += 1
+        if self.callbacks and self.count % self.callback_every == 0:
+            sample = self.latest()
+            for callback in self.callbacks:
+                callback(sample)
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def latest(self) -> Dict[str, float]:
+        if self.count == 0:
+            return {}
+        values = self.buffer[(self.count - 1) % self.capacity].tolist()
+        return dict(zip(METRICS, values))
+
+    def rows(self) -> np.ndarray:
+        """(len, len(METRICS)) array of the kept rows, oldest first."""
+        if self.count == 0:
+            return np.zeros((0, len(METRICS)))
+        data = self.buffer.cpu().numpy()
+        if self.count <= self.capacity:
+            return data[:self.count].copy()
+        split = self.count % self.capacity
+        return np.concatenate([data[split:], data[:split]])
+
+    def samples(self) -> Dict[str, np.ndarray]:
+        """One array per metric, oldest first."""
+        data = self.rows()
+        return {name: data[:, k] for k, name in enumerate(METRICS)}
+
+    def reset(self):
+        self.count = 0
+        self._t0 = None
+        if self.buffer is not None:
+            self.buffer.fill_(float('nan'))
+
+    def to_csv(self, path: str):
+        data = self.rows()
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(METRICS)
+            for row in data:
+                writer.writerow([int(row[0])] + [f"{v:.9g}" for v in row[1:]])
+
+    def to_npz(self, path: str):
+        np.savez(path, **self.samples())
@@ -0,0 +1,227 @@
+"""
+Registry of optimizers for total_loss. Every optimizer has the signature
+    optimizer(f, V0, tol=..., max_iters=..., verbose=..., return_info=..., callback=..., telemetry=..., **options)
+where callback(iteration, loss, V) is called with the current iterate at every convergence check
+and stops the optimizer by returning True, and telemetry is an optional
+optimization_telemetry.TelemetryRecorder. Every optimizer keeps the support vertices
+(|y| < SUPPORT_TOL) fixed, like optimization.gradient_descent.
+"""
+import torch
+from typing import Callable, Dict, List
+from optimization import gradient_descent
+from constants import SUPPORT_TOL
+
+OPTIMIZERS: Dict[str, Callable] = {}
+_DEFAULT_OPTIONS: Dict[str, dict] = {}
+
+def register_optimizer(name: str, **defaults):
+    """Decorator adding an optimizer to the registry, with default options for run_optimizer."""
+    def decorator(fn):
+        OPTIMIZERS[name] = fn
+        _DEFAULT_OPTIONS[name] = defaults
+        return fn
+    return decorator
+
+def available_optimizers() -> List[str]:
+    return list(OPTIMIZERS.keys())
+
+def get_optimizer(name: str) -> Callable:
+    if name not in OPTIMIZERS:
+        raise ValueError(f"Unknown optimizer '{name}'. Available: {', '.join(OPTIMIZERS)}")
+    return OPTIMIZERS[name]
+
+def run_optimizer(name: str, f, V0, **options):
+    """Runs a registered optimizer, filling in its registered default options."""
+    merged = dict(_DEFAULT_OPTIONS.get(name, {}))
+    merged.update(options)
+    return get_optimizer(name)(f, V0, **merged)
+
+def _free_mask(V0: torch.Tensor) -> torch.Tensor:
+    return ~(torch.abs(V0[:, 1]) < SUPPORT_TOL)
+
+
+@register_optimizer('gradient_descent', lr=0.05)
+def _gradient_descent(f, V0, hessian=None, **options):
+    # Fixed-step descent has no use for the Hessian; everything else goes straight through
+    return gradient_descent(f, V0, **options)
+
+
+@register_optimizer('lbfgs', max_iters=100)
+def lbfgs(f, V0, lr=1.0, tol=SUPPORT_TOL, max_iters=100, verbose=False, return_info=False,
+          history_size=10, check_every=10, grad_tol=1e-7, change_tol=1e-10, rel_tol=1e-7, callback=None,
+          telemetry=None, **options):
+    """
+    L-BFGS with strong-Wolfe line search over the free (non-support) vertices.
+    Runs in chunks of check_every iterations. After each chunk it stops when the loss is below tol,
+    when the relative loss decrease over the chunk is at most rel_tol (this includes chunks that end
+    without any decrease), or when L-BFGS returns without stepping. The chunks of torch's L-BFGS
+    often end after a single iteration through change_tol, so the chunk count alone never ends the run.
+
+    f1 is discontinuous where the support set changes (vertices within SUPPORT_TOL of the lowest y).
+    The long first steps of L-BFGS can split a support edge and land in another basin than the short
+    steps of gradient descent; the line search cannot recover from that, and the relative-decrease
+    stop ends the run there.
+    """
+    V_fixed = V0.clone().detach()
+    free = _free_mask(V0).unsqueeze(1).expand_as(V_fixed)
+    x = V_fixed[free].clone().requires_grad_(True)
+    opt = torch.optim.LBFGS([x], lr=lr, max_iter=check_every, history_size=history_size,
+                            tolerance_grad=grad_tol, tolerance_change=change_tol, line_search_fn='strong_wolfe')
+    loss_history = []
+
+    def closure():
+        opt.zero_grad()
+        loss = f(V_fixed.masked_scatter(free, x))
+        loss.backward()
+        return loss
+
+    iterations = 0
+    previous_loss = None
+    stop_reason = f"reached max_iters = {max_iters}"
+    if telemetry is not None:
+        telemetry.start()
+    while iterations < max_iters:
+        chunk = min(check_every, max_iters - iterations)
+        opt.param_groups[0]['max_iter'] = chunk
+        opt.param_groups[0]['max_eval'] = 4 * chunk
+        x_before = x.detach().clone() if telemetry is not None else None
+        loss = opt.step(closure)
+        done = opt.state[x].get('n_iter', 0)
+        step_iters = done - iterations
+        iterations = done
+        # opt.step returns the loss at the start of the chunk; the checks use the one of the current iterate
+        V_current = V_fixed.masked_scatter(free, x.detach())
+        with torch.no_grad():
+            current_loss = f(V_current).item()
+        loss_history.append(current_loss)
+        if telemetry is not None:
+            # One row per chunk: the step is the total move of the chunk
+            telemetry.record(iterations, current_loss, torch.linalg.vector_norm(x.grad),
+                             torch.linalg.vector_norm(x.detach() - x_before), V_current)
+        if verbose:
+            print(f"Iter {iterations}: loss = {current_loss:.6f}")
+        if callback is not None and callback(iterations, current_loss, V_current):
+            stop_reason = "stopped by callback"
+            break
+        if current_loss < tol:
+            stop_reason = f"loss {current_loss:.6g} < tol {tol}"
+            break
+        if step_iters == 0:
+            # L-BFGS returned without stepping: the gradient is below grad_tol
+            stop_reason = "L-BFGS converged (no step taken)"
+            break
+        if previous_loss is not None and previous_loss - current_loss <= rel_tol * max(abs(previous_loss), 1e-12):
+            stop_reason = f"relative loss decrease below rel_tol {rel_tol}"
+            break
+        previous_loss = current_loss
+    if verbose:
+        print(f"Stopping: {stop_reason}")
+    V = V_fixed.masked_scatter(free, x.detach())
+    if return_info:
+        return V, {'iterations': iterations, 'loss_history': loss_history, 'stop_reason': stop_reason}
+    return V
+
+
+def _conjugate_gradient(A, b: torch.Tensor, max_iters=50, tol=1e-8) -> torch.Tensor:
+    """Solves A x = b for a symmetric positive definite operator A acting on (n, 2) tensors."""
+    x = torch.zeros_like(b)
+    r = b.clone()
+    p = r.clone()
+    rs = torch.sum(r * r)
+    threshold = tol * tol * rs
+    for _ in range(max_iters):
+        if rs <= threshold:
+            break
+        Ap = A(p)
+        alpha = rs / torch.sum(p * Ap)
+        x += alpha * p
+        r -= alpha * Ap
+        rs_new = torch.sum(r * r)
+        p = r + (rs_new / rs) * p
+        rs = rs_new
+    return x
+
+
+@register_optimizer('newton', max_iters=50)
+def damped_newton(f, V0, hessian=None, lr=1.0, tol=SUPPORT_TOL, max_iters=50, verbose=False, return_info=False,
+                  damping=1e-3, max_damping=1e6, grad_tol=1e-8, rel_tol=1e-7, cg_iters=50, cg_tol=1e-8, callback=None,
+                  telemetry=None, **options):
+    """
+    Damped Newton method. The step solves (H + damping I) p = -grad on the free vertices with
+    conjugate gradients, where H is the sparse Hessian-vector product of f2 + f3
+    (see optimization.quadratic_hessian); the f1 curvature is left out and a backtracking
+    line search on f keeps every step a descent step. Damping shrinks after accepted steps
+    and grows after rejected ones. Stops when an accepted step decreases the loss by at most
+    rel_tol relative to the previous loss; grad_tol alone is rarely reached in float32.
+    """
+    if hessian is None:
+        raise ValueError("The newton optimizer needs a Hessian-vector product; see optimization.quadratic_hessian.")
+    V = V0.clone().detach()
+    free = _free_mask(V0).unsqueeze(1).to(V.dtype)
+    loss_history = []
+    iterations = 0
+    loss = None
+    previous_loss = None  # loss before the last accepted step
+    stop_reason = f"reached max_iters = {max_iters}"
+    if telemetry is not None:
+        telemetry.start()
+
+    for i in range(max_iters):
+        Vg = V.clone().requires_grad_(True)
+        loss = f(Vg)
+        loss.backward()
+        g = Vg.grad * free
+        loss_value = loss.item()
+        loss_history.append(loss_value)
+        if verbose:
+            print(f"Iter {i}: loss = {loss_value:.6f}")
+        if callback is not None and callback(i, loss_value, V):
+            stop_reason = "stopped by callback"
+            break
+        if loss_value < tol:
+            stop_reason = f"loss {loss_value:.6g} < tol {tol}"
+            break
+        if torch.norm(g) < grad_tol:
+            stop_reason = f"gradient norm below grad_tol {grad_tol}"
+            break
+        if damping > max_damping:
+            # Even steps close to plain gradient steps found no decrease
+            stop_reason = f"line search failed (damping above {max_damping:g})"
+            break
+        if previous_loss is not None and previous_loss - loss_value <= rel_tol * max(abs(previous_loss), 1e-12):
+            stop_reason = f"relative loss decrease below rel_tol {rel_tol}"
+            break
+
+        def A(X, damping=damping):
+            return (hessian(X * free) + damping * X) * free
+        with torch.no_grad():
+            p = _conjugate_gradient(A, -g, cg_iters, cg_tol)
+            slope = torch.sum(g * p)
+            if slope >= 0:
+                p = -g
+                slope = -torch.sum(g * g)
+            step = lr
+            accepted = False
+            while step > 1e-8:
+                trial = f(V + step * p).item()
+                if trial <= loss_value + 1e-4 * step * slope.item():
+                    accepted = True
+                    break
+                step *= 0.5
+            if accepted:
+                V = V + step * p
+                damping = max(damping * 0.5, 1e-8)
+                previous_loss = loss_value
+            else:
+                # The loss is unchanged; retry with more damping without counting it as converged
+                damping *= 10.0
+                previous_loss = None
+        if telemetry is not None and telemetry.wants(i):
+            telemetry.record(i, loss_value, torch.norm(g), step * torch.norm(p) if accepted else 0.0, Vg.detach())
+        iterations = i + 1
+    if verbose and loss is not None:
+        print(f"Stopping: {stop_reason}")
+        print(f"Final loss: {loss_history[-1]:.6f}")
+    if return_info:
+        return V, {'iterations': iterations, 'loss_history': loss_history, 'stop_reason': stop_reason}
+    return V
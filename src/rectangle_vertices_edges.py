@@ -1,41 +1,58 @@
-def rectangle_vertices_edges(V, E, idx_start, idx_end, c):
-	
-	next_idx = V.shape[0] # determine the next index based on length of vertex list tensor
+import torch
 
-	new_V = [V] # a list with Pytorch tensor V inside to later use .append()
-	new_E = []
+def shell_vertices_edges(V, E, idx_start, idx_end, c):
+	"""
+	Wall rectangles of thickness c for every edge whose vertices both lie in [idx_start, idx_end],
+	built for all selected edges at once and differentiable with respect to V and c.
+	Edge k = (i, j) adds the vertices i + n_k, j + n_k (n_k the right-hand normal of length c)
+	at indices N + 2k, N + 2k + 1 and the edges (j, N+2k+1), (N+2k+1, N+2k), (N+2k, i).
+	Returns:
+		all_V: (N + 2K, 2) vertices, all_E: (3K, 2) new edges,
+		area: total wall area, com: center of mass of the walls (weighted by rectangle area)
+	"""
+	E = torch.as_tensor(E, dtype=torch.long, device=V.device).reshape(-1, 2)
+	i, j = E[:, 0], E[:, 1]
+	# only create rectangles for edges of vertices in indicated range
+	selected = (i >= idx_start) & (i <= idx_end) & (j >= idx_start) & (j <= idx_end)
+	i, j = i[selected], j[selected]
+	num_new = i.shape[0]
 
-	with torch.no_grad():
-		for edge_ij in E:
-			i, j = int(edge_ij[0]), int(edge_ij[1])
+	# right-hand normal of length c for every selected edge
+	vi, vj = V[i], V[j]
+	e = vj - vi
+	L = e.norm(dim=1, keepdim=True)
+	n = torch.stack([e[:, 1], -e[:, 0]], dim=1) * (c / L)
 
-			# only create rectangles for edges of vertices in indicated range
-			if not (idx_start <= i <= idx_end and idx_start <= j <= idx_end):
-				continue
-			
-			# calculate the edge vector representation and length
-			vi = V[i]
-			vj = V[j]
-			e = vj - vi
-			L = e.norm()
-			
-			# right-hand normal of length c
-			n = torch.tensor([e[1], -e[0]]) * (c / L)
+	all_V = torch.empty((V.shape[0] + 2 * num_new, 2), dtype=V.dtype, device=V.device)
+	all_V[:V.shape[0]] = V
+	all_V[V.shape[0]::2] = vi + n
+	all_V[V.shape[0] + 1::2] = vj + n
 
-			# unsqueeze so [x,y] become [[x,y]]
-			vi_shifted = (vi + n).unsqueeze(0)
-			vj_shifted = (vj + n).unsqueeze(0)
+	vi_shifted_idx = V.shape[0] + 2 * torch.arange(num_new, device=V.device)
+	vj_shifted_idx = vi_shifted_idx + 1
+	all_E = torch.stack([
+		torch.stack([j, vj_shifted_idx], dim=1),
+		torch.stack([vj_shifted_idx, vi_shifted_idx], dim=1),
+		torch.stack([vi_shifted_idx, i], dim=1),
+	], dim=1).reshape(-1, 2)
 
-			# add vertices to new vertex list
-			new_V.append(vi_shifted)
-			vi_shifted_idx = next_idx;  next_idx += 1
-			new_V.append(vj_shifted)
-			vj_shifted_idx = next_idx;  next_idx += 1
+	# each rectangle has area L * |c| and its center halfway along the offset
+	areas = L.squeeze(1) * torch.abs(torch.as_tensor(c, dtype=V.dtype, device=V.device))
+	centers = 0.5 * (vi + vj) + 0.5 * n
+	area, com = combine_centers_of_mass(areas, centers)
+	return all_V, all_E, area, com
 
-			# add three new edges, set its type as long instead of integer for future indexing
-			new_E += [torch.tensor([j, vj_shifted_idx], dtype=torch.long), torch.tensor([vj_shifted_idx, vi_shifted_idx], dtype=torch.long), torch.tensor([vi_shifted_idx, i], dtype=torch.long)]
-	
-	all_V = torch.cat(new_V, dim=0)
-	all_E = torch.stack(new_E, dim=0) if new_E else torch.empty((0,2),dtype=torch.long)
+def combine_centers_of_mass(masses, coms):
+	"""
+	Weighted mixture c = sum_i m_i c_i / sum_i m_i of K parts (masses (K,), coms (K, 2)).
+	Returns the total mass and the combined center (zero if the total mass is zero).
+	"""
+	total = masses.sum()
+	safe = torch.where(torch.abs(total) < 1e-12, torch.ones_like(total), total)
+	return total, (masses.unsqueeze(1) * coms).sum(dim=0) / safe
 
-	return all_V, all_E
\ No newline at end of file
+def rectangle_vertices_edges(V, E, idx_start, idx_end, c):
+	# kept for its original no_grad signature; the work is done by shell_vertices_edges
+	with torch.no_grad():
+		all_V, all_E, _, _ = shell_vertices_edges(V, E, idx_start, idx_end, c)
+	return all_V, all_E
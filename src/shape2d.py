@@ -1,14 +1,40 @@
 import json
 import torch
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Union
+from shape_topology import ShapeTopology, get_topology
+from constants import SUPPORT_TOL
+
+def edge_pair_set(edges) -> frozenset:
+    """Undirected edges ((m, 2) tensor or list of pairs) as (min, max) index pairs, for O(1) lookups."""
+    pairs = edges.tolist() if isinstance(edges, torch.Tensor) else edges
+    return frozenset((min(i, j), max(i, j)) for i, j in pairs)
+
+def closes_index_loop(num_vertices: int, edge_set: frozenset) -> bool:
+    """True if edge_set (see edge_pair_set) contains the loop 0-1-...-(n-1)-0."""
+    n = num_vertices
+    return n >= 3 and all((min(i, (i + 1) % n), max(i, (i + 1) % n)) in edge_set for i in range(n))
 
 class Shape2D:
     """
     Represents a 2D shape defined by vertices and edges.
     Vertices: torch.Tensor of shape (n, 2), dtype=torch.float32.
-    Edges: List of (start_idx, end_idx) tuples (indices into vertices).
+    Edges: contiguous torch.LongTensor of shape (m, 2) (indices into vertices); lists of
+    (start_idx, end_idx) pairs are converted on assignment.
+    Derived structures (adjacency, traced loops, support mask, edge lookup set) are built on
+    first use and cached until the vertices or edges change. Mutations through this class bump
+    version; in-place writes to the tensors are caught through the tensors' own version counters.
     """
-    def __init__(self, vertices: Optional[torch.Tensor] = None, edges: Optional[List[Tuple[int, int]]] = None):
+    __slots__ = ('_vertices', '_edges', 'version', '_vertices_version', '_edges_version', '_cache',
+                 '_moments', '_index')
+
+    def __init__(self, vertices: Optional[torch.Tensor] = None,
+                 edges: Optional[Union[List[Tuple[int, int]], torch.Tensor]] = None):
+        self.version = 0
+        self._vertices_version = 0
+        self._edges_version = 0
+        self._cache = {}
+        self._moments = None
+        self._index = None
         if vertices is None:
             self.vertices = torch.empty((0, 2), dtype=torch.float32)
         elif isinstance(vertices, list):
@@ -17,20 +43,168 @@ class Shape2D:
             self.vertices = vertices  # assume torch.Tensor
         self.edges = edges if edges is not None else []
 
+    @property
+    def vertices(self) -> torch.Tensor:
+        return self._vertices
+
+    @vertices.setter
+    def vertices(self, vertices: torch.Tensor):
+        self._vertices = vertices
+        self._vertices_version += 1
+        self.version += 1
+
+    @property
+    def edges(self) -> torch.Tensor:
+        return self._edges
+
+    @edges.setter
+    def edges(self, edges):
+        self._edges = torch.as_tensor(edges, dtype=torch.long).reshape(-1, 2).contiguous()
+        self._edges_version += 1
+        self.version += 1
+
+    # --- Cached derived structures ---
+    def _cached(self, name: str, key: tuple, build):
+        entry = self._cache.get(name)
+        if entry is None or entry[0] != key:
+            entry = (key, build())
+            self._cache[name] = entry
+        return entry[1]
+
+    def _edges_key(self) -> tuple:
+        return (self._edges_version, self._edges._version, self._vertices.shape[0])
+
+    def _vertices_key(self) -> tuple:
+        return (self._vertices_version, self._vertices._version)
+
+    @property
+    def topology(self) -> ShapeTopology:
+        """Traced loops of the edges (see shape_topology.py); pass it wherever an edge list is accepted."""
+        return self._cached('topology', self._edges_key(), lambda: get_topology(self._edges, self._vertices.shape[0]))
+
+    @property
+    def loops(self) -> List[List[int]]:
+        return self.topology.loops
+
+    @property
+    def adjacency(self) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+        """
+        CSR adjacency (offsets (n + 1,), neighbors (2m,), edge_ids (2m,)): the neighbors of vertex i
+        and the edges joining them are neighbors[offsets[i]:offsets[i + 1]] and edge_ids[...].
+        """
+        def build():
+            ends = torch.cat([self._edges[:, 0], self._edges[:, 1]])
+            others = torch.cat([self._edges[:, 1], self._edges[:, 0]])
+            order = torch.argsort(ends, stable=True)
+            counts = torch.bincount(ends, minlength=self._vertices.shape[0])
+            offsets = torch.cat([torch.zeros(1, dtype=torch.long), torch.cumsum(counts, dim=0)])
+            edge_ids = torch.arange(self._edges.shape[0]).repeat(2)
+            return offsets, others[order], edge_ids[order]
+        return self._cached('adjacency', self._edges_key(), build)
+
+    @property
+    def edge_set(self) -> frozenset:
+        """Undirected edges as (min, max) index pairs, for O(1) lookups."""
+        return self._cached('edge_set', self._edges_key(), lambda: edge_pair_set(self._edges))
+
+    @property
+    def support_mask(self) -> torch.Tensor:
+        """Vertices on the ground (|y| < SUPPORT_TOL), the ones the optimizers keep fixed."""
+        return self._cached('support_mask', self._vertices_key(), lambda: torch.abs(self._vertices[:, 1]) < SUPPORT_TOL)
+
+    def has_edge(self, i: int, j: int) -> bool:
+        return (min(i, j), max(i, j)) in self.edge_set
+
+    def is_closed_polygon(self) -> bool:
+        """True if the edges contain the loop 0-1-...-(n-1)-0, the polygon drawn by the fill."""
+        return closes_index_loop(self._vertices.shape[0], self.edge_set)
+
+    # --- Incremental edits ---
+    @property
+    def moments(self) -> 'MomentAccumulator':
+        """Incrementally updated area and center of mass (see moment_accumulator.py), created on first use."""
+        if self._moments is None:
+            from moment_accumulator import MomentAccumulator
+            self._moments = MomentAccumulator(self)
+        return self._moments
+
+    @property
+    def spatial_index(self) -> 'ShapeSpatialIndex':
+        """Grid index for nearest vertex / edge queries (see spatial_index.py), created on first use."""
+        if self._index is None:
+            from spatial_index import ShapeSpatialIndex
+            self._index = ShapeSpatialIndex(self)
+        return self._index
+
+    def move_vertex(self, idx: int, x: float, y: float):
+        """Moves one vertex; an attached moment accumulator and spatial index update in O(1) instead of rebuilding."""
+        if self._index is not None:
+            self._index.sync()
+        if self._moments is not None:
+            self._moments.move_vertex(idx, x, y)
+        else:
+            self._vertices[idx] = torch.tensor([x, y], dtype=self._vertices.dtype)
+        self._vertices_version += 1
+        self.version += 1
+        if self._index is not None:
+            self._index.move_vertex(idx, x, y)
+
+    def add_vertex(self, x: float, y: float) -> int:
+        """Appends a vertex and returns its index."""
+        if self._index is not None:
+            self._index.sync()
+        self.vertices = torch.cat([self._vertices, torch.tensor([[x, y]], dtype=self._vertices.dtype)], dim=0)
+        if self._index is not None:
+            self._index.add_vertex(x, y)
+        return self._vertices.shape[0] - 1
+
+    def add_edge(self, i: int, j: int):
+        """Appends the edge (i, j)."""
+        if self._index is not None:
+            self._index.sync()
+        self.edges = torch.cat([self._edges, torch.tensor([[i, j]], dtype=torch.long)], dim=0)
+        if self._index is not None:
+            self._index.add_edge(i, j)
+
     @staticmethod
     def load_from_json(path: str) -> 'Shape2D':
         """Load shape from a JSON file."""
         with open(path, 'r') as f:
             data = json.load(f)
         vertices = torch.tensor(data['vertices'], dtype=torch.float32)
-        edges = [tuple(e) for e in data['edges']]
-        return Shape2D(vertices, edges)
+        return Shape2D(vertices, data['edges'])
 
     def save_to_json(self, path: str):
         """Save shape to a JSON file."""
         data = {
-            'vertices': self.vertices.tolist(),
-            'edges': self.edges
+            'vertices': self._vertices.tolist(),
+            'edges': self._edges.tolist()
         }
         with open(path, 'w') as f:
             json.dump(data, f, indent=2)
+
+    @staticmethod
+    def load_from_binary(path: str) -> 'Shape2D':
+        """Load shape from a binary .s2d file; the vertices are memory-mapped, not copied (see shape_binary.py)."""
+        from shape_binary import read_shape_binary
+        vertices, edges = read_shape_binary(path)
+        return Shape2D(vertices, edges)
+
+    def save_to_binary(self, path: str):
+        """Save shape to a binary .s2d file."""
+        from shape_binary import write_shape_binary
+        write_shape_binary(path, self._vertices, self._edges)
+
+    @staticmethod
+    def load(path: str) -> 'Shape2D':
+        """Load shape from a .s2d or JSON file, chosen by extension."""
+        from shape_binary import is_binary_path
+        return Shape2D.load_from_binary(path) if is_binary_path(path) else Shape2D.load_from_json(path)
+
+    def save(self, path: str):
+        """Save shape to a .s2d or JSON file, chosen by extension."""
+        from shape_binary import is_binary_path
+        if is_binary_path(path):
+            self.save_to_binary(path)
+        else:
+            self.save_to_json(path)
@@ -0,0 +1,109 @@
+"""
+Binary shape container (.s2d) for large shapes.
+
+Layout (little-endian):
+    header, 32 bytes: magic b'S2DB', format version (uint16), flags (uint16, 0),
+                      number of vertices (uint64), number of edges (uint64), 8 reserved bytes
+    vertices:         float32 x, y pairs, 8 bytes per vertex
+    edges:            int32 start, end pairs, 8 bytes per edge
+
+Both blocks are 4-byte aligned, so loading memory-maps the file (copy-on-write) and wraps the
+vertex block in a tensor without copying it or building Python lists; the edge block is widened
+to int64 once, as Shape2D stores it. Shape2D values are float32 already, so converting to and
+from JSON is lossless.
+
+torch is imported by the read/write functions only, so the GUI can use the constants below at
+startup without loading it.
+
+Usage:
+    python src/shape_binary.py shapes/man.json man.s2d    # either direction, chosen by extension
+"""
+import mmap
+import os
+import struct
+import sys
+from typing import Tuple
+
+MAGIC = b'S2DB'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sHHQQ8x')
+EXTENSION = '.s2d'
+# Everything Shape2D.load accepts, for directory listings and file dialogs
+SHAPE_EXTENSIONS = ('.json', EXTENSION)
+SHAPE_FILE_FILTER = 'Shape Files (*.json *.s2d);;JSON Files (*.json);;Binary Shapes (*.s2d)'
+INT32_MAX = 2 ** 31 - 1
+
+
+def is_binary_path(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() == EXTENSION
+
+
+def write_shape_binary(path: str, vertices: 'torch.Tensor', edges: 'torch.Tensor'):
+    """Writes vertices (n, 2) and edges (m, 2) in the .s2d layout."""
+    import torch
+    V = vertices.detach().to(device='cpu', dtype=torch.float32).contiguous()
+    E = torch.as_tensor(edges, dtype=torch.long).reshape(-1, 2)
+    if E.numel() > 0 and (E.min() < 0 or E.max() > INT32_MAX):
+        raise ValueError("Edge indices do not fit in int32.")
+    E = E.to(torch.int32).contiguous()
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, V.shape[0], E.shape[0]))
+        f.write(V.numpy().astype('<f4', copy=False).tobytes())
+        f.write(E.numpy().astype('<i4', copy=False).tobytes())
+
+
+def read_shape_binary(path: str) -> Tuple['torch.Tensor', 'torch.Tensor']:
+    """
+    Memory-maps an .s2d file and returns (vertices, edges). The vertex tensor reads straight from
+    the mapping; writes to it stay private to this process (the file is never modified).
+    """
+    import torch
+    with open(path, 'rb') as f:
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ValueError(f"{path}: file too short for an .s2d header.")
+        magic, version, _, num_vertices, num_edges = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not an .s2d file (bad magic {magic!r}).")
+        if version > FORMAT_VERSION:
+            raise ValueError(f"{path}: .s2d format version {version} is newer than supported ({FORMAT_VERSION}).")
+        expected = HEADER.size + 8 * num_vertices + 8 * num_edges
+        if os.fstat(f.fileno()).st_size < expected:
+            raise ValueError(f"{path}: truncated .s2d file.")
+        mapped = mmap.mmap(f.fileno(), expected, access=mmap.ACCESS_COPY)
+    # The mapping outlives the file handle; the tensors keep it alive
+    vertices = _block(mapped, torch.float32, 2 * num_vertices, HEADER.size).reshape(-1, 2)
+    edges = _block(mapped, torch.int32, 2 * num_edges, HEADER.size + 8 * num_vertices).reshape(-1, 2).long()
+    return vertices, edges
+
+
+def _block(mapped: mmap.mmap, dtype: 'torch.dtype', count: int, offset: int) -> 'torch.Tensor':
+    """A little-endian block of the mapping as a 1D tensor, zero-copy on little-endian hosts."""
+    import torch
+    if count == 0:
+        return torch.empty(0, dtype=dtype)
+    block = torch.frombuffer(mapped, dtype=dtype, count=count, offset=offset)
+    if sys.byteorder != 'little':
+        block = torch.from_numpy(block.numpy().byteswap())
+    return block
+
+
+def convert_shape(src: str, dst: str):
+    """Converts between .json and .s2d (either direction, by extension)."""
+    from shape2d import Shape2D
+    Shape2D.load(src).save(dst)
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Convert shapes between JSON and the binary .s2d format.')
+    parser.add_argument('src', help='input shape (.json or .s2d)')
+    parser.add_argument('dst', help='output shape (.json or .s2d)')
+    args = parser.parse_args(argv)
+    convert_shape(args.src, args.dst)
+    print(f"{args.src} -> {args.dst}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
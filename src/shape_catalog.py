@@ -0,0 +1,206 @@
+"""
+Catalog of a shapes directory: per-file metadata (vertex/edge count, bounding box, area, center
+of mass, stability, content hash) kept in a sidecar file next to the shapes.
+
+An entry stays valid while the file's mtime and size are unchanged, so a refresh stats every file
+once and only loads the new or modified ones; the sidecar makes that true across restarts too.
+Listings (names, entries, describe) never touch the disk, which keeps the GUI dropdowns instant
+for thousands of shapes. viewer/catalog_watcher.py drives refreshes from a filesystem watcher.
+
+Usage:
+    python src/shape_catalog.py shapes/    # build or update the sidecar and print the catalog
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+from shape_binary import SHAPE_EXTENSIONS
+
+SIDECAR_NAME = '.catalog.json'
+CATALOG_VERSION = 1
+
+
+def is_shape_file(name: str) -> bool:
+    # Batch and carving outputs (e.g. <name>_optimized_cut.json) sit next to the shapes but are not shapes
+    return name.endswith(SHAPE_EXTENSIONS) and not name.startswith('.') and not name.endswith('_cut.json')
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def compute_metadata(path: str) -> dict:
+    """Loads one shape file and returns its catalog entry (an 'error' entry if it cannot be read)."""
+    import torch
+    from shape2d import Shape2D
+    from shape_mass_center import calculate_center_of_mass
+    from shape_stability import is_shape_stable
+
+    stat = os.stat(path)
+    entry = {'mtime': stat.st_mtime, 'size': stat.st_size, 'hash': file_hash(path)}
+    try:
+        shape = Shape2D.load(path)
+        V = shape.vertices
+        entry.update(vertices=V.shape[0], edges=shape.edges.shape[0])
+        if V.shape[0] == 0:
+            entry.update(bbox=None, area=0.0, com=None, stable=False)
+            return entry
+        with torch.no_grad():
+            area, com = calculate_center_of_mass(V, shape.topology)
+            stable = V.shape[0] >= 2 and bool(is_shape_stable(V, shape.topology, com=com)[0])
+        entry.update(bbox=[*V.min(dim=0).values.tolist(), *V.max(dim=0).values.tolist()],
+                     area=float(area), com=com.tolist(), stable=stable)
+    except Exception as e:
+        entry['error'] = str(e)
+    return entry
+
+
+class ShapeCatalog:
+    """
+    Metadata of the shape files in one directory, keyed by file name. Thread-safe: refreshes may
+    run on a worker thread while the GUI reads entries.
+    """
+    def __init__(self, directory: str, sidecar_name: str = SIDECAR_NAME):
+        self.directory = directory
+        self.sidecar_path = os.path.join(directory, sidecar_name)
+        self.entries: Dict[str, dict] = {}
+        self.pending: Set[str] = set()  # found by stale() and not cataloged yet; listed without metadata
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.load()
+
+    def load(self):
+        """Reads the sidecar; a missing, stale-format or corrupt sidecar just starts an empty catalog."""
+        try:
+            with open(self.sidecar_path, 'r') as f:
+                data = json.load(f)
+            entries = data['entries'] if data.get('version') == CATALOG_VERSION else {}
+        except (OSError, ValueError, KeyError, AttributeError):
+            entries = {}
+        with self._lock:
+            self.entries = entries
+
+    def save(self):
+        """Writes the sidecar if anything changed since the last save (atomically, via a temporary file)."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {'version': CATALOG_VERSION, 'entries': dict(self.entries)}
+            self._dirty = False
+        tmp_path = self.sidecar_path + '.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.sidecar_path)
+        except OSError as e:
+            # Read-only shape folders still get a working in-memory catalog
+            print(f"Warning: could not write shape catalog {self.sidecar_path}: {e}")
+
+    def _is_current(self, name: str, stat: os.stat_result) -> bool:
+        entry = self.entries.get(name)
+        return entry is not None and entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size
+
+    def stale(self) -> List[str]:
+        """Shape files that are new or changed since they were cataloged; drops entries of deleted files."""
+        stale = []
+        present = set()
+        try:
+            with os.scandir(self.directory) as it:
+                for item in it:
+                    if not (is_shape_file(item.name) and item.is_file()):
+                        continue
+                    present.add(item.name)
+                    if not self._is_current(item.name, item.stat()):
+                        stale.append(item.name)
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            for name in set(self.entries) - present:
+                del self.entries[name]
+                self._dirty = True
+            self.pending = set(stale)
+        return sorted(stale)
+
+    def update(self, names: Iterable[str]) -> List[str]:
+        """Recomputes the entries of the given files (removing the deleted ones); returns the names that changed."""
+        changed = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            if not os.path.isfile(path):
+                with self._lock:
+                    self.pending.discard(name)
+                    if self.entries.pop(name, None) is not None:
+                        self._dirty = True
+                        changed.append(name)
+                continue
+            entry = compute_metadata(path)
+            with self._lock:
+                self.entries[name] = entry
+                self.pending.discard(name)
+                self._dirty = True
+            changed.append(name)
+        return changed
+
+    def refresh(self) -> List[str]:
+        """Brings the catalog up to date with the directory and saves the sidecar; returns the names updated."""
+        changed = self.update(self.stale())
+        self.save()
+        return changed
+
+    def names(self) -> List[str]:
+        """Cataloged and pending shape files, sorted."""
+        with self._lock:
+            return sorted(self.entries.keys() | self.pending)
+
+    def get(self, name: str) -> Optional[dict]:
+        with self._lock:
+            return self.entries.get(name)
+
+    def describe(self, name: str) -> str:
+        """One-line summary for dropdowns, e.g. 'man.json  (52 v, area 1.84, stable)'."""
+        entry = self.get(name)
+        if entry is None:
+            return f"{name}  (...)"
+        if 'error' in entry:
+            return f"{name}  (unreadable)"
+        parts = [f"{entry['vertices']} v", f"area {entry['area']:.3g}", 'stable' if entry['stable'] else 'unstable']
+        return f"{name}  ({', '.join(parts)})"
+
+    def tooltip(self, name: str) -> str:
+        """Multi-line metadata for dropdown tooltips."""
+        entry = self.get(name)
+        if entry is None:
+            return name
+        if 'error' in entry:
+            return f"{name}\n{entry['error']}"
+        lines = [name, f"Vertices: {entry['vertices']}, edges: {entry['edges']}", f"Area: {entry['area']:.6g}"]
+        if entry['bbox'] is not None:
+            x0, y0, x1, y1 = entry['bbox']
+            lines.append(f"Bounds: [{x0:.3g}, {x1:.3g}] x [{y0:.3g}, {y1:.3g}]")
+            lines.append(f"Center of mass: ({entry['com'][0]:.4g}, {entry['com'][1]:.4g})")
+        lines.append('Stable' if entry['stable'] else 'Unstable')
+        lines.append(f"SHA-1: {entry['hash'][:12]}")
+        return '\n'.join(lines)
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Build or update the catalog of a shapes directory.')
+    parser.add_argument('directory', help='shapes directory')
+    args = parser.parse_args(argv)
+    catalog = ShapeCatalog(args.directory)
+    changed = catalog.refresh()
+    for name in catalog.names():
+        print(catalog.describe(name))
+    print(f"{len(changed)} of {len(catalog.entries)} entries updated; catalog at {catalog.sidecar_path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,74 +1,31 @@
 import torch
 from typing import Union, List, Tuple
-from collections import defaultdict
 from dataclasses import dataclass
 from shape2d import Shape2D
+from shape_topology import ShapeTopology, get_topology
 
 ## --- Core Helper and Calculation Functions ---
 
-def _find_all_loops(edges: List[List[int]], num_vertices: int) -> List[List[int]]:
+def _segment_moments(vertices: torch.Tensor, loop_from: torch.Tensor, loop_to: torch.Tensor,
+                     loop_ids: torch.Tensor, num_loops: int) -> torch.Tensor:
     """
-    Traces edges to find all closed loops in the mesh using standard Python.
-    This is the clean version without redundant logic.
+    Per-loop mass moments from all loops flattened into one directed edge list.
+    Returns a (num_loops, 3) tensor of (2 * signed area, sum (x1 + x2) * cross, sum (y1 + y2) * cross).
+    Cost depends only on the total edge count: one gather and one segment reduction.
     """
-    adj = defaultdict(list)
-    for i, j in edges:
-        adj[i].append(j)
-        adj[j].append(i)
-
-    used_edges = set()
-    all_loops = []
-
-    for start_node in range(num_vertices):
-        for neighbor in adj[start_node]:
-            edge = tuple(sorted((start_node, neighbor)))
-            if edge not in used_edges:
-                current_loop = [start_node]
-                prev_node = start_node
-                current_node = neighbor
-
-                while current_node != start_node:
-                    used_edges.add(tuple(sorted((prev_node, current_node))))
-                    current_loop.append(current_node)
-                    
-                    next_node = None
-                    for next_neighbor in adj[current_node]:
-                        if next_neighbor != prev_node:
-                            next_node = next_neighbor
-                            break
-                    
-                    # If the path is broken (should not happen in a valid mesh)
-                    if next_node is None:
-                        break 
-                    prev_node = current_node
-                    current_node = next_node
-                
-                if current_node == start_node:
-                    used_edges.add(tuple(sorted((prev_node, current_node))))
-                    all_loops.append(current_loop)
-
-    return all_loops
-
-
-def _get_com_from_loops(vertices: torch.Tensor, loops: List[List[int]]) -> Tuple[torch.Tensor, torch.Tensor]:
-    """Calculates the CoM from a pre-computed list of loops."""
-    total_area_sum = torch.tensor(0.0, dtype=vertices.dtype, device=vertices.device)
-    total_cx_sum = torch.tensor(0.0, dtype=vertices.dtype, device=vertices.device)
-    total_cy_sum = torch.tensor(0.0, dtype=vertices.dtype, device=vertices.device)
-
-    for loop_indices in loops:
-        loop_verts = vertices[loop_indices]
-        
-        verts_closed = torch.cat([loop_verts, loop_verts[:1]], dim=0)
-        v1 = verts_closed[:-1]
-        v2 = verts_closed[1:]
-        
-        cross_product = v1[:, 0] * v2[:, 1] - v1[:, 1] * v2[:, 0]
-        
-        total_area_sum += torch.sum(cross_product)
-        total_cx_sum += torch.sum((v1[:, 0] + v2[:, 0]) * cross_product)
-        total_cy_sum += torch.sum((v1[:, 1] + v2[:, 1]) * cross_product)
-            
+    ends = vertices[torch.stack([loop_from, loop_to])]
+    v1, v2 = ends[0], ends[1]
+    cross_product = v1[:, 0] * v2[:, 1] - v1[:, 1] * v2[:, 0]
+    terms = torch.stack([cross_product,
+                         (v1[:, 0] + v2[:, 0]) * cross_product,
+                         (v1[:, 1] + v2[:, 1]) * cross_product], dim=1)
+    per_loop = torch.zeros((num_loops, 3), dtype=vertices.dtype, device=vertices.device)
+    return per_loop.index_add(0, loop_ids, terms)
+
+
+def _get_com_from_moments(vertices: torch.Tensor, per_loop: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+    """Calculates the total area and CoM from per-loop moments."""
+    total_area_sum, total_cx_sum, total_cy_sum = per_loop.sum(dim=0)
     final_signed_area = 0.5 * total_area_sum
 
     if torch.abs(final_signed_area) < 1e-9:
@@ -80,11 +37,27 @@ def _get_com_from_loops(vertices: torch.Tensor, loops: List[List[int]]) -> Tuple
     return torch.abs(final_signed_area), center_of_mass
 
 
+def _get_com_from_topology(vertices: torch.Tensor, topology: ShapeTopology) -> Tuple[torch.Tensor, torch.Tensor]:
+    """Calculates the CoM from the cached loop index tensors of a topology."""
+    topo = topology.to(vertices.device)
+    per_loop = _segment_moments(vertices, topo.loop_from, topo.loop_to, topo.loop_ids, topo.num_loops)
+    return _get_com_from_moments(vertices, per_loop)
+
+
+def _get_com_from_loops(vertices: torch.Tensor, loops: List[List[int]]) -> Tuple[torch.Tensor, torch.Tensor]:
+    """Calculates the CoM from a pre-computed list of loops."""
+    loop_from = torch.tensor([i for loop in loops for i in loop], dtype=torch.long, device=vertices.device)
+    loop_to = torch.tensor([i for loop in loops for i in loop[1:] + loop[:1]], dtype=torch.long, device=vertices.device)
+    loop_ids = torch.tensor([k for k, loop in enumerate(loops) for _ in loop], dtype=torch.long, device=vertices.device)
+    per_loop = _segment_moments(vertices, loop_from, loop_to, loop_ids, len(loops))
+    return _get_com_from_moments(vertices, per_loop)
+
+
 ## --- Public API ---
 
 def calculate_center_of_mass(
     shape_or_vertices: Union[Shape2D, torch.Tensor],
-    edges: Union[List[List[int]], torch.Tensor] = None
+    edges: Union[List[List[int]], torch.Tensor, ShapeTopology] = None
 ) -> Tuple[torch.Tensor, torch.Tensor]:
     """
     Calculates the area and center of mass for a 2D mesh.
@@ -93,27 +66,59 @@ def calculate_center_of_mass(
     1. With a Shape2D object: `calculate_center_of_mass(my_shape)`
     2. With vertices and edges: `calculate_center_of_mass(vertices_tensor, edges_tensor)`
 
+    The edges may also be a ShapeTopology; loops are traced once per topology and cached.
+
     Returns:
         A tuple of (area, center_of_mass_coordinates) as torch.Tensors.
     """
     if isinstance(shape_or_vertices, Shape2D):
         vertices = shape_or_vertices.vertices
-        edge_list = shape_or_vertices.edges
+        edge_list = shape_or_vertices.topology
     elif isinstance(shape_or_vertices, torch.Tensor) and edges is not None:
         vertices = shape_or_vertices
-        edge_list = edges.tolist() if isinstance(edges, torch.Tensor) else edges
+        edge_list = edges
     else:
         raise TypeError("Invalid input. Provide a Shape2D object or separate vertex and edge tensors.")
 
     if vertices.shape[0] == 0:
         return torch.tensor(0.0, device=vertices.device), torch.zeros(2, device=vertices.device)
         
-    loops = _find_all_loops(edge_list, vertices.shape[0])
+    topology = get_topology(edge_list, vertices.shape[0])
+    loops = topology.loops
 
     if not loops:
         print("Warning: No closed loops found in the provided edges.")
         com = torch.mean(vertices, dim=0) if vertices.shape[0] > 0 else torch.zeros(2, device=vertices.device)
         return torch.tensor(0.0, device=vertices.device), com
 
-    return _get_com_from_loops(vertices, loops)
+    return _get_com_from_topology(vertices, topology)
+
+
+def calculate_loop_moments(
+    shape_or_vertices: Union[Shape2D, torch.Tensor],
+    edges: Union[List[List[int]], torch.Tensor, ShapeTopology] = None
+) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    Calculates the signed area and centroid of every traced loop.
+    The sign follows each loop's winding order, so holes traced opposite to the outer
+    boundary come out negative.
+
+    Returns:
+        A tuple of (signed_areas (L,), centroids (L, 2)) as torch.Tensors.
+    """
+    if isinstance(shape_or_vertices, Shape2D):
+        vertices = shape_or_vertices.vertices
+        edge_list = shape_or_vertices.topology
+    elif isinstance(shape_or_vertices, torch.Tensor) and edges is not None:
+        vertices = shape_or_vertices
+        edge_list = edges
+    else:
+        raise TypeError("Invalid input. Provide a Shape2D object or separate vertex and edge tensors.")
+
+    topo = get_topology(edge_list, vertices.shape[0]).to(vertices.device)
+    per_loop = _segment_moments(vertices, topo.loop_from, topo.loop_to, topo.loop_ids, topo.num_loops)
+    twice_area = per_loop[:, 0]
+    safe = torch.where(torch.abs(twice_area) < 1e-9, torch.ones_like(twice_area), twice_area)
+    centroids = per_loop[:, 1:] / (3.0 * safe).unsqueeze(1)
+    return 0.5 * twice_area, centroids
 
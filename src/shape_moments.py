@@ -0,0 +1,271 @@
+"""
+Precomputed mass moments of a polygon and of the parts of it cut off by lines or parabolas.
+
+A cut is y = a x^2 + b x + c (a = 0 gives the line y = b x + c of gradient_descent.py).
+By Green's theorem every moment is a boundary integral -∮ G(x, y) dx with dG/dy the integrand:
+
+    area: y,  x: x y,  y: y^2 / 2,  xx: x^2 y,  xy: x y^2 / 2,  yy: y^3 / 3
+
+Along a straight edge G is a polynomial of degree <= 3 in the edge parameter, so 2-point
+Gauss-Legendre is exact; the per-edge integrals are computed once, together with their prefix
+sums over the edges sorted by lowest y. For a cut with range [q_min, q_max] over the shape's x
+extent, the edges whose lowest y is below q_min - H (H: the tallest edge) lie entirely under it
+and are one prefix-sum lookup, those starting above q_max lie entirely over it and are skipped;
+only the edges in between are classified. Of those, edges the cut crosses are split at the (at
+most two) roots, and
+the part of the boundary that runs along the cut curve is closed with an antiderivative F(x) of
+G(x, q(x)): each point where the boundary enters the region below the cut adds -F(x) and each
+exit adds F(x), so no sorting or pairing of the intersections is needed.
+"""
+import torch
+from typing import Tuple, Union, List
+from shape_topology import ShapeTopology, get_topology
+
+# Order of the moments in every (..., 6) tensor of this module
+MOMENT_NAMES = ('area', 'x', 'y', 'xx', 'xy', 'yy')
+
+_GAUSS2_NODES = (0.5 - 0.5 / 3 ** 0.5, 0.5 + 0.5 / 3 ** 0.5)
+_GAUSS2_WEIGHTS = (0.5, 0.5)
+# 4-point rule on [0, 1]: exact up to degree 7, enough for y^3 / 3 with y quadratic in x
+_GAUSS4_NODES = (0.0694318442029737, 0.3300094782075719, 0.6699905217924281, 0.9305681557970263)
+_GAUSS4_WEIGHTS = (0.1739274225687269, 0.3260725774312731, 0.3260725774312731, 0.1739274225687269)
+
+
+def _green_terms(x: torch.Tensor, y: torch.Tensor) -> torch.Tensor:
+    """The six Green's theorem potentials G(x, y), stacked along a new last dimension."""
+    return torch.stack([y, x * y, 0.5 * y * y, x * x * y, 0.5 * x * y * y, y * y * y / 3.0], dim=-1)
+
+
+def _edge_integrals(p: torch.Tensor, d: torch.Tensor, t0: torch.Tensor, t1: torch.Tensor) -> torch.Tensor:
+    """-∫ G dx over the pieces p + t d, t in [t0, t1], of M edges. Returns (M, 6)."""
+    nodes = torch.tensor(_GAUSS2_NODES, dtype=p.dtype, device=p.device)
+    weights = torch.tensor(_GAUSS2_WEIGHTS, dtype=p.dtype, device=p.device)
+    h = t1 - t0
+    t = t0.unsqueeze(1) + h.unsqueeze(1) * nodes
+    G = _green_terms(p[:, :1] + t * d[:, :1], p[:, 1:] + t * d[:, 1:])
+    return -(d[:, 0] * h).unsqueeze(1) * torch.einsum('i,mij->mj', weights, G)
+
+
+def _cut_antiderivative(x: torch.Tensor, a: torch.Tensor, b: torch.Tensor, c: torch.Tensor) -> torch.Tensor:
+    """-∫_0^x G(s, a s^2 + b s + c) ds for M points and their cuts. Returns (M, 6)."""
+    nodes = torch.tensor(_GAUSS4_NODES, dtype=x.dtype, device=x.device)
+    weights = torch.tensor(_GAUSS4_WEIGHTS, dtype=x.dtype, device=x.device)
+    s = x.unsqueeze(1) * nodes
+    y = a.unsqueeze(1) * s * s + b.unsqueeze(1) * s + c.unsqueeze(1)
+    return -x.unsqueeze(1) * torch.einsum('i,mij->mj', weights, _green_terms(s, y))
+
+
+def _as_cuts(cuts: torch.Tensor) -> torch.Tensor:
+    """(K, 3) tensor of (a, b, c); (b, c) pairs are lines and get a = 0."""
+    cuts = torch.as_tensor(cuts)
+    if cuts.dim() == 1:
+        cuts = cuts.unsqueeze(0)
+    if cuts.shape[1] == 2:
+        cuts = torch.cat([torch.zeros_like(cuts[:, :1]), cuts], dim=1)
+    return cuts
+
+
+def moments_to_center_of_mass(moments: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    Area (K,) and center of mass (K, 2) from (K, 6) moments. Empty regions get a zero center;
+    their mass is zero, so they drop out of weighted mixtures without producing NaN gradients.
+    """
+    area = moments[:, 0]
+    safe = torch.where(torch.abs(area) < 1e-9, torch.ones_like(area), area)
+    return area, moments[:, 1:3] / safe.unsqueeze(1)
+
+
+class PolygonMoments:
+    """
+    Moment integrals of a shape (V, E), precomputed once per shape.
+    below(cuts)/above(cuts) return the (K, 6) moments of the region under/over each of K cuts,
+    boundary_below/boundary_above the length moments of the boundary on either side;
+    all are differentiable with respect to the cut parameters (and V).
+    """
+    def __init__(self, V: torch.Tensor, E: Union[List[List[int]], torch.Tensor, ShapeTopology]):
+        self.vertices = V
+        self.topology = get_topology(E, V.shape[0]).to(V.device)
+        topo = self.topology
+        self.p = V[topo.loop_from]
+        self.d = V[topo.loop_to] - self.p
+        ones = torch.ones_like(self.p[:, 0])
+        self.edge_terms = _edge_integrals(self.p, self.d, torch.zeros_like(ones), ones)
+        total = self.edge_terms.sum(dim=0)
+        # Loops traced clockwise give negative moments; flip so the full shape has positive area
+        self.orientation = 1.0 - 2.0 * (total[0] < 0).to(V.dtype)
+        self.total = total * self.orientation
+        # Boundary length moments (length, ∫x ds, ∫y ds) of every edge, exact with the midpoint
+        self.edge_lengths = self.d.norm(dim=1)
+        self.boundary_terms = torch.cat([self.edge_lengths.unsqueeze(1),
+                                         self.edge_lengths.unsqueeze(1) * (self.p + 0.5 * self.d)], dim=1)
+        self.boundary_total = self.boundary_terms.sum(dim=0)
+        # Edges sorted by lowest y, with prefix sums of their integrals (see _candidates)
+        with torch.no_grad():
+            y_ends = torch.stack([self.p[:, 1], self.p[:, 1] + self.d[:, 1]], dim=1)
+            y_min = y_ends.min(dim=1).values
+            self.edge_order = torch.argsort(y_min)
+            self.edge_rank = torch.empty_like(self.edge_order)
+            self.edge_rank[self.edge_order] = torch.arange(self.edge_order.shape[0], device=V.device)
+            self.sorted_y_min = y_min[self.edge_order].contiguous()
+            self.max_edge_height = float((y_ends.max(dim=1).values - y_min).max()) if y_min.numel() > 0 else 0.0
+            self.x_range = (float(self.p[:, 0].min()), float(self.p[:, 0].max())) if y_min.numel() > 0 else (0.0, 0.0)
+        zero_row = torch.zeros_like(self.edge_terms[:1])
+        self.prefix_terms = torch.cat([zero_row, self.edge_terms[self.edge_order].cumsum(dim=0)])
+        self.prefix_boundary = torch.cat([torch.zeros_like(self.boundary_terms[:1]),
+                                          self.boundary_terms[self.edge_order].cumsum(dim=0)])
+
+    def _candidates(self, a: torch.Tensor, b: torch.Tensor, c: torch.Tensor):
+        """
+        Per cut, the number of edges (in lowest-y order) that lie entirely below it, and the
+        (edge, cut) pairs that have to be classified: the edges whose lowest y falls within
+        [q_min - H, q_max], where [q_min, q_max] is the cut's range over the shape's x extent.
+        Returns (edge_idx, cut_idx, pair_start, lo, hi): lo counts the edges below each cut and the
+        candidate pairs are grouped by cut, pair_start[k] being the first pair of cut k.
+        """
+        with torch.no_grad():
+            x0, x1 = self.x_range
+            ends = torch.stack([(a * x0 + b) * x0 + c, (a * x1 + b) * x1 + c], dim=1)
+            # A parabola's extremum inside the x extent
+            a_safe = torch.where(a != 0, a, torch.ones_like(a))
+            xv = torch.where(a != 0, -b / (2.0 * a_safe), torch.full_like(a, x0)).clamp(x0, x1)
+            values = torch.cat([ends, ((a * xv + b) * xv + c).unsqueeze(1)], dim=1)
+            q_min, q_max = values.min(dim=1).values, values.max(dim=1).values
+            lo = torch.searchsorted(self.sorted_y_min, (q_min - self.max_edge_height).contiguous(), right=False)
+            hi = torch.searchsorted(self.sorted_y_min, q_max.contiguous(), right=True)
+            counts = hi - lo
+            pair_start = counts.cumsum(dim=0) - counts
+            cut_idx = torch.repeat_interleave(torch.arange(a.shape[0], device=a.device), counts)
+            rank = lo[cut_idx] + torch.arange(cut_idx.shape[0], device=a.device) - pair_start[cut_idx]
+            edge_idx = self.edge_order[rank]
+        return edge_idx, cut_idx, pair_start, lo, hi
+
+    def _classify(self, cuts: torch.Tensor):
+        """
+        Splits every candidate (edge, cut) pair at the roots of s(t) = q(x(t)) - y(t) = A t^2 + B t + C
+        (the region below is s >= 0). Returns the cut coefficients, the number of edges entirely
+        below each cut, the pair indices, the sorted roots with their masks, the membership of the
+        intervals [0, t_lo], [t_lo, t_hi], [t_hi, 1] and that of the start of the following edge.
+        """
+        cuts = _as_cuts(cuts).to(dtype=self.p.dtype, device=self.p.device)
+        a, b, c = cuts[:, 0], cuts[:, 1], cuts[:, 2]
+        edge_idx, cut_idx, pair_start, lo, hi = self._candidates(a, b, c)
+        p, d = self.p[edge_idx], self.d[edge_idx]
+        ap, bp, cp = a[cut_idx], b[cut_idx], c[cut_idx]
+        px, dx, dy = p[:, 0], d[:, 0], d[:, 1]
+        A = ap * dx * dx
+        B = (2.0 * ap * px + bp) * dx - dy
+        C = ap * px * px + bp * px + cp - p[:, 1]
+        t_lo, t_hi, has_lo, has_hi = self._roots(A, B, C)
+
+        def inside(t):
+            return (A * t + B) * t + C >= 0
+
+        # Empty intervals inherit the membership of the previous one
+        m0 = inside(0.5 * t_lo)
+        m1 = torch.where(has_lo, inside(0.5 * (t_lo + t_hi)), m0)
+        m2 = torch.where(has_hi, inside(0.5 * (t_hi + 1.0)), m1)
+        # The following edge is a candidate too, or lies entirely below (rank < lo) or above the cut
+        next_rank = self.edge_rank[self.topology.loop_next[edge_idx]]
+        pair_lo, pair_hi = lo[cut_idx], hi[cut_idx]
+        is_pair = (next_rank >= pair_lo) & (next_rank < pair_hi)
+        next_pair = torch.where(is_pair, pair_start[cut_idx] + next_rank - pair_lo, torch.zeros_like(next_rank))
+        next_m0 = torch.where(is_pair, m0[next_pair], next_rank < pair_lo)
+        return (a, b, c), lo, (edge_idx, cut_idx), (t_lo, t_hi, has_lo), (m0, m1, m2, next_m0)
+
+    def _crossed_pieces(self, pairs, roots, membership):
+        """Edge/cut indices of crossed pairs, their (M, 4) interval bounds and (M, 3) interval membership."""
+        t_lo, t_hi, has_lo = roots
+        crossed = torch.nonzero(has_lo, as_tuple=True)[0]
+        lo, hi = t_lo[crossed], t_hi[crossed]
+        bounds = torch.stack([torch.zeros_like(lo), lo, hi, torch.ones_like(lo)], dim=1)
+        keep = torch.stack([m[crossed] for m in membership[:3]], dim=1).to(self.p.dtype)
+        return pairs[0][crossed], pairs[1][crossed], bounds, keep
+
+    def below(self, cuts: torch.Tensor) -> torch.Tensor:
+        """(K, 6) moments of the part of the shape with y <= a x^2 + b x + c."""
+        (a, b, c), below_count, pairs, roots, membership = self._classify(cuts)
+        edge_idx, cut_idx = pairs
+        t_lo, t_hi, has_lo = roots
+        m0, m1, m2, next_m0 = membership
+        p, d = self.p, self.d
+
+        # Edges entirely below the cut are a prefix of the lowest-y order
+        result = self.prefix_terms[below_count]
+
+        # Candidate edges without roots inside reuse the precomputed integrals
+        whole = torch.nonzero(m0 & ~has_lo, as_tuple=True)[0]
+        result = result.index_add(0, cut_idx[whole], self.edge_terms[edge_idx[whole]])
+
+        # Crossed edges are integrated piecewise
+        crossed_edge, crossed_cut, bounds, keep = self._crossed_pieces(pairs, roots, membership)
+        if crossed_edge.numel() > 0:
+            pieces = _edge_integrals(p[crossed_edge].repeat_interleave(3, dim=0), d[crossed_edge].repeat_interleave(3, dim=0),
+                                     bounds[:, :3].reshape(-1), bounds[:, 1:].reshape(-1))
+            pieces = (pieces.reshape(-1, 3, 6) * keep.unsqueeze(2)).sum(dim=1)
+            result = result.index_add(0, crossed_cut, pieces)
+
+        # Closing pieces along the cut: boundary entries (+1) and exits (-1) of the region,
+        # inside crossed edges and at vertices that lie exactly on the cut
+        m0f, m1f, m2f = m0.to(p.dtype), m1.to(p.dtype), m2.to(p.dtype)
+        px, dx = p[edge_idx, 0], d[edge_idx, 0]
+        event_x = torch.cat([px + t_lo * dx, px + t_hi * dx, px + dx])
+        event_sign = torch.cat([m1f - m0f, m2f - m1f, next_m0.to(p.dtype) - m2f])
+        event_cut = cut_idx.repeat(3)
+        events = torch.nonzero(event_sign != 0, as_tuple=True)[0]
+        if events.numel() > 0:
+            k = event_cut[events]
+            F = _cut_antiderivative(event_x[events], a[k], b[k], c[k])
+            result = result.index_add(0, k, event_sign[events].unsqueeze(1) * F)
+        return result * self.orientation
+
+    def above(self, cuts: torch.Tensor) -> torch.Tensor:
+        """(K, 6) moments of the part of the shape with y >= a x^2 + b x + c."""
+        return self.total - self.below(cuts)
+
+    def split(self, cuts: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Moments below and above each cut."""
+        below = self.below(cuts)
+        return below, self.total - below
+
+    def boundary_below(self, cuts: torch.Tensor) -> torch.Tensor:
+        """(K, 3) length, ∫x ds and ∫y ds of the boundary curve below each cut (for thin walls)."""
+        _, below_count, pairs, roots, membership = self._classify(cuts)
+        result = self.prefix_boundary[below_count]
+        whole = torch.nonzero(membership[0] & ~roots[2], as_tuple=True)[0]
+        result = result.index_add(0, pairs[1][whole], self.boundary_terms[pairs[0][whole]])
+        edge_idx, cut_idx, bounds, keep = self._crossed_pieces(pairs, roots, membership)
+        if edge_idx.numel() > 0:
+            h = (bounds[:, 1:] - bounds[:, :-1]) * keep
+            mid = 0.5 * (bounds[:, 1:] + bounds[:, :-1])
+            p, d = self.p[edge_idx].unsqueeze(1), self.d[edge_idx].unsqueeze(1)
+            length = self.edge_lengths[edge_idx].unsqueeze(1) * h
+            points = p + mid.unsqueeze(2) * d
+            pieces = torch.cat([length.sum(dim=1, keepdim=True), (length.unsqueeze(2) * points).sum(dim=1)], dim=1)
+            result = result.index_add(0, cut_idx, pieces)
+        return result
+
+    def boundary_above(self, cuts: torch.Tensor) -> torch.Tensor:
+        """(K, 3) length, ∫x ds and ∫y ds of the boundary curve above each cut."""
+        return self.boundary_total - self.boundary_below(cuts)
+
+    @staticmethod
+    def _roots(A: torch.Tensor, B: torch.Tensor, C: torch.Tensor):
+        """
+        Sorted roots of A t^2 + B t + C inside (0, 1) with validity masks; missing roots are 1.
+        Uses q = -(B + sign(B) sqrt(disc)) / 2, roots q / A and C / q, which also covers A = 0.
+        """
+        disc = B * B - 4.0 * A * C
+        real = disc > 0
+        sq = torch.sqrt(torch.where(real, disc, torch.ones_like(disc)))
+        q = -0.5 * (B + torch.where(B >= 0, sq, -sq))
+        q_ok = real & (q != 0)
+        q_safe = torch.where(q_ok, q, torch.ones_like(q))
+        A_ok = q_ok & (A != 0)
+        A_safe = torch.where(A_ok, A, torch.ones_like(A))
+        r1 = torch.where(A_ok, q / A_safe, torch.full_like(A, 2.0))
+        r2 = torch.where(q_ok, C / q_safe, torch.full_like(A, 2.0))
+        valid1 = A_ok & (r1 > 0) & (r1 < 1)
+        valid2 = q_ok & (r2 > 0) & (r2 < 1)
+        r1 = torch.where(valid1, r1, torch.ones_like(r1))
+        r2 = torch.where(valid2, r2, torch.ones_like(r2))
+        return torch.minimum(r1, r2), torch.maximum(r1, r2), valid1 | valid2, valid1 & valid2
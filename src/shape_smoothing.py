@@ -1,6 +1,7 @@
 import torch
 from typing import List, Tuple, Union
 from constants import SUPPORT_TOL
+from shape_topology import ShapeTopology, get_topology
 
 # Accepts either Shape2D or torch.Tensor for vertices
 
@@ -10,37 +11,160 @@ def _get_vertices(shape_or_vertices) -> torch.Tensor:
         return shape_or_vertices.vertices
     return shape_or_vertices
 
-def calculate_smoothing_score(vertices) -> torch.Tensor:
+def _get_edges(shape_or_vertices, edges=None):
+    if edges is not None:
+        return edges
+    # A Shape2D hands over its cached topology
+    return getattr(shape_or_vertices, 'topology', None)
+
+def neighbour_triples(edges, num_vertices: int) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """
+    Returns (prev, self, next) index tensors for every vertex that sits on a closed loop.
+    The neighbours come from the traced loops of the edge list (cached per topology), so
+    shapes with several loops (outer boundary and holes) use their real neighbours.
+    Without edges the vertices are treated as a single loop in index order.
+    """
+    if edges is None or (not isinstance(edges, ShapeTopology) and len(edges) == 0):
+        idx = torch.arange(num_vertices, dtype=torch.long)
+        return torch.roll(idx, 1), idx, torch.roll(idx, -1)
+    return get_topology(edges, num_vertices).triples
+
+class UmbrellaLaplacian:
+    """
+    Sparse umbrella Laplacian built once from the shape's loops.
+    Row i gives (L V)[i] = 0.5 * (V[prev] + V[next]) - V[i]; rows of fixed vertices are zero,
+    so a smoothing step V + strength * L V leaves them in place. A vertex shared by several
+    loops averages its per-loop umbrella vectors.
+    Operators of a ShapeTopology are cached on it, see topology_operator.
+    """
+    def __init__(self, triples: Tuple[torch.Tensor, torch.Tensor, torch.Tensor], num_vertices: int,
+                 fixed: torch.Tensor = None, dtype=torch.float32, device=None):
+        prev, cur, nxt = (t.to(device) for t in triples)
+        if fixed is not None:
+            keep = ~fixed.to(device)[cur]
+            prev, cur, nxt = prev[keep], cur[keep], nxt[keep]
+        self.triples = (prev, cur, nxt)
+        k = cur.shape[0]
+        rows = torch.arange(k, device=device).repeat(3)
+        cols = torch.cat([cur, prev, nxt])
+        vals = torch.cat([torch.full((k,), -1.0), torch.full((k,), 0.5), torch.full((k,), 0.5)]).to(dtype=dtype, device=device)
+        self.num_vertices = num_vertices
+        # One row per (prev, self, next) triplet, used for the f2 energy
+        self.difference = torch.sparse_coo_tensor(torch.stack([rows, cols]), vals, (k, num_vertices),
+                                                  check_invariants=False).coalesce()
+        self.difference_t = self.difference.t().coalesce()
+        # Triplet rows scattered back onto their vertex, used for smoothing passes
+        counts = torch.bincount(cur, minlength=num_vertices).clamp(min=1).to(dtype)
+        self.matrix = torch.sparse_coo_tensor(torch.stack([cur.repeat(3), cols]), vals / counts[cur].repeat(3),
+                                              (num_vertices, num_vertices), check_invariants=False).coalesce()
+        self._powers = {}
+
+    @classmethod
+    def from_edges(cls, vertices, edges=None, fixed: torch.Tensor = None) -> 'UmbrellaLaplacian':
+        """
+        Builds the operator; by default vertices on the support plane (|y| < SUPPORT_TOL) are fixed.
+        With edges (or a ShapeTopology) the operator is the one cached on the topology.
+        """
+        V = _get_vertices(vertices)
+        n = V.shape[0]
+        if fixed is None:
+            fixed = torch.abs(V[:, 1]) < SUPPORT_TOL
+        edges = _get_edges(vertices, edges)
+        if edges is None or (not isinstance(edges, ShapeTopology) and len(edges) == 0):
+            return cls(neighbour_triples(None, n), n, fixed, dtype=V.dtype, device=V.device)
+        return topology_operator(get_topology(edges, n), V.dtype, V.device, fixed)
+
+    def apply(self, V: torch.Tensor) -> torch.Tensor:
+        return torch.sparse.mm(self.matrix, V)
+
+    def step_operator(self, strength: float = 0.5) -> torch.Tensor:
+        """Sparse matrix of one smoothing pass, I + strength * L."""
+        n = self.num_vertices
+        idx = torch.arange(n, device=self.matrix.device)
+        eye = torch.sparse_coo_tensor(torch.stack([idx, idx]), torch.ones(n, dtype=self.matrix.dtype, device=idx.device), (n, n),
+                                      check_invariants=False)
+        return (eye + strength * self.matrix).coalesce()
+
+    def power(self, iterations: int, strength: float = 0.5) -> torch.Tensor:
+        """Precomputed (I + strength * L)^iterations, cached per (iterations, strength)."""
+        key = (iterations, strength)
+        if key not in self._powers:
+            step = self.step_operator(strength)
+            result = step
+            for _ in range(iterations - 1):
+                result = torch.sparse.mm(result, step).coalesce()
+            self._powers[key] = result
+        return self._powers[key]
+
+    def smooth(self, V: torch.Tensor, iterations: int = 1, strength: float = 0.5, precompute: bool = False) -> torch.Tensor:
+        """Applies k smoothing passes as repeated sparse mat-vecs (or one product with the cached operator power)."""
+        if iterations <= 0:
+            return V.clone()
+        if precompute:
+            return torch.sparse.mm(self.power(iterations, strength), V)
+        step = self.step_operator(strength)
+        for _ in range(iterations):
+            V = torch.sparse.mm(step, V)
+        return V
+
+    def support_weights(self, V: torch.Tensor) -> torch.Tensor:
+        """
+        1 for every triplet row that counts towards f2, 0 where (v0, v1) or (v1, v2) both lie
+        on the support plane. Computed from V on every call, so one operator serves any support.
+        """
+        prev, cur, nxt = self.triples
+        on_support = torch.abs(V[:, 1]) < SUPPORT_TOL
+        return (~(on_support[cur] & (on_support[prev] | on_support[nxt]))).to(V.dtype)
+
+    def energy(self, V: torch.Tensor, weights: torch.Tensor = None) -> torch.Tensor:
+        """Sum of 0.5 * ||v1 - (v0 + v2) / 2||^2 over the non-fixed triplets, optionally weighted per triplet."""
+        D = torch.sparse.mm(self.difference, V)
+        if weights is not None:
+            D = D * weights[:, None]
+        return 0.5 * torch.sum(D * D)
+
+def topology_operator(topology: ShapeTopology, dtype=torch.float32, device=None,
+                      fixed: torch.Tensor = None) -> UmbrellaLaplacian:
+    """
+    The UmbrellaLaplacian of a topology, built on first use and cached on the topology per
+    (dtype, device, fixed vertices), so losses evaluated every iteration reuse the sparse matrices.
+    """
+    device = torch.device(device) if device is not None else torch.device('cpu')
+    fixed_key = None if fixed is None else tuple(torch.nonzero(fixed).flatten().tolist())
+    key = (dtype, device, fixed_key)
+    operator = topology._operators.get(key)
+    if operator is None:
+        operator = UmbrellaLaplacian(topology.triples, topology.num_vertices, fixed, dtype=dtype, device=device)
+        topology._operators[key] = operator
+    return operator
+
+def smoothing_energy_operator(vertices, edges=None) -> UmbrellaLaplacian:
+    """
+    Operator of the f2 smoothing score: f2 = operator.energy(V, operator.support_weights(V)).
+    With edges (or a ShapeTopology) this is the operator cached on the topology; without,
+    the vertices form a single loop in index order and the operator is built on the spot.
+    """
+    V = _get_vertices(vertices)
+    n = V.shape[0]
+    edges = _get_edges(vertices, edges)
+    if edges is None or (not isinstance(edges, ShapeTopology) and len(edges) == 0):
+        return UmbrellaLaplacian(neighbour_triples(None, n), n, dtype=V.dtype, device=V.device)
+    return topology_operator(get_topology(edges, n), V.dtype, V.device)
+
+def calculate_smoothing_score(vertices, edges=None, operator: UmbrellaLaplacian = None) -> torch.Tensor:
     V = _get_vertices(vertices)
     n = V.shape[0]
     if n < 3:
         return torch.tensor(0.0, dtype=V.dtype)
-    f2 = torch.tensor(0.0, dtype=V.dtype)
-    for i in range(n):
-        v0 = V[(i - 1) % n]
-        v1 = V[i]
-        v2 = V[(i + 1) % n]
-        # Skip if v0 and v1 are both on support, or v1 and v2 are both on support
-        if (abs(v1[1]) < SUPPORT_TOL and abs(v0[1]) < SUPPORT_TOL) or (abs(v2[1]) < SUPPORT_TOL and abs(v1[1]) < SUPPORT_TOL):
-            continue
-        midpoint = 0.5 * (v0 + v2)
-        distance = torch.norm(v1 - midpoint, p=2)
-        f2 = f2 + 0.5 * (distance ** 2)
-    return f2
-
-def smooth_shape(vertices, iterations: int = 1, strength: float = 0.5, edges=None) -> torch.Tensor:
+    if operator is None:
+        operator = smoothing_energy_operator(vertices, edges)
+    return operator.energy(V, operator.support_weights(V))
+
+def smooth_shape(vertices, iterations: int = 1, strength: float = 0.5, edges=None,
+                 operator: UmbrellaLaplacian = None) -> torch.Tensor:
     V = _get_vertices(vertices).clone()
-    n = V.shape[0]
-    for _ in range(iterations):
-        new_V = V.clone()
-        for i in range(n):
-            v0 = V[(i - 1) % n]
-            v1 = V[i]
-            v2 = V[(i + 1) % n]
-            if abs(v1[1]) < SUPPORT_TOL:
-                new_V[i] = v1
-                continue
-            midpoint = 0.5 * (v0 + v2)
-            new_V[i] = v1 + strength * (midpoint - v1)
-        V = new_V
-    return V
+    if V.shape[0] < 3:
+        return V
+    if operator is None:
+        operator = UmbrellaLaplacian.from_edges(vertices, edges)
+    return operator.smooth(V, iterations, strength)
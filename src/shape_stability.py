@@ -1,21 +1,21 @@
 import torch
 from typing import Tuple
 from shape_mass_center import calculate_center_of_mass
+from shape_topology import get_topology
 
-def is_shape_stable(vertices: torch.Tensor, edges) -> Tuple[bool, float, float, float]:
+def is_shape_stable(vertices: torch.Tensor, edges, com: torch.Tensor = None) -> Tuple[bool, float, float, float]:
     """
     Determines if the shape is stable (will not fall) based on its center of mass and support base.
     Args:
         vertices: torch.Tensor of shape (N, 2)
-        edges: list or torch.LongTensor of shape (M, 2)
+        edges: list, torch.LongTensor of shape (M, 2) or ShapeTopology
+        com: optional precomputed center of mass (e.g. of a carved shape); computed from the edges if None
     Returns:
         is_stable (bool): True if stable, False if will fall
         x_cm (float): x-coordinate of center of mass
         x_left (float): leftmost x of support
         x_right (float): rightmost x of support
     """
-    if isinstance(edges, list):
-        edges = torch.tensor(edges, dtype=torch.long, device=vertices.device)
     y_min = vertices[:, 1].min()
     tol = 1e-3
     support_mask = torch.abs(vertices[:, 1] - y_min) < tol
@@ -27,7 +27,9 @@ def is_shape_stable(vertices: torch.Tensor, edges) -> Tuple[bool, float, float,
     else:
         x_left = support_x.min().item()
         x_right = support_x.max().item()
-    _, com = calculate_center_of_mass(vertices, edges)
+    if com is None:
+        # Loops are traced once per topology and reused across calls
+        _, com = calculate_center_of_mass(vertices, get_topology(edges, vertices.shape[0]))
     x_cm = com[0].item()
     is_stable = (x_left <= x_cm <= x_right) and (support_x.numel() >= 2)
     return is_stable, x_cm, x_left, x_right 
\ No newline at end of file
@@ -0,0 +1,149 @@
+import torch
+import weakref
+from typing import List, Union
+from collections import defaultdict, OrderedDict
+
+# Number of distinct topologies kept around by get_topology
+TOPOLOGY_CACHE_SIZE = 32
+
+def _find_all_loops(edges: List[List[int]], num_vertices: int) -> List[List[int]]:
+    """
+    Traces edges to find all closed loops in the mesh using standard Python.
+    This is the clean version without redundant logic.
+    """
+    adj = defaultdict(list)
+    for i, j in edges:
+        adj[i].append(j)
+        adj[j].append(i)
+
+    used_edges = set()
+    all_loops = []
+
+    for start_node in range(num_vertices):
+        for neighbor in adj[start_node]:
+            edge = tuple(sorted((start_node, neighbor)))
+            if edge not in used_edges:
+                current_loop = [start_node]
+                prev_node = start_node
+                current_node = neighbor
+
+                while current_node != start_node:
+                    used_edges.add(tuple(sorted((prev_node, current_node))))
+                    current_loop.append(current_node)
+                    
+                    next_node = None
+                    for next_neighbor in adj[current_node]:
+                        if next_neighbor != prev_node:
+                            next_node = next_neighbor
+                            break
+                    
+                    # If the path is broken (should not happen in a valid mesh)
+                    if next_node is None:
+                        break 
+                    prev_node = current_node
+                    current_node = next_node
+                
+                if current_node == start_node:
+                    used_edges.add(tuple(sorted((prev_node, current_node))))
+                    all_loops.append(current_loop)
+
+    return all_loops
+
+
+class ShapeTopology:
+    """
+    Traced loops of an edge list, stored as precomputed index tensors.
+    loop_from/loop_to: the directed loop edges in tracing order, loop_ids: the loop each edge belongs to,
+    loop_next: index of the edge that follows each edge along its loop.
+    prev/cur/next: neighbour triples of every vertex on a loop of at least three vertices.
+    """
+    def __init__(self, edges: List[List[int]], num_vertices: int):
+        self.num_vertices = num_vertices
+        self.loops = _find_all_loops(edges, num_vertices)
+        self.num_loops = len(self.loops)
+        loop_from, loop_to, loop_ids, loop_next = [], [], [], []
+        prev, cur, nxt = [], [], []
+        for k, loop in enumerate(self.loops):
+            offset = len(loop_from)
+            loop_next.extend(list(range(offset + 1, offset + len(loop))) + [offset])
+            loop_from.extend(loop)
+            loop_to.extend(loop[1:] + loop[:1])
+            loop_ids.extend([k] * len(loop))
+            if len(loop) >= 3:
+                prev.extend(loop[-1:] + loop[:-1])
+                cur.extend(loop)
+                nxt.extend(loop[1:] + loop[:1])
+        self.loop_from = torch.tensor(loop_from, dtype=torch.long)
+        self.loop_to = torch.tensor(loop_to, dtype=torch.long)
+        self.loop_ids = torch.tensor(loop_ids, dtype=torch.long)
+        self.loop_next = torch.tensor(loop_next, dtype=torch.long)
+        self.triples = (torch.tensor(prev, dtype=torch.long),
+                        torch.tensor(cur, dtype=torch.long),
+                        torch.tensor(nxt, dtype=torch.long))
+        self._device_cache = {}
+        # Sparse operators built from the triples (see shape_smoothing.topology_operator)
+        self._operators = {}
+
+    def to(self, device) -> 'ShapeTopology':
+        """Returns a view of the index tensors on the given device (cached per device)."""
+        device = torch.device(device)
+        if device == self.loop_from.device:
+            return self
+        if device not in self._device_cache:
+            moved = object.__new__(ShapeTopology)
+            moved.__dict__.update(self.__dict__)
+            moved.loop_from = self.loop_from.to(device)
+            moved.loop_to = self.loop_to.to(device)
+            moved.loop_ids = self.loop_ids.to(device)
+            moved.loop_next = self.loop_next.to(device)
+            moved.triples = tuple(t.to(device) for t in self.triples)
+            moved._device_cache = {}
+            self._device_cache[device] = moved
+        return self._device_cache[device]
+
+
+_topology_cache: 'OrderedDict[tuple, ShapeTopology]' = OrderedDict()
+# Edge tensors already resolved, by id: (weak reference, tensor _version, num_vertices, topology).
+# Lets repeated calls with the same tensor skip the O(E) fingerprint; entries leave with their tensor.
+_tensor_topology = {}
+
+def edge_fingerprint(edges, num_vertices: int) -> tuple:
+    """Hashable key identifying an edge list (list of pairs or (M, 2) tensor)."""
+    if isinstance(edges, torch.Tensor):
+        flat = tuple(edges.reshape(-1).tolist())
+    else:
+        flat = tuple(map(tuple, edges))
+    return (num_vertices, flat)
+
+def get_topology(edges: Union[List[List[int]], torch.Tensor, ShapeTopology], num_vertices: int) -> ShapeTopology:
+    """
+    Returns the ShapeTopology for an edge list, tracing its loops only the first time
+    a given (edges, num_vertices) pair is seen. A ShapeTopology is passed straight through.
+    """
+    if isinstance(edges, ShapeTopology):
+        return edges
+    if isinstance(edges, torch.Tensor):
+        entry = _tensor_topology.get(id(edges))
+        if entry is not None and entry[0]() is edges and entry[1] == edges._version and entry[2] == num_vertices:
+            return entry[3]
+    key = edge_fingerprint(edges, num_vertices)
+    topology = _topology_cache.get(key)
+    if topology is None:
+        edge_list = edges.tolist() if isinstance(edges, torch.Tensor) else edges
+        topology = ShapeTopology(edge_list, num_vertices)
+        _topology_cache[key] = topology
+        if len(_topology_cache) > TOPOLOGY_CACHE_SIZE:
+            _topology_cache.popitem(last=False)
+    else:
+        _topology_cache.move_to_end(key)
+    if isinstance(edges, torch.Tensor):
+        _remember_tensor(edges, num_vertices, topology)
+    return topology
+
+def _remember_tensor(edges: torch.Tensor, num_vertices: int, topology: ShapeTopology):
+    key = id(edges)
+    def forget(ref):
+        entry = _tensor_topology.get(key)
+        if entry is not None and entry[0] is ref:
+            del _tensor_topology[key]
+    _tensor_topology[key] = (weakref.ref(edges, forget), edges._version, num_vertices, topology)
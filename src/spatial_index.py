@@ -0,0 +1,221 @@
+"""
+Uniform-grid spatial index for hit-testing the vertices and edges of a Shape2D in the editor.
+
+Points live in square cells of a hash grid sized for about one point per cell, so a nearest
+query only looks at the few cells around the click (rings of cells are searched outwards until
+no closer point can exist). Moving or adding a vertex updates only the cells it touches.
+Pure Python; the shape's tensors are read once per rebuild.
+"""
+import math
+from typing import Dict, Hashable, Optional, Set, Tuple
+
+
+class PointGrid:
+    """Hash grid of keyed points supporting insert/move/remove and nearest-point queries."""
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size if cell_size > 0 else 1.0
+        self.cells: Dict[Tuple[int, int], Set[Hashable]] = {}
+        self.points: Dict[Hashable, Tuple[float, float]] = {}
+        self._bounds = None  # (min_ix, min_iy, max_ix, max_iy) of every cell ever occupied
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def insert(self, key: Hashable, x: float, y: float):
+        if key in self.points:
+            self.remove(key)
+        cell = self._cell(x, y)
+        self.cells.setdefault(cell, set()).add(key)
+        self.points[key] = (x, y)
+        if self._bounds is None:
+            self._bounds = (cell[0], cell[1], cell[0], cell[1])
+        else:
+            x0, y0, x1, y1 = self._bounds
+            self._bounds = (min(x0, cell[0]), min(y0, cell[1]), max(x1, cell[0]), max(y1, cell[1]))
+
+    def remove(self, key: Hashable):
+        x, y = self.points.pop(key)
+        cell = self._cell(x, y)
+        members = self.cells[cell]
+        members.discard(key)
+        if not members:
+            del self.cells[cell]
+
+    def move(self, key: Hashable, x: float, y: float):
+        old = self.points.get(key)
+        if old is not None and self._cell(*old) == self._cell(x, y):
+            self.points[key] = (x, y)
+        else:
+            self.insert(key, x, y)
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def nearest(self, x: float, y: float, max_dist: float = math.inf) -> Tuple[Optional[Hashable], float]:
+        """(key, squared distance) of the closest point within max_dist, or (None, inf)."""
+        if not self.points:
+            return None, math.inf
+        cx, cy = self._cell(x, y)
+        x0, y0, x1, y1 = self._bounds
+        # Rings beyond this one cannot contain points
+        max_ring = max(abs(cx - x0), abs(cx - x1), abs(cy - y0), abs(cy - y1))
+        if max_dist < math.inf:
+            max_ring = min(max_ring, int(max_dist / self.cell_size) + 1)
+        best_key, best = None, max_dist * max_dist
+        for ring in range(max_ring + 1):
+            for cell in self._ring(cx, cy, ring):
+                for key in self.cells.get(cell, ()):
+                    px, py = self.points[key]
+                    dist = (px - x) ** 2 + (py - y) ** 2
+                    if dist < best or (dist == best and best_key is not None and key < best_key):
+                        best_key, best = key, dist
+            # Every point in a farther ring is at least ring * cell_size away
+            if best_key is not None and best <= (ring * self.cell_size) ** 2:
+                break
+        return (best_key, best) if best_key is not None else (None, math.inf)
+
+    @staticmethod
+    def _ring(cx: int, cy: int, ring: int):
+        if ring == 0:
+            yield cx, cy
+            return
+        for ix in range(cx - ring, cx + ring + 1):
+            yield ix, cy - ring
+            yield ix, cy + ring
+        for iy in range(cy - ring + 1, cy + ring):
+            yield cx - ring, iy
+            yield cx + ring, iy
+
+
+def _segment_distance(x: float, y: float, a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    """Squared distance from (x, y) to the segment a-b."""
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    length2 = dx * dx + dy * dy
+    t = 0.0 if length2 == 0 else min(1.0, max(0.0, ((x - a[0]) * dx + (y - a[1]) * dy) / length2))
+    px, py = a[0] + t * dx, a[1] + t * dy
+    return (px - x) ** 2 + (py - y) ** 2
+
+
+class ShapeSpatialIndex:
+    """
+    Vertex and edge index of a Shape2D. Vertices are keyed by index; edges are keyed by their
+    position in shape.edges and stored at their midpoints. Shape2D.move_vertex / add_vertex /
+    add_edge keep it up to date incrementally: they call sync() before editing the shape and the
+    matching method here after. Other edits (in-place writes, replaced tensors or edge lists) are
+    detected on the next query, like in moment_accumulator.py, and trigger a rebuild.
+    """
+    def __init__(self, shape):
+        self.shape = shape
+        self.rebuild()
+
+    def _sync_key(self) -> tuple:
+        V, E = self.shape.vertices, self.shape.edges
+        return (id(V), V._version, V.shape[0], id(E), len(E))
+
+    def rebuild(self):
+        points = [tuple(p) for p in self.shape.vertices.tolist()]
+        edges = [tuple(e) for e in self.shape.edges.tolist()]
+        self.points = points
+        self.edges = edges
+        self.vertex_grid = PointGrid(self._cell_size(points))
+        for i, (x, y) in enumerate(points):
+            self.vertex_grid.insert(i, x, y)
+        self.incident: Dict[int, list] = {}
+        self.edge_grid = PointGrid(self.vertex_grid.cell_size)
+        # Upper bound on the edge lengths (it only grows), used to widen nearest_segment's search
+        self.longest_edge = 0.0
+        for k, (i, j) in enumerate(edges):
+            self._insert_edge(k, i, j)
+        self._key = self._sync_key()
+
+    @staticmethod
+    def _cell_size(points) -> float:
+        if len(points) < 2:
+            return 1.0
+        xs, ys = [p[0] for p in points], [p[1] for p in points]
+        extent = max(max(xs) - min(xs), max(ys) - min(ys))
+        return extent / math.sqrt(len(points)) if extent > 0 else 1.0
+
+    def _insert_edge(self, k: int, i: int, j: int):
+        self.incident.setdefault(i, []).append(k)
+        self.incident.setdefault(j, []).append(k)
+        (x0, y0), (x1, y1) = self.points[i], self.points[j]
+        self.edge_grid.insert(k, 0.5 * (x0 + x1), 0.5 * (y0 + y1))
+        self.longest_edge = max(self.longest_edge, math.hypot(x1 - x0, y1 - y0))
+
+    def sync(self):
+        """Rebuilds the index if the shape was edited behind its back."""
+        if self._key != self._sync_key():
+            self.rebuild()
+
+    def move_vertex(self, idx: int, x: float, y: float):
+        """Updates the index after vertex idx moved to (x, y): its cell and its incident edge midpoints."""
+        self.points[idx] = (x, y)
+        self.vertex_grid.move(idx, x, y)
+        for k in self.incident.get(idx, ()):
+            i, j = self.edges[k]
+            (x0, y0), (x1, y1) = self.points[i], self.points[j]
+            self.edge_grid.move(k, 0.5 * (x0 + x1), 0.5 * (y0 + y1))
+            self.longest_edge = max(self.longest_edge, math.hypot(x1 - x0, y1 - y0))
+        self._key = self._sync_key()
+
+    def add_vertex(self, x: float, y: float):
+        """Indexes a vertex appended to the shape."""
+        self.points.append((x, y))
+        self.vertex_grid.insert(len(self.points) - 1, x, y)
+        self._key = self._sync_key()
+
+    def add_edge(self, i: int, j: int):
+        """Indexes an edge appended to shape.edges."""
+        self.edges.append((i, j))
+        self._insert_edge(len(self.edges) - 1, i, j)
+        self._key = self._sync_key()
+
+    def nearest_vertex(self, x: float, y: float, max_dist: float = math.inf) -> Tuple[Optional[int], float]:
+        """(index, squared distance) of the closest vertex within max_dist, or (None, inf)."""
+        self.sync()
+        return self.vertex_grid.nearest(x, y, max_dist)
+
+    def nearest_edge_midpoint(self, x: float, y: float, max_dist: float = math.inf) -> Tuple[Optional[tuple], float]:
+        """(edge, squared distance) of the edge whose midpoint is closest, as the editor picks edges."""
+        self.sync()
+        k, dist = self.edge_grid.nearest(x, y, max_dist)
+        return (self.edges[k] if k is not None else None), dist
+
+    def nearest_segment(self, x: float, y: float, max_dist: float = math.inf) -> Tuple[Optional[tuple], float]:
+        """
+        (edge, squared distance) of the closest edge segment within max_dist, or (None, inf).
+        A segment within d of the query has its midpoint within d + longest_edge / 2, so only
+        the edges whose midpoints lie in those cells are measured. Ties go to the edge listed first
+        in shape.edges, as in a linear scan.
+        """
+        self.sync()
+        if not self.edges:
+            return None, math.inf
+        best_k, best = None, max_dist * max_dist
+        if max_dist == math.inf:
+            # Bound the search by the segment of the nearest midpoint
+            best_k, _ = self.edge_grid.nearest(x, y)
+            i, j = self.edges[best_k]
+            best = _segment_distance(x, y, self.points[i], self.points[j])
+        grid = self.edge_grid
+        cx, cy = grid._cell(x, y)
+        rings = int((math.sqrt(best) + 0.5 * self.longest_edge) / grid.cell_size) + 1
+        for k in self._midpoints_within(cx, cy, rings):
+            i, j = self.edges[k]
+            dist = _segment_distance(x, y, self.points[i], self.points[j])
+            if dist < best or (dist == best and best_k is not None and k < best_k):
+                best_k, best = k, dist
+        return (self.edges[best_k], best) if best_k is not None else (None, math.inf)
+
+    def _midpoints_within(self, cx: int, cy: int, rings: int):
+        cells = self.edge_grid.cells
+        if (2 * rings + 1) ** 2 >= len(cells):
+            # The search square covers more cells than are occupied: scan the occupied ones
+            for (ix, iy), members in cells.items():
+                if abs(ix - cx) <= rings and abs(iy - cy) <= rings:
+                    yield from members
+            return
+        for ix in range(cx - rings, cx + rings + 1):
+            for iy in range(cy - rings, cy + rings + 1):
+                yield from cells.get((ix, iy), ())
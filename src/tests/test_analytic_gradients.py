@@ -0,0 +1,54 @@
+import torch
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from optimization import total_loss, total_loss_and_grad, f1, f1_and_grad, f2, f2_and_grad
+
+def _autograd(fn, V):
+    V = V.clone().requires_grad_(True)
+    loss = fn(V)
+    loss.backward()
+    return loss.detach(), V.grad
+
+def _check(V, E, V_og):
+    loss_a, grad_a = _autograd(lambda X: total_loss(X, E, V_og), V)
+    loss_c, grad_c = total_loss_and_grad(V, E, V_og)
+    print(f"autograd loss: {loss_a.item():.8f}  closed-form loss: {loss_c.item():.8f}")
+    assert torch.allclose(loss_a, loss_c, atol=1e-10)
+    assert torch.allclose(grad_a, grad_c, atol=1e-10)
+
+    for fn, fn_grad in ((f1, f1_and_grad), (f2, f2_and_grad)):
+        l_a, g_a = _autograd(lambda X: fn(X, E), V)
+        l_c, g_c = fn_grad(V, E)
+        assert torch.allclose(l_a, l_c, atol=1e-10)
+        assert torch.allclose(g_a, g_c, atol=1e-10)
+
+def test_pentagon_gradients():
+    """Closed-form gradients match autograd on a perturbed pentagon standing on y=0."""
+    torch.manual_seed(0)
+    V_og = torch.tensor([[0, 0], [2, 0], [2.5, 1.5], [1, 2.5], [-0.5, 1.5]], dtype=torch.float64)
+    E = torch.tensor([[0, 1], [1, 2], [2, 3], [3, 4], [4, 0]], dtype=torch.long)
+    V = V_og.clone()
+    V[2:] += 0.1 * torch.randn(3, 2, dtype=torch.float64)
+    _check(V, E, V_og)
+
+def test_donut_gradients():
+    """Closed-form gradients match autograd on a shape with a hole."""
+    torch.manual_seed(1)
+    V_og = torch.tensor([
+        [0, 0], [4, 0], [4, 4], [0, 4],
+        [1, 1], [1, 3], [3, 3], [3, 1]
+    ], dtype=torch.float64)
+    E = torch.tensor([
+        [0, 1], [1, 2], [2, 3], [3, 0],
+        [4, 5], [5, 6], [6, 7], [7, 4]
+    ], dtype=torch.long)
+    V = V_og + 0.05 * torch.randn(8, 2, dtype=torch.float64)
+    V[:2, 1] = 0.0
+    _check(V, E, V_og)
+
+if __name__ == "__main__":
+    test_pentagon_gradients()
+    test_donut_gradients()
@@ -0,0 +1,62 @@
+import torch
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from shape2d import Shape2D
+from optimization import total_loss, gradient_descent
+from batch_optimization import ShapeBatch, batched_total_loss, batched_gradient_descent
+
+SHAPES_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'shapes')
+
+def load_shapes(names=('square.json', 'pentagon.json', 'man.json')):
+    shapes = [Shape2D.load(os.path.join(SHAPES_DIR, name)) for name in names]
+    return [s.vertices.double() for s in shapes], [s.topology for s in shapes]
+
+def test_batched_total_loss_matches_single_shape():
+    """Each entry of the batched loss (and its gradient) equals total_loss of that shape alone."""
+    torch.manual_seed(0)
+    vertices, topologies = load_shapes()
+    moved = [V + 0.01 * torch.randn_like(V) for V in vertices]
+    batch = ShapeBatch(moved, topologies)
+    V = batch.vertices.clone().requires_grad_(True)
+    losses = batched_total_loss(batch, V, batch.pack(vertices))
+    losses.sum().backward()
+    for b, (V_b, V_og, E) in enumerate(zip(moved, vertices, topologies)):
+        V_single = V_b.clone().requires_grad_(True)
+        loss = total_loss(V_single, E, V_og)
+        loss.backward()
+        print(f"Shape {b}: batched {losses[b].item():.10f}, single {loss.item():.10f}")
+        assert abs(losses[b].item() - loss.item()) < 1e-7
+        assert torch.allclose(batch.split(V.grad)[b], V_single.grad, atol=1e-7)
+
+def test_batched_gradient_descent_matches_single_shape():
+    """With the same step count, batched descent ends where optimization.gradient_descent does for each shape."""
+    vertices, topologies = load_shapes()
+    batch = ShapeBatch(vertices, topologies)
+    result = batched_gradient_descent(batch, lr=0.05, tol=0.0, grad_tol=0.0, rel_tol=0.0, max_iters=50)
+    for b, (V_og, E) in enumerate(zip(vertices, topologies)):
+        V_single, info = gradient_descent(lambda V: total_loss(V, E, V_og), V_og, lr=0.05, tol=0.0, grad_tol=0.0,
+                                          rel_tol=0.0, max_iters=50, return_info=True)
+        error = (result.vertices[b] - V_single).abs().max().item()
+        print(f"Shape {b}: max vertex difference {error:.3g}")
+        assert result.iterations[b] == info['iterations'] == 50
+        assert error < 1e-7
+        assert abs(result.final_loss[b].item() - total_loss(V_single, E, V_og).item()) < 1e-7
+
+def test_batched_gradient_descent_stops_like_single_shape():
+    """Each shape stops at the check where optimization.gradient_descent stops it (tol, grad_tol or rel_tol)."""
+    vertices, topologies = load_shapes()
+    result = batched_gradient_descent(ShapeBatch(vertices, topologies), lr=0.05, max_iters=1000)
+    for b, (V_og, E) in enumerate(zip(vertices, topologies)):
+        V_single, info = gradient_descent(lambda V: total_loss(V, E, V_og), V_og, lr=0.05, max_iters=1000, return_info=True)
+        print(f"Shape {b}: batched {result.iterations[b]} iterations, single {info['iterations']} ({info['stop_reason']})")
+        assert result.iterations[b] == info['iterations'] < 1000
+        assert torch.allclose(result.vertices[b], V_single, atol=1e-7)
+
+if __name__ == "__main__":
+    test_batched_total_loss_matches_single_shape()
+    test_batched_gradient_descent_matches_single_shape()
+    test_batched_gradient_descent_stops_like_single_shape()
+    print("All batch optimization tests passed!")
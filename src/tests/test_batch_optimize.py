@@ -0,0 +1,35 @@
+import csv
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from batch_optimize import main, SUMMARY_COLUMNS
+
+SHAPES_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'shapes')
+
+def run_cli(extra_args=()):
+    """Runs the CLI on square.json into a temporary directory; returns the summary rows and the output files."""
+    with tempfile.TemporaryDirectory() as tmp:
+        args = [os.path.join(SHAPES_DIR, 'square.json'), '--out', tmp, '--iters', '20', '--workers', '1', *extra_args]
+        assert main(args) == 0
+        with open(os.path.join(tmp, 'summary.csv'), newline='') as f:
+            reader = csv.DictReader(f)
+            columns, rows = reader.fieldnames, list(reader)
+        return columns, rows, sorted(os.listdir(tmp))
+
+def test_cli_writes_summary_and_shapes():
+    """The CLI writes the optimized shape and a summary with SUMMARY_COLUMNS, without importing PyQt5."""
+    for extra_args in ((), ('--batched',)):
+        columns, rows, files = run_cli(extra_args)
+        print(f"{' '.join(extra_args) or 'pool'}: {rows[0]['iterations']} iterations, files {files}")
+        assert columns == SUMMARY_COLUMNS
+        assert len(rows) == 1 and rows[0]['shape'] == 'square.json'
+        assert float(rows[0]['final_loss']) < float(rows[0]['initial_loss'])
+        assert 'square_optimized.json' in files
+    assert not [name for name in sys.modules if name.split('.')[0] == 'PyQt5']
+
+if __name__ == "__main__":
+    test_cli_writes_summary_and_shapes()
+    print("All batch CLI tests passed!")
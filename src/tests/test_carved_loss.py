@@ -0,0 +1,53 @@
+import torch
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from optimization import carved_center_of_mass, f1_carved, optimize_carved, total_loss_carved
+
+SQUARE_V = torch.tensor([[0, 0], [1, 0], [1, 1], [0, 1]], dtype=torch.float32)
+SQUARE_E = torch.tensor([[0, 1], [1, 2], [2, 3], [3, 0]], dtype=torch.long)
+
+def test_carved_center_of_mass():
+    """Without walls the carved CoM is the CoM of the part below the line; a cut above the shape changes nothing."""
+    mass, com = carved_center_of_mass(SQUARE_V, SQUARE_E, torch.tensor(0.0), torch.tensor(0.5), thickness=0.0)
+    print(f"Carved mass: {mass.item():.4f}, center of mass: {com.tolist()}")
+    assert torch.isclose(mass, torch.tensor(0.5))
+    assert torch.allclose(com, torch.tensor([0.5, 0.25]))
+
+    mass, com = carved_center_of_mass(SQUARE_V, SQUARE_E, torch.tensor(0.0), torch.tensor(5.0))
+    assert torch.isclose(mass, torch.tensor(1.0))
+    assert torch.allclose(com, torch.tensor([0.5, 0.5]))
+
+    # Walls of thickness 0.1 above y = 0.5: two half sides and the top, 2 units long
+    mass, com = carved_center_of_mass(SQUARE_V, SQUARE_E, torch.tensor(0.0), torch.tensor(0.5), thickness=0.1)
+    assert torch.isclose(mass, torch.tensor(0.7))
+    assert torch.allclose(com, torch.tensor([0.5, (0.5 * 0.25 + 0.2 * 0.875) / 0.7]))
+
+def test_joint_optimization():
+    """A leaning shape: the joint (V, b, c) optimization lowers the carved total loss."""
+    V = torch.tensor([[0, 0], [1, 0], [2.5, 2], [1.5, 2]], dtype=torch.float32)
+    b, c = torch.tensor(0.0, requires_grad=True), torch.tensor(1.0, requires_grad=True)
+    f1_carved(V, SQUARE_E, b, c).backward()
+    assert torch.isfinite(b.grad) and torch.isfinite(c.grad)
+
+    V_opt, b_opt, c_opt, info = optimize_carved(V, SQUARE_E, lr=0.05, max_iters=200, return_info=True)
+    print(f"Cut: y = {b_opt.item():.4f} x + {c_opt.item():.4f}, iterations: {info['iterations']}")
+    assert torch.equal(V_opt[:2], V[:2])  # support vertices stay fixed
+    with torch.no_grad():
+        before = total_loss_carved(V, torch.tensor(0.0), torch.tensor(1.0), SQUARE_E, V)
+        after = total_loss_carved(V_opt, b_opt, c_opt, SQUARE_E, V)
+    assert after < before
+
+def test_joint_optimization_stops_when_converged():
+    """The joint descent stops on its own once the loss settles, well before max_iters."""
+    V_opt, b_opt, c_opt, info = optimize_carved(SQUARE_V, SQUARE_E, lr=0.05, max_iters=2000, return_info=True)
+    print(f"Stopped after {info['iterations']} iterations: {info['stop_reason']}")
+    assert info['iterations'] < 2000
+    assert info['loss_history'].shape[0] == info['iterations'] + 1
+
+if __name__ == "__main__":
+    test_carved_center_of_mass()
+    test_joint_optimization()
+    test_joint_optimization_stops_when_converged()
@@ -0,0 +1,53 @@
+import math
+import torch
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from intersections import carve, line_edge_intersections
+
+def test_square_carving():
+    """Carves the unit square with a vertical and a horizontal line in one batch."""
+    vertices_tensor = torch.tensor([[0, 0], [1, 0], [1, 1], [0, 1]], dtype=torch.float32)
+    edges_tensor = torch.tensor([[0, 1], [1, 2], [2, 3], [3, 0]], dtype=torch.long)
+    lines = torch.tensor([[0.0, 0.5], [math.pi / 2, 0.25]])  # x = 0.5 and y = 0.25
+
+    result = carve(vertices_tensor, edges_tensor, lines)
+    print(f"Carved areas: {result.area.tolist()}")
+    print(f"Carved centers of mass: {result.center_of_mass.tolist()}")
+    assert torch.allclose(result.area, torch.tensor([0.5, 0.25]), atol=1e-5)
+    assert torch.allclose(result.center_of_mass, torch.tensor([[0.25, 0.5], [0.5, 0.125]]), atol=1e-5)
+    assert result.crossed.sum(dim=0).tolist() == [2, 2]
+
+    points, crossed = line_edge_intersections(vertices_tensor, edges_tensor, lines)
+    assert torch.allclose(points[:, 0][crossed[:, 0]], torch.tensor([[0.5, 0.0], [0.5, 1.0]]), atol=1e-6)
+
+def test_donut_carving():
+    """Carving through the hole of a donut keeps the hole's contribution."""
+    donut_vertices_data = [
+        [0, 0], [4, 0], [4, 4], [0, 4],
+        [1, 1], [1, 3], [3, 3], [3, 1]
+    ]
+    donut_edges_data = [
+        [0, 1], [1, 2], [2, 3], [3, 0],
+        [4, 5], [5, 6], [6, 7], [7, 4]
+    ]
+    vertices_tensor = torch.tensor(donut_vertices_data, dtype=torch.float32)
+    result = carve(vertices_tensor, donut_edges_data, torch.tensor([[0.0, 2.0]]))
+    print(f"Carved donut area: {result.area.item()}, center of mass: {result.center_of_mass[0].tolist()}")
+    assert torch.isclose(result.area[0], torch.tensor(6.0), atol=1e-5)
+    assert torch.allclose(result.center_of_mass[0], torch.tensor([5.0 / 6.0, 2.0]), atol=1e-5)
+
+def test_carving_gradient():
+    """The carved area is differentiable in the line offset: d(area)/dc is the chord length."""
+    vertices_tensor = torch.tensor([[0, 0], [1, 0], [1, 1], [0, 1]], dtype=torch.float32)
+    lines = torch.tensor([[0.0, 0.3]], requires_grad=True)
+    result = carve(vertices_tensor, [[0, 1], [1, 2], [2, 3], [3, 0]], lines)
+    result.area.sum().backward()
+    assert torch.isclose(lines.grad[0, 1], torch.tensor(1.0), atol=1e-5)
+
+if __name__ == "__main__":
+    test_square_carving()
+    test_donut_carving()
+    test_carving_gradient()
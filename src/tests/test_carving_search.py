@@ -0,0 +1,35 @@
+import torch
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from carving_search import line_grid, evaluate_cuts, select_starts
+from optimization import carved_center_of_mass
+
+def test_grid_matches_single_cuts():
+    """The batched grid evaluation agrees with carved_center_of_mass cut by cut."""
+    vertices_tensor = torch.tensor([[0, 0], [1, 0], [2.5, 2], [1.5, 2]], dtype=torch.float32)
+    edges_data = [[0, 1], [1, 2], [2, 3], [3, 0]]
+    cuts, index = line_grid(vertices_tensor, num_angles=5, num_offsets=4)
+    assert cuts.shape == (20, 2) and index.shape == (20, 2)
+    # The horizontal lines (middle angle) sit at 1/5, 2/5, ... of the height
+    assert torch.allclose(cuts[8:12], torch.tensor([[0.0, 0.4], [0.0, 0.8], [0.0, 1.2], [0.0, 1.6]]), atol=1e-6)
+
+    mass, com = evaluate_cuts(vertices_tensor, edges_data, cuts)
+    for k in [0, 9, 19]:
+        mass_k, com_k = carved_center_of_mass(vertices_tensor, edges_data, cuts[k, 0], cuts[k, 1])
+        assert torch.isclose(mass[k], mass_k, atol=1e-5)
+        assert torch.allclose(com[k], com_k, atol=1e-5)
+
+def test_select_starts_skips_neighbours():
+    scores = torch.tensor([0.0, 0.1, 0.2, 0.3])
+    index = torch.tensor([[0, 0], [0, 1], [0, 3], [2, 0]])
+    survivors = torch.tensor([True, True, False, True])
+    starts = select_starts(scores, index, survivors, num_starts=3)
+    print(f"Chosen starts: {starts}")
+    assert starts == [0, 3]
+
+if __name__ == "__main__":
+    test_grid_matches_single_cuts()
+    test_select_starts_skips_neighbours()
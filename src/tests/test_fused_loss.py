@@ -0,0 +1,38 @@
+import torch
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from optimization import total_loss
+from fused_loss import make_fused_total_loss
+
+def test_fused_matches_total_loss():
+    """The fused loss (eager) gives the same value and gradient as total_loss."""
+    torch.manual_seed(0)
+    V_og = torch.tensor([
+        [0, 0], [4, 0], [4, 4], [0, 4],
+        [1, 1], [1, 3], [3, 3], [3, 1]
+    ], dtype=torch.float64)
+    E = torch.tensor([
+        [0, 1], [1, 2], [2, 3], [3, 0],
+        [4, 5], [5, 6], [6, 7], [7, 4]
+    ], dtype=torch.long)
+    V0 = V_og.clone()
+    V0[2:] += 0.05 * torch.randn(6, 2, dtype=torch.float64)
+
+    V_a = V0.clone().requires_grad_(True)
+    loss_a = total_loss(V_a, E, V_og)
+    loss_a.backward()
+
+    fused = make_fused_total_loss(E, V_og, compile=False)
+    V_b = V0.clone().requires_grad_(True)
+    loss_b = fused(V_b)
+    loss_b.backward()
+
+    print(f"total_loss: {loss_a.item():.8f}  fused: {loss_b.item():.8f}")
+    assert torch.allclose(loss_a, loss_b, atol=1e-10)
+    assert torch.allclose(V_a.grad, V_b.grad, atol=1e-10)
+
+if __name__ == "__main__":
+    test_fused_matches_total_loss()
@@ -0,0 +1,43 @@
+import torch
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from shape_mass_center import calculate_center_of_mass, calculate_loop_moments, _get_com_from_loops
+
+def test_donut_loop_moments():
+    """Tests the per-loop areas and centroids of a donut (outer square with a square hole)."""
+    donut_vertices_data = [
+        [0, 0], [4, 0], [4, 4], [0, 4],  
+        [1, 1], [1, 3], [3, 3], [3, 1]   
+    ]
+    donut_edges_data = [
+        [0, 1], [1, 2], [2, 3], [3, 0],  
+        [4, 5], [5, 6], [6, 7], [7, 4]   
+    ]
+    vertices_tensor = torch.tensor(donut_vertices_data, dtype=torch.float32)
+    edges_tensor = torch.tensor(donut_edges_data, dtype=torch.long)
+
+    areas, centroids = calculate_loop_moments(vertices_tensor, edges_tensor)
+    print(f"Loop areas: {areas.tolist()}")
+    print(f"Loop centroids: {centroids.tolist()}")
+    assert torch.allclose(areas, torch.tensor([16.0, -4.0]))
+    assert torch.allclose(centroids, torch.tensor([[2.0, 2.0], [2.0, 2.0]]))
+
+    area, com = calculate_center_of_mass(vertices_tensor, edges_tensor)
+    assert torch.isclose(area, torch.tensor(12.0))
+    assert torch.allclose(com, torch.tensor([2.0, 2.0]))
+
+def test_loop_list_matches_topology():
+    """The explicit loop-list entry point agrees with the cached topology path."""
+    vertices_tensor = torch.tensor([[-2, 0], [-2, 2], [0, 2], [0, 0], [2, 0], [2, -2], [0, -2]], dtype=torch.float32)
+    edges_data = [[0, 1], [1, 2], [2, 3], [3, 0], [3, 4], [4, 5], [5, 6], [6, 3]]
+    area, com = calculate_center_of_mass(vertices_tensor, edges_data)
+    area_l, com_l = _get_com_from_loops(vertices_tensor, [[0, 1, 2, 3], [3, 4, 5, 6]])
+    assert torch.isclose(area, area_l)
+    assert torch.allclose(com, com_l)
+
+if __name__ == "__main__":
+    test_donut_loop_moments()
+    test_loop_list_matches_topology()
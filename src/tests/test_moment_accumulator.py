@@ -0,0 +1,55 @@
+import torch
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from shape2d import Shape2D
+from shape_mass_center import calculate_center_of_mass
+from moment_accumulator import MomentAccumulator
+
+def _donut():
+    donut_vertices_data = [
+        [0, 0], [4, 0], [4, 4], [0, 4],
+        [1, 1], [1, 3], [3, 3], [3, 1]
+    ]
+    donut_edges_data = [
+        (0, 1), (1, 2), (2, 3), (3, 0),
+        (4, 5), (5, 6), (6, 7), (7, 4)
+    ]
+    return Shape2D(torch.tensor(donut_vertices_data, dtype=torch.float32), donut_edges_data)
+
+def test_incremental_moves_match_full_recompute():
+    """Moving vertices through the accumulator gives the same CoM as recomputing from scratch."""
+    shape = _donut()
+    accumulator = MomentAccumulator(shape, resum_every=3)
+    area, com = accumulator.area_and_center_of_mass()
+    assert abs(area - 12.0) < 1e-9 and abs(com[0] - 2.0) < 1e-9 and abs(com[1] - 2.0) < 1e-9
+
+    moves = [(2, 5.0, 4.5), (6, 3.5, 3.0), (2, 4.5, 4.0), (0, 0.0, -0.5), (5, 1.0, 3.5)]
+    for idx, x, y in moves:
+        accumulator.move_vertex(idx, x, y)
+        area, com = accumulator.area_and_center_of_mass()
+        area_ref, com_ref = calculate_center_of_mass(shape)
+        print(f"Moved v{idx}: area {area:.4f} (ref {area_ref.item():.4f}), com {com}")
+        assert abs(area - area_ref.item()) < 1e-4
+        assert torch.allclose(torch.tensor(com, dtype=torch.float32), com_ref, atol=1e-4)
+
+def test_external_edits_trigger_rebuild():
+    """Direct writes to shape.vertices or shape.edges are picked up on the next query."""
+    shape = _donut()
+    accumulator = shape.moments
+    shape.vertices[2] = torch.tensor([6.0, 4.0])
+    area, com = accumulator.area_and_center_of_mass()
+    area_ref, com_ref = calculate_center_of_mass(shape)
+    assert abs(area - area_ref.item()) < 1e-4
+    assert torch.allclose(torch.tensor(com, dtype=torch.float32), com_ref, atol=1e-4)
+
+    shape.move_vertex(2, 4.0, 4.0)
+    shape.edges = shape.edges[:4]  # drop the hole
+    area, com = accumulator.area_and_center_of_mass()
+    assert abs(area - 16.0) < 1e-9
+
+if __name__ == "__main__":
+    test_incremental_moves_match_full_recompute()
+    test_external_edits_trigger_rebuild()
@@ -0,0 +1,55 @@
+import torch
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from optimization import total_loss, quadratic_hessian, optimize_carved
+from optimizers import available_optimizers, run_optimizer
+
+V_OG = torch.tensor([[0, 0], [1, 0], [2.5, 2], [1.5, 2]], dtype=torch.float32)
+E = torch.tensor([[0, 1], [1, 2], [2, 3], [3, 0]], dtype=torch.long)
+
+def loss_fn(V):
+    return total_loss(V, E, V_OG)
+
+def test_callback_stops_every_optimizer():
+    """Returning True from the callback stops each optimizer at its first check."""
+    for method in available_optimizers():
+        calls = []
+        def callback(iteration, loss, V):
+            calls.append((iteration, loss))
+            return True
+        options = {'hessian': quadratic_hessian(V_OG, E)} if method == 'newton' else {}
+        V, info = run_optimizer(method, loss_fn, V_OG.clone(), max_iters=1000, return_info=True,
+                                callback=callback, **options)
+        print(f"{method}: stopped after {info['iterations']} iterations, {len(calls)} callback call(s)")
+        assert len(calls) == 1
+        assert info['iterations'] < 1000
+        # The reported loss is the loss of the iterate handed to the callback
+        assert abs(calls[0][1] - loss_fn(V).item()) < 1e-4
+
+def test_callback_sees_descent():
+    """Losses reported at the checks of gradient descent go down."""
+    losses = []
+    run_optimizer('gradient_descent', loss_fn, V_OG.clone(), max_iters=200,
+                  callback=lambda iteration, loss, V: losses.append(loss))
+    assert len(losses) > 2
+    assert losses[-1] < losses[0]
+
+def test_joint_callback():
+    """optimize_carved hands V, b and c to the callback and stops when asked."""
+    seen = []
+    def callback(iteration, loss, V, b, c):
+        seen.append((iteration, b.item(), c.item()))
+        return iteration >= 20
+    V, b, c, info = optimize_carved(V_OG, E, max_iters=1000, return_info=True, callback=callback)
+    print(f"Joint optimization stopped at iteration {seen[-1][0]}")
+    assert seen[-1][0] == 20
+    assert info['iterations'] == 20
+
+if __name__ == "__main__":
+    test_callback_stops_every_optimizer()
+    test_callback_sees_descent()
+    test_joint_callback()
+    print("All optimizer callback tests passed!")
@@ -0,0 +1,38 @@
+import torch
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from shape2d import Shape2D
+from optimization import total_loss, quadratic_hessian
+from optimizers import available_optimizers, run_optimizer
+
+SHAPES_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'shapes')
+
+def test_optimizers_stop_when_converged():
+    """L-BFGS and Newton stop well before max_iters on a shape they converge on quickly."""
+    shape = Shape2D.load(os.path.join(SHAPES_DIR, 'pentagon.json'))
+    V_og, E = shape.vertices, shape.topology
+    loss_fn = lambda V: total_loss(V, E, V_og)
+    for method in ('lbfgs', 'newton'):
+        options = {'hessian': quadratic_hessian(V_og, E)} if method == 'newton' else {}
+        V, info = run_optimizer(method, loss_fn, V_og.clone(), max_iters=300, return_info=True, **options)
+        print(f"{method}: {info['iterations']} iterations, loss {loss_fn(V).item():.4f} ({info['stop_reason']})")
+        assert info['iterations'] < 300
+        assert loss_fn(V).item() < loss_fn(V_og).item()
+
+def test_every_optimizer_reports_stop_reason():
+    """Every registered optimizer returns a stop reason with its info."""
+    V_og = torch.tensor([[0, 0], [1, 0], [2.5, 2], [1.5, 2]], dtype=torch.float32)
+    E = torch.tensor([[0, 1], [1, 2], [2, 3], [3, 0]], dtype=torch.long)
+    for method in available_optimizers():
+        options = {'hessian': quadratic_hessian(V_og, E)} if method == 'newton' else {}
+        _, info = run_optimizer(method, lambda V: total_loss(V, E, V_og), V_og.clone(), max_iters=50,
+                                return_info=True, **options)
+        assert isinstance(info['stop_reason'], str)
+
+if __name__ == "__main__":
+    test_optimizers_stop_when_converged()
+    test_every_optimizer_reports_stop_reason()
+    print("All optimizer tests passed!")
@@ -0,0 +1,59 @@
+import torch
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from shape2d import Shape2D
+
+def square():
+    V = torch.tensor([[0, 0], [1, 0], [1, 1], [0, 1]], dtype=torch.float32)
+    return Shape2D(V, [(0, 1), (1, 2), (2, 3), (3, 0)])
+
+def test_edges_are_a_tensor():
+    """Edge lists are stored as one contiguous (m, 2) long tensor; Shape2D has no __dict__."""
+    shape = square()
+    assert shape.edges.dtype == torch.long and shape.edges.shape == (4, 2)
+    assert shape.edges.is_contiguous()
+    assert not hasattr(shape, '__dict__')
+    assert Shape2D().edges.shape == (0, 2)
+
+def test_cached_structures():
+    """Adjacency, edge set, loops and support mask are built once and reused."""
+    shape = square()
+    offsets, neighbors, edge_ids = shape.adjacency
+    print(f"Adjacency offsets: {offsets.tolist()}, neighbors: {neighbors.tolist()}")
+    assert offsets.tolist() == [0, 2, 4, 6, 8]
+    assert sorted(neighbors[offsets[0]:offsets[1]].tolist()) == [1, 3]
+    assert sorted(edge_ids[offsets[2]:offsets[3]].tolist()) == [1, 2]
+    assert shape.has_edge(1, 0) and not shape.has_edge(0, 2)
+    assert shape.is_closed_polygon()
+    assert shape.loops == [[0, 1, 2, 3]]
+    assert shape.support_mask.tolist() == [True, True, False, False]
+    assert shape.topology is shape.topology
+    assert shape.edge_set is shape.edge_set
+
+def test_mutations_invalidate_caches():
+    """add_edge / add_vertex / move_vertex and in-place writes all refresh the derived structures."""
+    shape = square()
+    version = shape.version
+    topology = shape.topology
+    shape.move_vertex(2, 1.0, 2.0)
+    assert shape.version > version
+    assert shape.topology is topology  # moving a vertex keeps the edges
+    new = shape.add_vertex(0.5, 0.0)
+    shape.add_edge(new, 2)
+    assert shape.has_edge(2, new) and shape.adjacency[0][-1] == 10
+    assert shape.support_mask.tolist() == [True, True, False, False, True]
+    with torch.no_grad():
+        shape.vertices[3, 1] = 0.0
+    assert shape.support_mask[3]
+    shape.edges = shape.edges[:4]
+    assert not shape.has_edge(new, 2)
+    assert shape.topology.loops == [[0, 1, 2, 3]]
+
+if __name__ == "__main__":
+    test_edges_are_a_tensor()
+    test_cached_structures()
+    test_mutations_invalidate_caches()
+    print("All Shape2D tests passed!")
@@ -0,0 +1,69 @@
+import torch
+import math
+import sys
+import os
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from shape2d import Shape2D
+from shape_binary import HEADER, read_shape_binary, convert_shape
+
+SHAPES_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'shapes')
+
+def circle_shape(n=1000):
+    angles = [2 * math.pi * k / n for k in range(n)]
+    vertices = torch.tensor([[math.cos(a), 1.0 + math.sin(a)] for a in angles], dtype=torch.float32)
+    return Shape2D(vertices, [(k, (k + 1) % n) for k in range(n)])
+
+def test_binary_round_trip():
+    """Saving and loading .s2d keeps vertices and edges bit for bit; the file is header + raw blocks."""
+    shape = circle_shape()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'circle.s2d')
+        shape.save(path)
+        assert os.path.getsize(path) == HEADER.size + 8 * 1000 + 8 * 1000
+        loaded = Shape2D.load(path)
+        print(f"Loaded {loaded.vertices.shape[0]} vertices, {loaded.edges.shape[0]} edges")
+        assert torch.equal(loaded.vertices, shape.vertices)
+        assert torch.equal(loaded.edges, shape.edges)
+        assert loaded.edges.dtype == torch.long
+        assert loaded.is_closed_polygon()
+        # Writes to the mapped vertices never reach the file
+        loaded.move_vertex(0, 5.0, 5.0)
+        assert torch.equal(read_shape_binary(path)[0], shape.vertices)
+
+def test_json_conversion_is_lossless():
+    """JSON -> .s2d -> JSON gives back the same shape."""
+    source = os.path.join(SHAPES_DIR, 'man.json')
+    original = Shape2D.load_from_json(source)
+    with tempfile.TemporaryDirectory() as tmp:
+        binary, back = os.path.join(tmp, 'shape.s2d'), os.path.join(tmp, 'shape.json')
+        convert_shape(source, binary)
+        convert_shape(binary, back)
+        restored = Shape2D.load(back)
+        assert torch.equal(restored.vertices, original.vertices)
+        assert torch.equal(restored.edges, original.edges)
+
+def test_empty_and_invalid_files():
+    """Empty shapes round-trip; files that are not .s2d are rejected."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'empty.s2d')
+        Shape2D().save(path)
+        empty = Shape2D.load(path)
+        assert empty.vertices.shape == (0, 2) and empty.edges.shape == (0, 2)
+        bad = os.path.join(tmp, 'bad.s2d')
+        with open(bad, 'wb') as f:
+            f.write(b'{"vertices": [], "edges": []}')
+        try:
+            Shape2D.load(bad)
+        except ValueError as e:
+            print(f"Rejected: {e}")
+        else:
+            assert False, "expected ValueError"
+
+if __name__ == "__main__":
+    test_binary_round_trip()
+    test_json_conversion_is_lossless()
+    test_empty_and_invalid_files()
+    print("All binary shape tests passed!")
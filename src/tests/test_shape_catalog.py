@@ -0,0 +1,65 @@
+import torch
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from shape2d import Shape2D
+from shape_catalog import ShapeCatalog, SIDECAR_NAME
+
+SHAPES_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'shapes')
+
+def square(size=1.0):
+    V = torch.tensor([[0, 0], [size, 0], [size, size], [0, size]], dtype=torch.float32)
+    return Shape2D(V, [(0, 1), (1, 2), (2, 3), (3, 0)])
+
+def test_catalog_metadata():
+    """Entries hold counts, bounding box, area, center of mass and stability; cut files are skipped."""
+    with tempfile.TemporaryDirectory() as tmp:
+        square(2.0).save(os.path.join(tmp, 'square.json'))
+        square().save(os.path.join(tmp, 'small.s2d'))
+        with open(os.path.join(tmp, 'square_optimized_cut.json'), 'w') as f:
+            json.dump({'b': 0.0, 'c': 1.0}, f)
+        catalog = ShapeCatalog(tmp)
+        assert catalog.names() == []
+        assert catalog.refresh() == ['small.s2d', 'square.json']
+        entry = catalog.get('square.json')
+        print(f"Catalog entry: {entry}")
+        assert entry['vertices'] == 4 and entry['edges'] == 4
+        assert entry['bbox'] == [0.0, 0.0, 2.0, 2.0]
+        assert abs(entry['area'] - 4.0) < 1e-5
+        assert abs(entry['com'][0] - 1.0) < 1e-5 and entry['stable']
+        assert len(entry['hash']) == 40
+        assert catalog.describe('square.json').startswith('square.json  (4 v')
+
+def test_catalog_is_incremental():
+    """A fresh catalog reuses the sidecar; only modified, new and deleted files are updated."""
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in os.listdir(SHAPES_DIR):
+            shutil.copy(os.path.join(SHAPES_DIR, name), tmp)
+        ShapeCatalog(tmp).refresh()
+        assert os.path.isfile(os.path.join(tmp, SIDECAR_NAME))
+        catalog = ShapeCatalog(tmp)
+        assert catalog.refresh() == []
+        # Modify one file, add one and delete one
+        path = os.path.join(tmp, 'man.json')
+        shape = Shape2D.load(path)
+        Shape2D(shape.vertices * 2, shape.edges).save(path)
+        os.utime(path, (time.time() + 10, time.time() + 10))
+        square().save(os.path.join(tmp, 'new.json'))
+        os.remove(os.path.join(tmp, 'triangle.json'))
+        assert sorted(catalog.stale()) == ['man.json', 'new.json']
+        assert 'new.json' in catalog.names() and 'triangle.json' not in catalog.names()
+        assert catalog.describe('new.json') == 'new.json  (...)'
+        assert sorted(catalog.update(['man.json', 'new.json'])) == ['man.json', 'new.json']
+        catalog.save()
+        assert ShapeCatalog(tmp).get('man.json') == catalog.get('man.json')
+
+if __name__ == "__main__":
+    test_catalog_metadata()
+    test_catalog_is_incremental()
+    print("All shape catalog tests passed!")
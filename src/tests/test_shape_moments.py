@@ -0,0 +1,90 @@
+import math
+import torch
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from shape_moments import PolygonMoments, moments_to_center_of_mass
+from intersections import carve
+
+SQUARE_V = torch.tensor([[0, 0], [1, 0], [1, 1], [0, 1]], dtype=torch.float64)
+SQUARE_E = [[0, 1], [1, 2], [2, 3], [3, 0]]
+
+def test_square_line_and_parabola():
+    """Horizontal line y = 0.5 and parabola y = x^2 through the unit square."""
+    moments = PolygonMoments(SQUARE_V, SQUARE_E)
+    assert torch.allclose(moments.total, torch.tensor([1.0, 0.5, 0.5, 1 / 3, 0.25, 1 / 3], dtype=torch.float64))
+
+    below = moments.below(torch.tensor([[0.0, 0.0, 0.5], [1.0, 0.0, 0.0]], dtype=torch.float64))
+    area, com = moments_to_center_of_mass(below)
+    print(f"Areas below: {area.tolist()}, centers of mass: {com.tolist()}")
+    assert torch.allclose(area, torch.tensor([0.5, 1 / 3], dtype=torch.float64))
+    assert torch.allclose(com, torch.tensor([[0.5, 0.25], [0.75, 0.3]], dtype=torch.float64))
+    # Second moments of the region under y = x^2: ∫x^4, ∫x^5/2, ∫x^6/3
+    assert torch.allclose(below[1, 3:], torch.tensor([0.2, 1 / 12, 1 / 21], dtype=torch.float64))
+
+def test_parabola_crossing_an_edge_twice():
+    """y = 4(x - 0.5)^2 + 0.5 dips into the square and crosses its top edge twice."""
+    moments = PolygonMoments(SQUARE_V, SQUARE_E)
+    above = moments.above(torch.tensor([4.0, -4.0, 1.5], dtype=torch.float64))
+    # Region between the parabola and y = 1: x in [0.5 - 1/(2 sqrt 2), 0.5 + 1/(2 sqrt 2)]
+    w = 1 / (2 * math.sqrt(2))
+    expected = 2 * w * 0.5 - 4 * (2 * w ** 3 / 3)
+    assert torch.isclose(above[0, 0], torch.tensor(expected, dtype=torch.float64))
+
+def test_line_matches_carving():
+    """A slanted line through the donut agrees with intersections.carve."""
+    donut_vertices_data = [
+        [0, 0], [4, 0], [4, 4], [0, 4],
+        [1, 1], [1, 3], [3, 3], [3, 1]
+    ]
+    donut_edges_data = [
+        [0, 1], [1, 2], [2, 3], [3, 0],
+        [4, 5], [5, 6], [6, 7], [7, 4]
+    ]
+    V = torch.tensor(donut_vertices_data, dtype=torch.float64)
+    b, c = 0.5, 1.0
+    area, com = moments_to_center_of_mass(PolygonMoments(V, donut_edges_data).below(torch.tensor([[b, c]], dtype=torch.float64)))
+    # y <= b x + c  <=>  -b x + y <= c, as a (r, c) line
+    norm = math.hypot(b, 1.0)
+    line = torch.tensor([[math.atan2(1.0, -b), c / norm]], dtype=torch.float64)
+    result = carve(V, donut_edges_data, line)
+    print(f"Moments: area {area.item():.6f}, com {com[0].tolist()}; carve: area {result.area.item():.6f}, com {result.center_of_mass[0].tolist()}")
+    assert torch.allclose(area, result.area)
+    assert torch.allclose(com, result.center_of_mass)
+
+def test_boundary_below():
+    """Length moments of the square's boundary under y = 0.5: the bottom edge plus half of each side."""
+    boundary = PolygonMoments(SQUARE_V, SQUARE_E).boundary_below(torch.tensor([[0.0, 0.5]], dtype=torch.float64))
+    assert torch.allclose(boundary, torch.tensor([[2.0, 1.0, 0.25]], dtype=torch.float64))
+
+def test_cut_gradient():
+    """d(area below y = c)/dc is the width of the shape at height c."""
+    cut = torch.tensor([[0.0, 0.0, 0.3]], dtype=torch.float64, requires_grad=True)
+    PolygonMoments(SQUARE_V, SQUARE_E).below(cut)[0, 0].backward()
+    assert torch.allclose(cut.grad, torch.tensor([[1 / 3, 0.5, 1.0]], dtype=torch.float64))
+
+def test_only_edges_near_the_cut_are_classified():
+    """On a fine polygon a horizontal cut classifies only the edges around its height, and still matches carve."""
+    n = 2000
+    t = torch.linspace(0, 2 * math.pi, n + 1, dtype=torch.float64)[:-1]
+    V = torch.stack([torch.cos(t), torch.sin(t) + 1.0], dim=1)
+    E = [[i, (i + 1) % n] for i in range(n)]
+    moments = PolygonMoments(V, E)
+    cut = torch.tensor([[0.0, 0.0, 1.2]], dtype=torch.float64)
+    _, _, pairs, _, _ = moments._classify(cut)
+    print(f"Classified {pairs[0].numel()} of {n} edges")
+    assert pairs[0].numel() < 20
+    area, com = moments_to_center_of_mass(moments.below(cut))
+    result = carve(V, E, torch.tensor([[math.pi / 2, 1.2]], dtype=torch.float64))
+    assert torch.allclose(area, result.area)
+    assert torch.allclose(com, result.center_of_mass)
+
+if __name__ == "__main__":
+    test_square_line_and_parabola()
+    test_parabola_crossing_an_edge_twice()
+    test_line_matches_carving()
+    test_boundary_below()
+    test_cut_gradient()
+    test_only_edges_near_the_cut_are_classified()
@@ -0,0 +1,47 @@
+import torch
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from rectangle_vertices_edges import shell_vertices_edges, rectangle_vertices_edges, combine_centers_of_mass
+
+def test_square_shell():
+    """Walls of thickness 0.1 around the unit square (right-hand normals point outwards)."""
+    vertices_tensor = torch.tensor([[0, 0], [1, 0], [1, 1], [0, 1]], dtype=torch.float32)
+    edges_tensor = torch.tensor([[0, 1], [1, 2], [2, 3], [3, 0]], dtype=torch.long)
+    c = torch.tensor(0.1, requires_grad=True)
+
+    all_V, all_E, area, com = shell_vertices_edges(vertices_tensor, edges_tensor, 0, 3, c)
+    print(f"Shell area: {area.item():.4f}, center of mass: {com.tolist()}")
+    assert all_V.shape == (12, 2) and all_E.shape == (12, 2)
+    assert torch.allclose(all_V[4:6], torch.tensor([[0.0, -0.1], [1.0, -0.1]]))
+    assert all_E[:3].tolist() == [[1, 5], [5, 4], [4, 0]]
+    assert torch.isclose(area, torch.tensor(0.4))
+    assert torch.allclose(com, torch.tensor([0.5, 0.5]))
+
+    area.backward()
+    assert torch.isclose(c.grad, torch.tensor(4.0))
+
+def test_range_selection_matches_wrapper():
+    """Only edges inside [idx_start, idx_end] get walls; the no_grad wrapper returns the same V/E."""
+    vertices_tensor = torch.tensor([[0, 0], [2, 0], [2, 2], [0, 2]], dtype=torch.float32)
+    edges_tensor = torch.tensor([[0, 1], [1, 2], [2, 3], [3, 0]], dtype=torch.long)
+    all_V, all_E, area, com = shell_vertices_edges(vertices_tensor, edges_tensor, 1, 3, 0.5)
+    old_V, old_E = rectangle_vertices_edges(vertices_tensor, edges_tensor, 1, 3, 0.5)
+    assert all_E.shape == (6, 2)  # edges (1, 2) and (2, 3)
+    assert torch.equal(all_V, old_V) and torch.equal(all_E, old_E)
+    assert torch.isclose(area, torch.tensor(2.0))
+    assert torch.allclose(com, torch.tensor([1.625, 1.625]))
+
+def test_combine_centers_of_mass():
+    masses = torch.tensor([3.0, 1.0])
+    coms = torch.tensor([[0.0, 0.0], [4.0, 8.0]])
+    total, com = combine_centers_of_mass(masses, coms)
+    assert torch.isclose(total, torch.tensor(4.0))
+    assert torch.allclose(com, torch.tensor([1.0, 2.0]))
+
+if __name__ == "__main__":
+    test_square_shell()
+    test_range_selection_matches_wrapper()
+    test_combine_centers_of_mass()
@@ -0,0 +1,74 @@
+import torch
+import math
+import random
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from shape2d import Shape2D
+from spatial_index import PointGrid, _segment_distance
+
+def circle_shape(n=500):
+    angles = [2 * math.pi * k / n for k in range(n)]
+    vertices = torch.tensor([[math.cos(a), 1.0 + math.sin(a)] for a in angles], dtype=torch.float32)
+    return Shape2D(vertices, [(k, (k + 1) % n) for k in range(n)])
+
+def test_point_grid_matches_brute_force():
+    """Nearest queries agree with a linear scan, also after moves and for far-away queries."""
+    rng = random.Random(0)
+    points = {k: (rng.uniform(-3, 3), rng.uniform(0, 2)) for k in range(300)}
+    grid = PointGrid(0.2)
+    for k, (x, y) in points.items():
+        grid.insert(k, x, y)
+    for k in range(0, 300, 7):
+        points[k] = (rng.uniform(-3, 3), rng.uniform(0, 2))
+        grid.move(k, *points[k])
+    for _ in range(200):
+        x, y = rng.uniform(-6, 6), rng.uniform(-3, 5)
+        key, dist = grid.nearest(x, y)
+        best = min(points, key=lambda k: ((points[k][0] - x) ** 2 + (points[k][1] - y) ** 2, k))
+        assert key == best
+        assert math.isclose(dist, (points[best][0] - x) ** 2 + (points[best][1] - y) ** 2)
+    assert grid.nearest(100.0, 100.0, max_dist=1.0) == (None, math.inf)
+
+def test_shape_index_queries():
+    """Vertex, edge-midpoint and segment queries on a 500-vertex circle."""
+    shape = circle_shape()
+    index = shape.spatial_index
+    idx, dist = index.nearest_vertex(1.01, 1.0)
+    print(f"Nearest vertex to (1.01, 1.0): {idx} at distance {math.sqrt(dist):.4f}")
+    assert idx == 0 and math.isclose(dist, 1e-4, rel_tol=1e-3)
+    points = shape.vertices.tolist()
+    edges = [tuple(e) for e in shape.edges.tolist()]
+    # (0, 2.001) is straight above vertex 125, equally close to both of its edges: ties go to the first listed
+    for x, y in ((0.0, 2.001), (0.3, 1.97), (-0.71, 0.29)):
+        edge, dist = index.nearest_segment(x, y)
+        brute = min(edges, key=lambda e: _segment_distance(x, y, points[e[0]], points[e[1]]))
+        assert edge == brute
+        assert math.isclose(dist, _segment_distance(x, y, points[brute[0]], points[brute[1]]))
+    edge, _ = index.nearest_edge_midpoint(-1.0, 1.0)
+    assert edge == (249, 250) or edge == (250, 251)
+
+def test_incremental_updates():
+    """move_vertex, add_vertex and add_edge keep the index current without a rebuild."""
+    shape = circle_shape()
+    index = shape.spatial_index
+    grid = index.vertex_grid
+    shape.move_vertex(10, 3.0, 3.0)
+    assert index.nearest_vertex(2.9, 2.9)[0] == 10
+    new = shape.add_vertex(-3.0, 0.5)
+    shape.add_edge(new, 0)
+    assert index.nearest_vertex(-2.9, 0.5)[0] == new
+    assert index.nearest_segment(-1.0, 0.75)[0] == (new, 0)
+    assert index.vertex_grid is grid  # no rebuild happened
+    # Direct edits are still picked up
+    with torch.no_grad():
+        shape.vertices[20] = torch.tensor([0.0, -2.0])
+    assert index.nearest_vertex(0.0, -1.9)[0] == 20
+
+if __name__ == "__main__":
+    test_point_grid_matches_brute_force()
+    test_shape_index_queries()
+    test_incremental_updates()
+    print("All spatial index tests passed!")
@@ -0,0 +1,53 @@
+import torch
+import numpy as np
+import sys
+import os
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from optimization import gradient_descent, total_loss
+from optimization_telemetry import TelemetryRecorder, loss_terms, METRICS
+
+V_OG = torch.tensor([[0, 0], [1, 0], [2.5, 2], [1.5, 2]], dtype=torch.float32)
+E = torch.tensor([[0, 1], [1, 2], [2, 3], [3, 0]], dtype=torch.long)
+
+def test_recorded_terms():
+    """The weighted terms add up to the recorded total loss; sampling skips the other iterations."""
+    recorder = TelemetryRecorder(capacity=100, sample_every=5, terms_fn=loss_terms(E, V_OG), terms_every=10)
+    gradient_descent(lambda V: total_loss(V, E, V_OG), V_OG.clone(), lr=0.05, max_iters=50, rel_tol=0.0,
+                     grad_tol=0.0, tol=0.0, telemetry=recorder)
+    samples = recorder.samples()
+    print(f"Recorded {len(recorder)} samples, final loss {samples['loss'][-1]:.6f}")
+    assert len(recorder) == 10
+    assert np.array_equal(samples['iteration'], np.arange(0, 50, 5))
+    with_terms = ~np.isnan(samples['f1'])
+    assert np.array_equal(samples['iteration'][with_terms], np.arange(0, 50, 10))
+    total = samples['f1'] + samples['f2'] + samples['f3']
+    assert np.allclose(total[with_terms], samples['loss'][with_terms], rtol=1e-5)
+    assert np.all(np.diff(samples['wall_time']) >= 0)
+    assert np.allclose(samples['step_size'], 0.05 * samples['grad_norm'])
+
+def test_ring_buffer_and_export():
+    """Once full, the oldest rows are dropped; exports keep the chronological order."""
+    seen = []
+    recorder = TelemetryRecorder(capacity=4, callbacks=[seen.append], callback_every=2)
+    for i in range(10):
+        recorder.record(i, torch.tensor(float(10 - i)), 1.0, 0.1)
+    assert len(recorder) == 4
+    assert recorder.samples()['iteration'].tolist() == [6, 7, 8, 9]
+    assert [sample['iteration'] for sample in seen] == [1, 3, 5, 7, 9]
+    with tempfile.TemporaryDirectory() as tmp:
+        recorder.to_csv(os.path.join(tmp, 'run.csv'))
+        with open(os.path.join(tmp, 'run.csv')) as f:
+            lines = f.read().splitlines()
+        assert lines[0] == ','.join(METRICS)
+        assert lines[1].startswith('6,4,')
+        recorder.to_npz(os.path.join(tmp, 'run.npz'))
+        data = np.load(os.path.join(tmp, 'run.npz'))
+        assert data['loss'].tolist() == [4.0, 3.0, 2.0, 1.0]
+
+if __name__ == "__main__":
+    test_recorded_terms()
+    test_ring_buffer_and_export()
+    print("All telemetry tests passed!")
@@ -0,0 +1,125 @@
+import os
+import threading
+from PyQt5.QtCore import Qt, QObject, QThread, QTimer, QFileSystemWatcher, pyqtSignal
+from shape_catalog import ShapeCatalog
+
+# Editors and batch runs write files in bursts; wait this long after the last change before refreshing
+DEBOUNCE_MS = 200
+
+
+class CatalogWorker(QThread):
+    """
+    Refreshes a ShapeCatalog off the UI thread. Requests made while a refresh runs collapse into one
+    more refresh. listed() is emitted when the scan added or removed names (new files are listed as
+    pending right away) and refreshed(changed) once their metadata is computed and the sidecar saved.
+    """
+    listed = pyqtSignal()
+    refreshed = pyqtSignal(list)
+
+    def __init__(self, catalog: ShapeCatalog, parent=None):
+        super().__init__(parent)
+        self.catalog = catalog
+        self._condition = threading.Condition()
+        self._requested = False
+        self._stopping = False
+
+    def request(self):
+        with self._condition:
+            self._requested = True
+            self._condition.notify()
+
+    def stop(self):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self._condition:
+                while not self._requested and not self._stopping:
+                    self._condition.wait()
+                if self._stopping:
+                    return
+                self._requested = False
+            before = self.catalog.names()
+            stale = self.catalog.stale()
+            if self.catalog.names() != before:
+                self.listed.emit()
+            changed = self.catalog.update(stale)
+            self.catalog.save()
+            self.refreshed.emit(changed)
+
+
+class CatalogWatcher(QObject):
+    """
+    Keeps the catalog of the shapes directory current while the GUI runs. A QFileSystemWatcher on the
+    directory and its shape files triggers a debounced refresh on the worker, which only recomputes
+    the files whose mtime or size changed. changed is emitted whenever the listing or metadata moved.
+    Nothing is scanned before start(): computing metadata imports torch, which must stay off the
+    startup path, so the GUI starts the watcher once its window is shown.
+    """
+    changed = pyqtSignal()
+
+    def __init__(self, directory: str, parent=None):
+        super().__init__(parent)
+        self.catalog = ShapeCatalog(directory)
+        self.worker = CatalogWorker(self.catalog)
+        self.worker.listed.connect(self._on_listed)
+        self.worker.refreshed.connect(self._on_refreshed)
+        self.worker.start()
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(DEBOUNCE_MS)
+        self.timer.timeout.connect(self.worker.request)
+        self.watcher = QFileSystemWatcher(self)
+        if os.path.isdir(directory):
+            self.watcher.addPath(directory)
+        self.watcher.directoryChanged.connect(self.schedule_refresh)
+        self.watcher.fileChanged.connect(self.schedule_refresh)
+        self._started = False
+
+    def start(self):
+        """Requests the first refresh (once); later refreshes come from the filesystem watcher."""
+        if not self._started:
+            self._started = True
+            self.worker.request()
+
+    def schedule_refresh(self, *args):
+        if self._started:
+            self.timer.start()
+
+    def _on_listed(self):
+        self.changed.emit()
+
+    def _on_refreshed(self, changed):
+        # Watch the shape files too, so that in-place rewrites are noticed
+        paths = [os.path.join(self.catalog.directory, name) for name in self.catalog.names()]
+        watched = set(self.watcher.files())
+        new_paths = [p for p in paths if p not in watched]
+        if new_paths:
+            self.watcher.addPaths(new_paths)
+        if changed:
+            self.changed.emit()
+
+    def stop(self):
+        self.timer.stop()
+        self.worker.stop()
+
+
+def fill_shape_dropdown(dropdown, placeholder: str, catalog: ShapeCatalog):
+    """
+    Lists the catalog in a QComboBox: the text carries the metadata summary, the item data the file
+    name. The current selection is kept if its file is still listed. Signals are blocked meanwhile.
+    """
+    current = dropdown.currentData()
+    dropdown.blockSignals(True)
+    dropdown.clear()
+    dropdown.addItem(placeholder)
+    for name in catalog.names():
+        dropdown.addItem(catalog.describe(name), name)
+        dropdown.setItemData(dropdown.count() - 1, catalog.tooltip(name), Qt.ToolTipRole)
+    index = dropdown.findData(current) if current is not None else -1
+    dropdown.setCurrentIndex(max(index, 0))
+    dropdown.blockSignals(False)
+    return index > 0
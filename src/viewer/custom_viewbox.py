@@ -1,6 +1,5 @@
 import pyqtgraph as pg
 from PyQt5.QtCore import Qt
-import torch
 
 class CustomViewBox(pg.ViewBox):
     def __init__(self, main_window, *args, **kwargs):
@@ -22,7 +21,8 @@ class CustomViewBox(pg.ViewBox):
                 shape = self.main_window.shape
                 idx = self.main_window.selected_vertex
                 if shape and 0 <= idx < len(shape.vertices):
-                    shape.vertices[idx] = torch.tensor([x, y], dtype=shape.vertices.dtype)
+                    # Goes through the shape so its moment accumulator updates incrementally
+                    shape.move_vertex(idx, x, y)
                     self.main_window.update_plot()
                 ev.accept()
                 return
@@ -0,0 +1,91 @@
+import threading
+import time
+import torch
+from PyQt5.QtCore import QThread, pyqtSignal
+from optimization import total_loss, total_loss_carved, quadratic_hessian, optimize_carved
+from optimizers import run_optimizer
+from shape_topology import get_topology
+from constants import WALL_THICKNESS
+
+# Minimum time between two progress signals (about one display refresh)
+PROGRESS_INTERVAL = 1.0 / 60.0
+
+
+class OptimizationWorker(QThread):
+    """
+    Runs one optimization of the Optimization tab off the Qt main thread.
+    At every convergence check of the optimizer it records the best iterate so far and emits
+    progress(iteration, loss, V, cut) at most once per PROGRESS_INTERVAL; cut is (b, c) in
+    carving mode and None otherwise. cancel() stops the optimizer at its next check.
+    When the run ends, done(result) carries a dict with 'vertices', 'cut', 'loss',
+    'iterations' and 'cancelled', holding the best iterate seen; failed(message) reports errors.
+    """
+    progress = pyqtSignal(int, float, object, object)
+    done = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, V_og, edges, method='gradient_descent', max_iters=1000, carving=False, weights=None,
+                 thickness=WALL_THICKNESS, parent=None):
+        super().__init__(parent)
+        self.V_og = V_og.detach().clone()
+        self.E = get_topology(edges, self.V_og.shape[0])
+        self.method = method
+        self.max_iters = max_iters
+        self.carving = carving
+        self.weights = weights if weights is not None else {'lambda1': 0.33, 'lambda2': 0.33, 'lambda3': 0.34}
+        self.thickness = thickness
+        self._cancel = threading.Event()
+        self._best = None
+        self._last_emit = 0.0
+
+    def cancel(self):
+        self._cancel.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def _loss(self, V, cut=None) -> float:
+        with torch.no_grad():
+            if cut is not None:
+                return total_loss_carved(V, cut[0], cut[1], self.E, self.V_og, self.thickness, **self.weights).item()
+            return total_loss(V, self.E, self.V_og, **self.weights).item()
+
+    def _on_check(self, iteration, loss, V, b=None, c=None):
+        # The optimizers update V in place, so every kept or emitted iterate is a copy
+        cut = (b.clone(), c.clone()) if b is not None else None
+        snapshot = None
+        if loss == loss and (self._best is None or loss < self._best[0]):
+            snapshot = V.clone()
+            self._best = (loss, snapshot, cut)
+        now = time.perf_counter()
+        if now - self._last_emit >= PROGRESS_INTERVAL:
+            self._last_emit = now
+            self.progress.emit(iteration, loss, snapshot if snapshot is not None else V.clone(), cut)
+        return self._cancel.is_set()
+
+    def run(self):
+        try:
+            self.done.emit(self._optimize())
+        except Exception as e:
+            self.failed.emit(str(e))
+
+    def _optimize(self) -> dict:
+        if self.carving:
+            V, b, c, info = optimize_carved(self.V_og, self.E, max_iters=self.max_iters, thickness=self.thickness,
+                                            return_info=True, callback=self._on_check, **self.weights)
+            cut = (b, c)
+        else:
+            options = {}
+            if self.method == 'newton':
+                options['hessian'] = quadratic_hessian(self.V_og, self.E, lambda2=self.weights['lambda2'],
+                                                       lambda3=self.weights['lambda3'])
+            V, info = run_optimizer(self.method, lambda V: total_loss(V, self.E, self.V_og, **self.weights),
+                                    self.V_og.clone(), max_iters=self.max_iters, return_info=True,
+                                    callback=self._on_check, E=self.E, **options)
+            cut = None
+        loss = self._loss(V, cut)
+        if self._best is not None and not loss <= self._best[0]:
+            # The last steps made things worse (or produced NaN): keep the best iterate
+            loss, V, cut = self._best
+        return {'vertices': V.detach(), 'cut': cut, 'loss': loss, 'iterations': info['iterations'],
+                'cancelled': self._cancel.is_set()}
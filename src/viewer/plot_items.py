@@ -0,0 +1,126 @@
+import numpy as np
+import pyqtgraph as pg
+
+
+def _to_numpy(V):
+    """(n, 2) float array from a tensor or a list of points."""
+    if hasattr(V, 'detach'):
+        return V.detach().cpu().numpy().reshape(-1, 2)
+    return np.asarray(V, dtype=float).reshape(-1, 2)
+
+
+class ShapePlotItems:
+    """
+    Long-lived plot items for one shape on one plot widget. Every redraw only pushes new arrays
+    through setData, so no items are created or removed while the user drags or optimizes:
+      - all edges as a single curve, using a connect array to break it between edges
+      - one scatter for the vertices, one for highlighted vertices
+      - the selected edge, an optional fill, the CoM marker and its texts
+      - a pool of vertex label TextItems, grown on demand and hidden when unused
+    """
+    def __init__(self, plot_widget, edge_pen=None, vertex_brush='r', vertex_size=12, z=0):
+        self.plot_widget = plot_widget
+        self.fill = pg.PlotCurveItem(pen=pg.mkPen('blue', width=2), fillLevel=0, brush=pg.mkBrush('lightblue', alpha=80))
+        self.edges = pg.PlotCurveItem(pen=edge_pen if edge_pen is not None else pg.mkPen('b', width=2))
+        self.selected_edge = pg.PlotCurveItem(pen=pg.mkPen('g', width=4))
+        self.vertices = pg.ScatterPlotItem(size=vertex_size, brush=pg.mkBrush(vertex_brush), pen=None)
+        self.highlighted = pg.ScatterPlotItem(size=vertex_size + 6, brush=pg.mkBrush('g'), pen=None)
+        self.com_marker = pg.ScatterPlotItem(symbol='+', size=20, brush=pg.mkBrush('red'), pen=pg.mkPen('red'))
+        self.com_text = pg.TextItem(color='red', anchor=(0.5, 1.5))
+        self.stability_text = pg.TextItem(anchor=(0.5, -0.5))
+        self.labels = []
+        for k, item in enumerate([self.fill, self.edges, self.selected_edge, self.vertices, self.highlighted,
+                                  self.com_marker, self.com_text, self.stability_text]):
+            item.setZValue(z + k)
+            plot_widget.addItem(item)
+        self._z = z
+        self._edge_key = None
+        self._edge_index = np.zeros((0, 2), dtype=np.int64)
+        self.clear()
+
+    def _edge_array(self, edges):
+        # Converting the edges is the slow part; redo it only when the edge tensor changes
+        key = (id(edges), getattr(edges, '_version', None), len(edges))
+        if key != self._edge_key:
+            self._edge_index = _to_numpy(edges).astype(np.int64) if len(edges) else np.zeros((0, 2), dtype=np.int64)
+            self._edge_key = key
+        return self._edge_index
+
+    def set_shape(self, V, edges):
+        """Updates the edge curve and the vertex scatter."""
+        P = _to_numpy(V)
+        E = self._edge_array(edges)
+        if len(E) > 0 and len(P) > 0:
+            segments = P[E].reshape(-1, 2)
+            connect = np.zeros(len(segments), dtype=np.int32)
+            connect[0::2] = 1
+            self.edges.setData(segments[:, 0], segments[:, 1], connect=connect)
+        else:
+            self.edges.setData([], [])
+        self.vertices.setData(P[:, 0], P[:, 1])
+
+    def set_fill(self, points=None):
+        """Fills the closed polygon through points (or hides the fill)."""
+        if points is None or len(points) < 3:
+            self.fill.setData([], [])
+            return
+        P = _to_numpy(points)
+        if not np.allclose(P[0], P[-1]):
+            P = np.vstack([P, P[0]])
+        self.fill.setData(P[:, 0], P[:, 1])
+
+    def set_selected_edge(self, p0=None, p1=None):
+        if p0 is None:
+            self.selected_edge.setData([], [])
+        else:
+            self.selected_edge.setData([float(p0[0]), float(p1[0])], [float(p0[1]), float(p1[1])])
+
+    def set_highlighted(self, points=None):
+        if points is None or len(points) == 0:
+            self.highlighted.setData([], [])
+        else:
+            P = _to_numpy(points)
+            self.highlighted.setData(P[:, 0], P[:, 1])
+
+    def set_labels(self, V=None):
+        """Shows v1, v2, ... next to the vertices, reusing TextItems from the pool."""
+        P = _to_numpy(V) if V is not None else np.zeros((0, 2))
+        while len(self.labels) < len(P):
+            text = pg.TextItem(f"v{len(self.labels) + 1}", anchor=(0.5, 1.5), color='k')
+            text.setZValue(self._z + 10)
+            self.plot_widget.addItem(text)
+            self.labels.append(text)
+        for i, text in enumerate(self.labels):
+            if i < len(P):
+                text.setPos(float(P[i, 0]), float(P[i, 1]))
+                text.setVisible(True)
+            else:
+                text.setVisible(False)
+
+    def set_com(self, com=None, stable=None, show_coordinates=True):
+        """Moves the CoM marker; stable=None hides the stability text."""
+        if com is None:
+            self.com_marker.setData([], [])
+            self.com_text.setVisible(False)
+            self.stability_text.setVisible(False)
+            return
+        cx, cy = float(com[0]), float(com[1])
+        self.com_marker.setData([cx], [cy])
+        self.com_text.setVisible(show_coordinates)
+        if show_coordinates:
+            self.com_text.setText(f'CoM: ({cx:.2f}, {cy:.2f})')
+            self.com_text.setPos(cx, cy)
+        self.stability_text.setVisible(stable is not None)
+        if stable is not None:
+            self.stability_text.setText('Stable' if stable else 'Will fall!', color='green' if stable else 'red')
+            self.stability_text.setPos(cx, cy)
+
+    def clear(self):
+        """Hides everything without removing the items from the plot."""
+        self.edges.setData([], [])
+        self.vertices.setData([], [])
+        self.set_fill(None)
+        self.set_selected_edge(None)
+        self.set_highlighted(None)
+        self.set_labels(None)
+        self.set_com(None)
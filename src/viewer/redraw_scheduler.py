@@ -0,0 +1,150 @@
+import threading
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
+
+# One display frame at 60 Hz
+FRAME_INTERVAL_MS = 16
+
+
+class RedrawScheduler(QObject):
+    """
+    Coalesces redraw requests. request() only marks the view dirty and arms a single-shot
+    QTimer; when it fires, render() runs once for every request made since. The timer is never
+    re-armed by later requests, so a redraw happens at most FRAME_INTERVAL_MS after the first one.
+    """
+    def __init__(self, render, interval_ms=FRAME_INTERVAL_MS, parent=None):
+        super().__init__(parent)
+        self.render = render
+        self.dirty = False
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.flush)
+
+    def request(self):
+        self.dirty = True
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self):
+        """Renders now if a redraw is pending."""
+        self.timer.stop()
+        if self.dirty:
+            self.dirty = False
+            self.render()
+
+
+class OverlayWorker(QThread):
+    """
+    Computes the expensive overlays of the main plot off the UI thread: the stability of the
+    center of mass and whether the polygon is closed (for the fill). Jobs submitted while the
+    worker is busy are merged into one waiting job, newest inputs winning, so a fast drag never
+    builds a queue.
+    """
+    ready = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._condition = threading.Condition()
+        self._job = None
+        self._stopping = False
+
+    def submit(self, job: dict):
+        with self._condition:
+            if self._job is not None and self._job['shape_id'] == job['shape_id']:
+                job = {**self._job, **job}
+            self._job = job
+            self._condition.notify()
+
+    def stop(self):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self._condition:
+                while self._job is None and not self._stopping:
+                    self._condition.wait()
+                if self._stopping:
+                    return
+                job, self._job = self._job, None
+            result = {'shape_id': job['shape_id']}
+            if 'stability_key' in job:
+                # Imported on the first job, not at startup: only a loaded shape needs torch
+                import torch
+                from shape_stability import is_shape_stable
+                V = job['vertices']
+                try:
+                    is_stable, _, _, _ = is_shape_stable(V, None, com=torch.tensor(job['com'], dtype=V.dtype))
+                    is_stable = bool(is_stable)
+                except Exception:
+                    is_stable = None
+                result['stability'] = (job['stability_key'], is_stable)
+            if 'closed_key' in job:
+                # Works on the copies in the job; the Shape2D itself belongs to the UI thread
+                from shape2d import edge_pair_set, closes_index_loop
+                result['closed'] = (job['closed_key'], closes_index_loop(job['num_vertices'], edge_pair_set(job['edges'])))
+            self.ready.emit(result)
+
+
+class OverlayCache(QObject):
+    """
+    Latest overlay values of the shape on screen, keyed by their inputs. request() returns the
+    cached values at once (possibly from an older frame) and only queues a job on the worker when
+    an input changed; updated is emitted when fresher values arrive, so the view can redraw.
+    """
+    updated = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.worker = OverlayWorker()
+        self.worker.ready.connect(self._on_ready)
+        self.worker.start()
+        self.shape_id = None
+        self.stability = (None, None)  # (input key, is_stable)
+        self.closed = (None, None)  # (input key, closed)
+        self._pending = {'stability': None, 'closed': None}  # latest input keys submitted and not answered yet
+
+    @staticmethod
+    def _shape_key(shape) -> tuple:
+        V, E = shape.vertices, shape.edges
+        return (id(V), V._version, V.shape[0], id(E), len(E))
+
+    def request(self, shape, com=None, need_closed=False):
+        """(is_stable or None, closed or None) for the shape on screen; None means not known yet."""
+        if id(shape) != self.shape_id:
+            self.shape_id = id(shape)
+            self.stability = self.closed = (None, None)
+            self._pending = {'stability': None, 'closed': None}
+        job = {'shape_id': id(shape)}
+        shape_key = self._shape_key(shape)
+        if com is not None:
+            stability_key = shape_key + (float(com[0]), float(com[1]))
+            if stability_key != self.stability[0] and stability_key != self._pending['stability']:
+                job.update(vertices=shape.vertices.detach().clone(), com=(float(com[0]), float(com[1])),
+                           stability_key=stability_key)
+                self._pending['stability'] = stability_key
+        if need_closed:
+            closed_key = (id(shape.edges), shape.edges._version, shape.vertices.shape[0])
+            if closed_key != self.closed[0] and closed_key != self._pending['closed']:
+                job.update(closed_key=closed_key, num_vertices=shape.vertices.shape[0], edges=shape.edges.clone())
+                self._pending['closed'] = closed_key
+        if len(job) > 1:
+            self.worker.submit(job)
+        return (self.stability[1] if com is not None else None), (self.closed[1] if need_closed else None)
+
+    def _on_ready(self, result):
+        if result['shape_id'] != self.shape_id:
+            return
+        for name in ('stability', 'closed'):
+            if name in result:
+                # Results of superseded inputs are still the freshest values available
+                key, value = result[name]
+                setattr(self, name, (key, value))
+                if self._pending[name] == key:
+                    self._pending[name] = None
+        self.updated.emit()
+
+    def stop(self):
+        self.worker.stop()
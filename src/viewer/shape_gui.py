@@ -1,22 +1,17 @@
 import sys
 import os
+import importlib
 from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QTabWidget
 from PyQt5.QtGui import QIcon
 import pyqtgraph as pg
-from PyQt5.QtCore import Qt
-from shape2d import Shape2D
-from .tab_visualize import VisualizeTab
-from .tab_process import ProcessTab
-from .tab_new import NewTab
-from .tab_edit import EditTab
-from .tab_compare import CompareTab
+from PyQt5.QtCore import Qt, QTimer
+from shape_binary import SHAPE_FILE_FILTER
 from PyQt5.QtGui import QPolygonF, QBrush, QColor
 from PyQt5.QtCore import QPointF
-from shape_processing import scale_shape
-from shape_mass_center import calculate_center_of_mass
-import torch
-from .tab_optimization import OptimizationTab
 from .custom_viewbox import CustomViewBox
+from .plot_items import ShapePlotItems
+from .redraw_scheduler import RedrawScheduler, OverlayCache
+from .catalog_watcher import CatalogWatcher
 
 class DataPolygonItem(pg.GraphicsObject):
     def __init__(self, vertices, viewbox, *args, **kwargs):
@@ -48,6 +43,16 @@ class DataPolygonItem(pg.GraphicsObject):
 
 class ShapeGUI(QWidget):
     SHAPES_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'shapes')
+    # (title, module, class, attribute) in display order. Only Visualize is built at startup; the other
+    # tabs (and the torch-heavy modules they import) are loaded on first activation, see ensure_tab().
+    TABS = (
+        ('Visualize', '.tab_visualize', 'VisualizeTab', 'visualize_tab'),
+        ('Process', '.tab_process', 'ProcessTab', 'process_tab'),
+        ('New', '.tab_new', 'NewTab', 'new_tab'),
+        ('Edit', '.tab_edit', 'EditTab', 'edit_tab'),
+        ('Compare', '.tab_compare', 'CompareTab', 'compare_tab'),
+        ('Optimization', '.tab_optimization', 'OptimizationTab', 'optimization_tab'),
+    )
 
     def __init__(self):
         super().__init__()
@@ -62,23 +67,25 @@ class ShapeGUI(QWidget):
         self._last_tab_index = 0
         self.current_shape_path = None  # Track the current file path
         self._previous_shape = None  # Store previous shape for New tab
+        self._plot_items = {}  # tab -> ShapePlotItems, reused across redraws
+        # update_plot() only marks the plot dirty; render_plot() runs at most once per frame
+        self.redraw = RedrawScheduler(self.render_plot, parent=self)
+        self.overlays = OverlayCache(self)
+        self.overlays.updated.connect(self.update_plot)
+        # Metadata of the files in SHAPES_DIR for the dropdowns, kept current by a filesystem watcher
+        self.catalog_watcher = CatalogWatcher(self.SHAPES_DIR, self)
+        self.shape_catalog = self.catalog_watcher.catalog
+        self.catalog_watcher.changed.connect(self.on_catalog_changed)
         self.init_ui()
 
     def init_ui(self):
         main_layout = QVBoxLayout()
         self.tabs = QTabWidget()
-        self.visualize_tab = VisualizeTab(self)
-        self.process_tab = ProcessTab(self)
-        self.new_tab = NewTab(self)
-        self.edit_tab = EditTab(self)
-        self.compare_tab = CompareTab(self)
-        self.optimization_tab = OptimizationTab(self)
-        self.tabs.addTab(self.visualize_tab, 'Visualize')
-        self.tabs.addTab(self.process_tab, 'Process')
-        self.tabs.addTab(self.new_tab, 'New')
-        self.tabs.addTab(self.edit_tab, 'Edit')
-        self.tabs.addTab(self.compare_tab, 'Compare')
-        self.tabs.addTab(self.optimization_tab, 'Optimization')
+        # Empty placeholders until each tab is first shown; the tab attributes stay None until then
+        for title, _, _, attr in self.TABS:
+            setattr(self, attr, None)
+            self.tabs.addTab(QWidget(), title)
+        self.ensure_tab(0)
         self.tabs.currentChanged.connect(self.on_tab_changed)
         main_layout.addWidget(self.tabs)
         # Remove global plot_widget from here
@@ -88,30 +95,74 @@ class ShapeGUI(QWidget):
         main_layout.setContentsMargins(8, 8, 8, 8)
         main_layout.setSpacing(8)
 
+    def ensure_tab(self, index):
+        """Imports and constructs the tab at index if it is still a placeholder, and returns it."""
+        title, module, class_name, attr = self.TABS[index]
+        tab = getattr(self, attr)
+        if tab is None:
+            tab = getattr(importlib.import_module(module, __package__), class_name)(self)
+            setattr(self, attr, tab)
+            placeholder = self.tabs.widget(index)
+            current = self.tabs.currentIndex()
+            self.tabs.blockSignals(True)
+            self.tabs.removeTab(index)
+            self.tabs.insertTab(index, tab, title)
+            self.tabs.setCurrentIndex(current)
+            self.tabs.blockSignals(False)
+            placeholder.deleteLater()
+        return tab
+
     def showEvent(self, event):
         self.visualize_tab.refresh_shape_dropdown()
-        self.compare_tab.refresh_shape_dropdowns()
+        if self.compare_tab is not None:
+            self.compare_tab.refresh_shape_dropdowns()
+        # Load the first shape and refresh the catalog (both import torch) once the window is on screen
+        QTimer.singleShot(0, self.load_first_shape)
+        QTimer.singleShot(0, self.catalog_watcher.start)
+        super().showEvent(event)
+
+    def load_first_shape(self):
         # Automatically select and load the first shape if available
-        if self.visualize_tab.shape_dropdown.count() > 1:
+        if self.shape is None and self.visualize_tab.shape_dropdown.count() > 1:
             self.visualize_tab.shape_dropdown.setCurrentIndex(1)
             self.visualize_tab.on_dropdown_change(1)
-        super().showEvent(event)
+
+    def on_catalog_changed(self):
+        self.visualize_tab.refresh_shape_dropdown()
+        if self.compare_tab is not None:
+            self.compare_tab.refresh_shape_dropdowns()
+        # On a first run the catalog may only fill in after the window is shown
+        if self.isVisible():
+            self.load_first_shape()
+
+    def closeEvent(self, event):
+        # Stop a running optimization before its QThread is destroyed with the window
+        worker = self.optimization_tab.worker if self.optimization_tab is not None else None
+        if worker is not None and worker.isRunning():
+            worker.cancel()
+            worker.wait()
+        self.overlays.stop()
+        self.catalog_watcher.stop()
+        super().closeEvent(event)
 
     def load_shape_from_path(self, path):
-        self.shape = Shape2D.load_from_json(path)
+        from shape2d import Shape2D
+        self.shape = Shape2D.load(path)
         self.current_shape_path = path
         self.drawing_shape = None
         self.selected_vertices = []
         self.draw_mode = False
         self.add_edge_mode = False
-        self.new_tab.draw_mode_btn.setChecked(False)
-        self.new_tab.add_edge_mode_btn.setChecked(False)
+        if self.new_tab is not None:
+            self.new_tab.draw_mode_btn.setChecked(False)
+            self.new_tab.add_edge_mode_btn.setChecked(False)
         self.update_plot()
-        self.edit_tab.update_save_button()
+        if self.edit_tab is not None:
+            self.edit_tab.update_save_button()
 
     def load_shape_dialog(self):
         from PyQt5.QtWidgets import QFileDialog
-        path, _ = QFileDialog.getOpenFileName(self, 'Open Shape JSON', '', 'JSON Files (*.json)')
+        path, _ = QFileDialog.getOpenFileName(self, 'Open Shape', '', SHAPE_FILE_FILTER)
         if path:
             self.load_shape_from_path(path)
             self.visualize_tab.refresh_shape_dropdown()
@@ -122,20 +173,21 @@ class ShapeGUI(QWidget):
         shape_to_save = self.drawing_shape if in_new_tab else self.shape
         if shape_to_save is None or len(shape_to_save.vertices) == 0:
             return
-        path, _ = QFileDialog.getSaveFileName(self, 'Save Shape JSON', self.SHAPES_DIR, 'JSON Files (*.json)')
+        path, _ = QFileDialog.getSaveFileName(self, 'Save Shape', self.SHAPES_DIR, SHAPE_FILE_FILTER)
         if path:
-            shape_to_save.save_to_json(path)
+            shape_to_save.save(path)
             self.current_shape_path = path
             self.visualize_tab.refresh_shape_dropdown()
             if self.visualize_tab.shape_dropdown.count() > 1 and self.visualize_tab.shape_dropdown.currentIndex() == 0:
                 self.visualize_tab.shape_dropdown.setCurrentIndex(1)
                 self.visualize_tab.on_dropdown_change(1)
-            self.edit_tab.update_save_button()
+            if self.edit_tab is not None:
+                self.edit_tab.update_save_button()
 
     def save_current_shape(self):
         # Overwrite the currently loaded file
         if self.current_shape_path and self.shape and len(self.shape.vertices) > 0:
-            self.shape.save_to_json(self.current_shape_path)
+            self.shape.save(self.current_shape_path)
             self.visualize_tab.refresh_shape_dropdown()
 
     def toggle_draw_mode(self):
@@ -145,6 +197,7 @@ class ShapeGUI(QWidget):
             self.add_edge_mode = False
             self.new_tab.add_edge_mode_btn.setChecked(False)
             if self.drawing_shape is None:
+                from shape2d import Shape2D
                 self.drawing_shape = Shape2D()
             self.selected_vertices = []
         else:
@@ -159,6 +212,7 @@ class ShapeGUI(QWidget):
             self.draw_mode = False
             self.new_tab.draw_mode_btn.setChecked(False)
             if self.drawing_shape is None:
+                from shape2d import Shape2D
                 self.drawing_shape = Shape2D()
             self.selected_vertices = []
         else:
@@ -167,8 +221,10 @@ class ShapeGUI(QWidget):
         self.new_tab.add_edge_mode_btn.setChecked(self.add_edge_mode)
 
     def on_tab_changed(self, idx):
+        self.ensure_tab(idx)
         tab_name = self.tabs.tabText(idx)
         if tab_name == 'New':
+            from shape2d import Shape2D
             self._previous_shape = self.shape  # Save the current shape before hiding
             self.drawing_shape = Shape2D()
             self.selected_vertices = []
@@ -204,57 +260,36 @@ class ShapeGUI(QWidget):
         shape = self.drawing_shape if in_new_tab else self.shape
         if self.draw_mode and in_new_tab:
             if self.drawing_shape is None:
+                from shape2d import Shape2D
                 self.drawing_shape = Shape2D()
             # Snap to y=0 if close
             snap_threshold = 0.05
             if abs(y) < snap_threshold:
                 y = 0.0
-            new_vertex = torch.tensor([[x, y]], dtype=self.drawing_shape.vertices.dtype)
-            self.drawing_shape.vertices = torch.cat([self.drawing_shape.vertices, new_vertex], dim=0)
+            self.drawing_shape.add_vertex(x, y)
             self.update_plot()
             return
         elif self.add_edge_mode and in_new_tab and shape is not None:
             if len(shape.vertices) == 0:
                 return
-            min_dist = float('inf')
-            min_idx = -1
-            for i, (vx, vy) in enumerate(shape.vertices):
-                dist = (vx - x) ** 2 + (vy - y) ** 2
-                if dist < min_dist:
-                    min_dist = dist
-                    min_idx = i
+            # Grid lookup (spatial_index.py) instead of a scan over every vertex
+            min_idx, min_dist = shape.spatial_index.nearest_vertex(x, y, max_dist=0.5)
             if min_dist < 0.25:
                 if min_idx not in self.selected_vertices:
                     self.selected_vertices.append(min_idx)
                 if len(self.selected_vertices) == 2:
                     v0, v1 = self.selected_vertices
-                    if v0 != v1 and (v0, v1) not in shape.edges and (v1, v0) not in shape.edges:
-                        shape.edges.append((v0, v1))
+                    if v0 != v1 and not shape.has_edge(v0, v1):
+                        shape.add_edge(v0, v1)
                     self.selected_vertices = []
                 self.update_plot()
         elif in_edit_tab and shape is not None:
             # Select a vertex or edge for dragging or editing
-            min_dist = float('inf')
-            min_idx = -1
-            for i, (vx, vy) in enumerate(shape.vertices):
-                dist = (vx - x) ** 2 + (vy - y) ** 2
-                if dist < min_dist:
-                    min_dist = dist
-                    min_idx = i
-            # Edge selection logic
+            index = shape.spatial_index
+            min_idx, min_dist = index.nearest_vertex(x, y, max_dist=0.5)
+            # Edge selection logic: edges are picked by their midpoint
             edge_threshold = 0.15
-            closest_edge = None
-            closest_edge_dist = float('inf')
-            for edge in shape.edges:
-                i, j = edge
-                v0 = shape.vertices[i]
-                v1 = shape.vertices[j]
-                mx = (v0[0] + v1[0]) / 2
-                my = (v0[1] + v1[1]) / 2
-                dist = (mx - x) ** 2 + (my - y) ** 2
-                if dist < closest_edge_dist:
-                    closest_edge_dist = dist
-                    closest_edge = edge
+            closest_edge, closest_edge_dist = index.nearest_edge_midpoint(x, y, max_dist=edge_threshold ** 0.5)
             # Prefer edge if closer to edge than to any vertex
             if closest_edge is not None and closest_edge_dist < edge_threshold and closest_edge_dist < min_dist:
                 self.selected_vertex = None
@@ -272,41 +307,41 @@ class ShapeGUI(QWidget):
             self._dragging_vertex = False  # End dragging on click
         elif not in_new_tab:
             if self.draw_mode:
-                new_vertex = torch.tensor([[x, y]], dtype=self.drawing_shape.vertices.dtype)
-                self.drawing_shape.vertices = torch.cat([self.drawing_shape.vertices, new_vertex], dim=0)
+                self.drawing_shape.add_vertex(x, y)
                 self.update_plot()
             elif self.add_edge_mode and self.shape is not None:
                 if len(self.shape.vertices) == 0:
                     return
-                min_dist = float('inf')
-                min_idx = -1
-                for i, (vx, vy) in enumerate(self.shape.vertices):
-                    dist = (vx - x) ** 2 + (vy - y) ** 2
-                    if dist < min_dist:
-                        min_dist = dist
-                        min_idx = i
+                min_idx, min_dist = self.shape.spatial_index.nearest_vertex(x, y, max_dist=0.1 ** 0.5)
                 if min_dist < 0.1:
                     if min_idx not in self.selected_vertices:
                         self.selected_vertices.append(min_idx)
                     if len(self.selected_vertices) == 2:
                         v0, v1 = self.selected_vertices
-                        if v0 != v1 and (v0, v1) not in self.shape.edges and (v1, v0) not in self.shape.edges:
-                            self.shape.edges.append((v0, v1))
+                        if v0 != v1 and not self.shape.has_edge(v0, v1):
+                            self.shape.add_edge(v0, v1)
                         self.selected_vertices = []
                     self.update_plot()
 
+    def plot_items_for(self, tab):
+        """The long-lived ShapePlotItems of a tab's plot widget, created on first use."""
+        items = self._plot_items.get(tab)
+        if items is None:
+            items = ShapePlotItems(tab.plot_widget)
+            self._plot_items[tab] = items
+        return items
+
     def update_plot(self):
+        """Schedules a redraw of the current tab's plot; any number of calls within a frame render once."""
+        self.redraw.request()
+
+    def render_plot(self):
         # Use the plot_widget from the currently active tab
         current_tab = self.tabs.currentWidget()
         plot_widget = getattr(current_tab, 'plot_widget', None)
         if plot_widget is None:
             return
-        plot_widget.clear()
-        # For New tab, always show grid and y=0 line
-        if self.tabs.tabText(self.tabs.currentIndex()) == 'New':
-            plot_widget.showGrid(x=True, y=True, alpha=0.3)
-            y0_line = pg.InfiniteLine(pos=0, angle=0, pen=pg.mkPen('orange', width=2))
-            plot_widget.addItem(y0_line)
+        items = self.plot_items_for(current_tab)
         show_grid = False
         show_com = True
         if hasattr(self, 'visualize_tab'):
@@ -314,90 +349,47 @@ class ShapeGUI(QWidget):
             show_com = getattr(self.visualize_tab, 'com_checkbox', None)
             show_grid = show_grid.isChecked() if show_grid else False
             show_com = show_com.isChecked() if show_com else True
-        plot_widget.showGrid(x=show_grid, y=show_grid, alpha=0.3 if show_grid else 0)
+        # The New tab always shows its grid (and its y=0 line, which lives on the plot permanently)
         if self.tabs.tabText(self.tabs.currentIndex()) == 'New':
+            plot_widget.showGrid(x=True, y=True, alpha=0.3)
             shape = self.drawing_shape
         else:
+            plot_widget.showGrid(x=show_grid, y=show_grid, alpha=0.3 if show_grid else 0)
             shape = self.shape
         if shape is None or len(shape.vertices) == 0:
-            self.new_tab.update_info()
+            items.clear()
+            if self.new_tab is not None:
+                self.new_tab.update_info()
             return
+        items.set_shape(shape.vertices, shape.edges)
         fill_shape = False
         if hasattr(self, 'visualize_tab'):
             fill_shape = getattr(self.visualize_tab, 'fill_checkbox', None)
             fill_shape = fill_shape.isChecked() if fill_shape else False
-        if fill_shape and len(shape.vertices) >= 3:
-            closed = all((i, (i+1)%len(shape.vertices)) in shape.edges or ((i+1)%len(shape.vertices), i) in shape.edges for i in range(len(shape.vertices)))
-            if closed:
-                import numpy as np
-                pts = np.array(shape.vertices)
-                if not np.allclose(pts[0], pts[-1]):
-                    pts = np.vstack([pts, pts[0]])
-                x = pts[:, 0]
-                y = pts[:, 1]
-                plot_widget.plot(x, y, pen=pg.mkPen('blue', width=2), fillLevel=0, fillBrush=pg.mkBrush('lightblue', alpha=80))
+        need_fill = fill_shape and len(shape.vertices) >= 3
+        # Running totals of the shape's moment accumulator: O(1) per dragged vertex
+        com = shape.moments.area_and_center_of_mass()[1] if show_com else None
+        # Stability and the closed-polygon check run on the overlay worker, only when their inputs change;
+        # until they arrive the previous values are shown
+        is_stable, closed = self.overlays.request(shape, com, need_closed=need_fill)
+        items.set_fill(shape.vertices if need_fill and closed else None)
         # Highlight selected edge if in Edit tab
         if self.tabs.tabText(self.tabs.currentIndex()) == 'Edit' and hasattr(self.edit_tab, 'selected_edge') and self.edit_tab.selected_edge is not None:
             i, j = self.edit_tab.selected_edge
-            v0 = shape.vertices[i]
-            v1 = shape.vertices[j]
-            plot_widget.plot([v0[0], v1[0]], [v0[1], v1[1]], pen=pg.mkPen('g', width=4))
-        for edge in shape.edges:
-            v0 = shape.vertices[edge[0]]
-            v1 = shape.vertices[edge[1]]
-            plot_widget.plot([v0[0], v1[0]], [v0[1], v1[1]], pen=pg.mkPen('b', width=2))
-        xs, ys = zip(*shape.vertices)
-        plot_widget.plot(xs, ys, pen=None, symbol='o', symbolBrush='r', symbolSize=12)
+            items.set_selected_edge(shape.vertices[i], shape.vertices[j])
+        else:
+            items.set_selected_edge(None)
         show_labels = False
         if hasattr(self, 'visualize_tab'):
             show_labels = getattr(self.visualize_tab, 'label_checkbox', None)
             show_labels = show_labels.isChecked() if show_labels else False
-        if show_labels:
-            for i, (x, y) in enumerate(shape.vertices):
-                label = f"v{i+1}"
-                text = pg.TextItem(label, anchor=(0.5, 1.5), color='k')
-                # Ensure x, y are floats (not torch tensors)
-                x = float(x.item()) if hasattr(x, 'item') else float(x)
-                y = float(y.item()) if hasattr(y, 'item') else float(y)
-                text.setPos(x, y)
-                plot_widget.addItem(text)
-        if show_com:
-            area, center_of_mass = calculate_center_of_mass(shape)
-            if center_of_mass is not None:
-                cx, cy = center_of_mass.tolist()
-                cx = float(cx)
-                cy = float(cy)
-                plot_widget.plot([cx], [cy], pen=None, symbol='+', symbolBrush='red', symbolPen='red', symbolSize=20)
-                text = pg.TextItem(text=f'CoM: ({cx:.2f}, {cy:.2f})', color='red', anchor=(0.5, 1.5))
-                text.setPos(cx, cy)
-                plot_widget.addItem(text)
-                # --- Stability check ---
-                try:
-                    from shape_stability import is_shape_stable
-                    vertices_tensor = shape.vertices
-                    if not isinstance(vertices_tensor, torch.Tensor):
-                        vertices_tensor = torch.tensor(vertices_tensor, dtype=torch.float32)
-                    else:
-                        vertices_tensor = vertices_tensor.clone().detach().to(dtype=torch.float32)
-                    is_stable, x_cm, x_left, x_right = is_shape_stable(vertices_tensor, shape.edges)
-                    if is_stable:
-                        stability_text = pg.TextItem(text='Stable', color='green', anchor=(0.5, -0.5))
-                    else:
-                        stability_text = pg.TextItem(text='Will fall!', color='red', anchor=(0.5, -0.5))
-                    stability_text.setPos(cx, cy)
-                    plot_widget.addItem(stability_text)
-                except Exception as e:
-                    pass
+        items.set_labels(shape.vertices if show_labels else None)
+        items.set_com(com, is_stable)
+        highlighted = []
         if self.add_edge_mode and self.selected_vertices:
-            sel_xs = [shape.vertices[i][0] for i in self.selected_vertices]
-            sel_ys = [shape.vertices[i][1] for i in self.selected_vertices]
-            plot_widget.plot(sel_xs, sel_ys, pen=None, symbol='o', symbolBrush='g', symbolSize=16)
+            highlighted = [shape.vertices[i] for i in self.selected_vertices]
         if self.tabs.tabText(self.tabs.currentIndex()) == 'Edit' and self.selected_vertex is not None:
-            vx, vy = shape.vertices[self.selected_vertex]
-            # Ensure vx, vy are floats
-            if hasattr(vx, 'item'):
-                vx = float(vx.item())
-            if hasattr(vy, 'item'):
-                vy = float(vy.item())
-            plot_widget.plot([vx], [vy], pen=None, symbol='o', symbolBrush='g', symbolSize=18)
-        self.new_tab.update_info()
\ No newline at end of file
+            highlighted.append(shape.vertices[self.selected_vertex])
+        items.set_highlighted([[float(x), float(y)] for x, y in highlighted])
+        if self.new_tab is not None:
+            self.new_tab.update_info()
@@ -1,7 +1,9 @@
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QComboBox
 import pyqtgraph as pg
 from .custom_viewbox import CustomViewBox
+from .plot_items import ShapePlotItems
 from shape2d import Shape2D
+from .catalog_watcher import fill_shape_dropdown
 from shape_similarity import calculate_shape_similarity
 import os
 
@@ -45,50 +47,34 @@ class CompareTab(QWidget):
         self.plot_widget.setMinimumHeight(600)
         self.plot_widget.setMinimumWidth(900)
         self.plot_widget.scene().sigMouseClicked.connect(self.main_window.on_plot_click)
+        self.plot_widget.showGrid(x=True, y=True, alpha=0.3)
+        # Shape 1 in blue, shape 2 in dashed red; both item sets live as long as the tab
+        self.shape1_items = ShapePlotItems(self.plot_widget, pg.mkPen('b', width=2), vertex_brush='b', vertex_size=10)
+        self.shape2_items = ShapePlotItems(self.plot_widget, pg.mkPen('r', width=2, style=pg.QtCore.Qt.DashLine),
+                                           vertex_brush='r', vertex_size=10, z=20)
         layout.addWidget(self.plot_widget, stretch=1)
         self.setLayout(layout)
         self.refresh_shape_dropdowns()
         self.update_plot()
 
     def update_plot(self):
-        self.plot_widget.clear()
-        # Draw shape1 in blue
-        if self.shape1 is not None and len(self.shape1.vertices) > 0:
-            for edge in self.shape1.edges:
-                v0 = self.shape1.vertices[edge[0]]
-                v1 = self.shape1.vertices[edge[1]]
-                self.plot_widget.plot([v0[0], v1[0]], [v0[1], v1[1]], pen=pg.mkPen('b', width=2))
-            xs, ys = zip(*self.shape1.vertices)
-            self.plot_widget.plot(xs, ys, pen=None, symbol='o', symbolBrush='b', symbolSize=10)
-        # Draw shape2 in red
-        if self.shape2 is not None and len(self.shape2.vertices) > 0:
-            for edge in self.shape2.edges:
-                v0 = self.shape2.vertices[edge[0]]
-                v1 = self.shape2.vertices[edge[1]]
-                self.plot_widget.plot([v0[0], v1[0]], [v0[1], v1[1]], pen=pg.mkPen('r', width=2, style=pg.QtCore.Qt.DashLine))
-            xs, ys = zip(*self.shape2.vertices)
-            self.plot_widget.plot(xs, ys, pen=None, symbol='o', symbolBrush='r', symbolSize=10)
-        self.plot_widget.showGrid(x=True, y=True, alpha=0.3)
+        for shape, items in ((self.shape1, self.shape1_items), (self.shape2, self.shape2_items)):
+            if shape is not None and len(shape.vertices) > 0:
+                items.set_shape(shape.vertices, shape.edges)
+            else:
+                items.clear()
 
     def refresh_shape_dropdowns(self):
-        SHAPES_DIR = self.main_window.SHAPES_DIR
-        # Shape 1
-        self.shape1_dropdown.blockSignals(True)
-        self.shape1_dropdown.clear()
-        self.shape1_dropdown.addItem('Select shape 1...')
-        # Shape 2
-        self.shape2_dropdown.blockSignals(True)
-        self.shape2_dropdown.clear()
-        self.shape2_dropdown.addItem('Select shape 2...')
-        if os.path.isdir(SHAPES_DIR):
-            for fname in sorted(os.listdir(SHAPES_DIR)):
-                if fname.endswith('.json'):
-                    self.shape1_dropdown.addItem(fname)
-                    self.shape2_dropdown.addItem(fname)
-        self.shape1_dropdown.blockSignals(False)
-        self.shape2_dropdown.blockSignals(False)
-        self.shape1 = None
-        self.shape2 = None
+        # Listed from the shape catalog; a selected shape stays loaded while its file is still listed
+        catalog = self.main_window.shape_catalog
+        kept1 = fill_shape_dropdown(self.shape1_dropdown, 'Select shape 1...', catalog)
+        kept2 = fill_shape_dropdown(self.shape2_dropdown, 'Select shape 2...', catalog)
+        if kept1 and kept2:
+            return
+        if not kept1:
+            self.shape1 = None
+        if not kept2:
+            self.shape2 = None
         self.result_label.setText('Similarity: -')
         self.update_plot()
 
@@ -97,10 +83,10 @@ class CompareTab(QWidget):
             self.shape1 = None
             self.update_plot()
             return
-        fname = self.shape1_dropdown.currentText()
+        fname = self.shape1_dropdown.itemData(idx)
         path = os.path.join(self.main_window.SHAPES_DIR, fname)
         if os.path.isfile(path):
-            self.shape1 = Shape2D.load_from_json(path)
+            self.shape1 = Shape2D.load(path)
             self.result_label.setText('Similarity: -')
             self.update_plot()
 
@@ -109,10 +95,10 @@ class CompareTab(QWidget):
             self.shape2 = None
             self.update_plot()
             return
-        fname = self.shape2_dropdown.currentText()
+        fname = self.shape2_dropdown.itemData(idx)
         path = os.path.join(self.main_window.SHAPES_DIR, fname)
         if os.path.isfile(path):
-            self.shape2 = Shape2D.load_from_json(path)
+            self.shape2 = Shape2D.load(path)
             self.result_label.setText('Similarity: -')
             self.update_plot()
 
@@ -62,7 +62,8 @@ class NewTab(QWidget):
         self.main_window.drawing_shape = None
         self.main_window.shape = None
         self.main_window.selected_vertices = []
-        self.plot_widget.clear()
+        # Hide the shape but keep the plot items (and the y=0 line) for the next drawing
+        self.main_window.plot_items_for(self).clear()
         vb = self.plot_widget.getViewBox()
         vb.setRange(xRange=[-1, 1], yRange=[-1, 1], padding=0.1)
         self.update_info() 
\ No newline at end of file
@@ -1,16 +1,26 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QPushButton, QLabel, QHBoxLayout, QSpinBox
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QPushButton, QLabel, QHBoxLayout, QSpinBox, QComboBox, QCheckBox
+from PyQt5.QtCore import Qt
 import pyqtgraph as pg
 import torch
 from shape2d import Shape2D
-from optimization import total_loss, gradient_descent
+from shape_binary import SHAPE_FILE_FILTER
+from optimization import carved_center_of_mass
+from constants import WALL_THICKNESS
+from optimizers import available_optimizers
+from shape_mass_center import calculate_center_of_mass
+from shape_stability import is_shape_stable
+from .plot_items import ShapePlotItems
+from .optimization_worker import OptimizationWorker
 
 class OptimizationTab(QWidget):
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
         self.last_optimized_vertices = None  # Store last optimized result
+        self.last_cut = None  # (b, c) of the carving line from the last joint optimization
+        self.worker = None  # OptimizationWorker of the running (or last) optimization
+        self.worker_shape = None  # Shape being optimized, for the live After plot
         self.init_ui()
-        self.plot_current_shape()  # Show the current shape on tab open
 
     def init_ui(self):
         layout = QVBoxLayout()
@@ -25,6 +35,17 @@ class OptimizationTab(QWidget):
         self.iter_spinbox.setValue(1000)
         iter_layout.addWidget(iter_label)
         iter_layout.addWidget(self.iter_spinbox)
+        # Optimizer choice (fixed-step gradient descent, L-BFGS, damped Newton)
+        method_label = QLabel("Method:")
+        self.method_combo = QComboBox()
+        self.method_combo.addItems(available_optimizers())
+        self.method_combo.currentTextChanged.connect(self.on_method_change)
+        iter_layout.addWidget(method_label)
+        iter_layout.addWidget(self.method_combo)
+        # Joint optimization of the vertices and a carving line y = b x + c
+        self.carve_checkbox = QCheckBox("Carve (optimize cut line)")
+        self.carve_checkbox.stateChanged.connect(self.on_carve_toggle)
+        iter_layout.addWidget(self.carve_checkbox)
         layout.addLayout(iter_layout)
         # Add Reset button
         self.reset_btn = QPushButton("Reset to Original Shape")
@@ -32,7 +53,14 @@ class OptimizationTab(QWidget):
         layout.addWidget(self.reset_btn)
         self.run_btn = QPushButton("Run Optimizer on Current Shape")
         self.run_btn.clicked.connect(self.run_optimization)
-        layout.addWidget(self.run_btn)
+        # Stops a running optimization at its next check, keeping the best iterate so far
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.clicked.connect(self.cancel_optimization)
+        self.cancel_btn.setEnabled(False)
+        run_layout = QHBoxLayout()
+        run_layout.addWidget(self.run_btn, stretch=1)
+        run_layout.addWidget(self.cancel_btn)
+        layout.addLayout(run_layout)
         plot_layout = QHBoxLayout()
         self.before_plot = pg.PlotWidget()
         self.after_plot = pg.PlotWidget()
@@ -46,6 +74,12 @@ class OptimizationTab(QWidget):
         # Show grid on both plots
         self.before_plot.showGrid(x=True, y=True, alpha=0.3)
         self.after_plot.showGrid(x=True, y=True, alpha=0.3)
+        # Long-lived plot items; redraws only push new data into them
+        self.before_items = ShapePlotItems(self.before_plot, vertex_size=10)
+        self.after_items = ShapePlotItems(self.after_plot, pg.mkPen('g', width=2), vertex_size=10)
+        self.cut_line = pg.PlotCurveItem(pen=pg.mkPen('m', width=2, style=Qt.DashLine))
+        self.after_plot.addItem(self.cut_line)
+        self.before_plot.setTitle("Before Optimization")
         plot_layout.addWidget(self.before_plot, stretch=1)
         plot_layout.addWidget(self.after_plot, stretch=1)
         layout.addLayout(plot_layout)
@@ -58,50 +92,64 @@ class OptimizationTab(QWidget):
         
         self.setLayout(layout)
 
+    def on_method_change(self, method):
+        # Second-order methods converge in far fewer iterations
+        self.iter_spinbox.setValue(1000 if method == 'gradient_descent' else 100)
+
+    def on_carve_toggle(self, state):
+        # The joint mode always runs gradient_descent.py, so the method choice does not apply
+        carving = state == Qt.Checked
+        self.method_combo.setEnabled(not carving)
+        if carving:
+            self.iter_spinbox.setValue(1000)
+
     def plot_current_shape(self, use_last_optimized=False):
         shape = self.main_window.shape
-        self.before_plot.clear()
-        self.before_plot.showGrid(x=True, y=True, alpha=0.3)
         if shape is None:
-            self.before_plot.setTitle("Before Optimization")
+            self.before_items.clear()
             return
         if use_last_optimized and self.last_optimized_vertices is not None:
             V = self.last_optimized_vertices
         else:
             V = shape.vertices
-        E = shape.edges
+        E = shape.topology
         if V is None or len(V) < 2:
-            self.before_plot.setTitle("Before Optimization")
+            self.before_items.clear()
             return
-        # Plot edges
-        for i, j in E:
-            self.before_plot.plot(
-                [V[i, 0].item(), V[j, 0].item()],
-                [V[i, 1].item(), V[j, 1].item()],
-                pen=pg.mkPen('b', width=2)
-            )
-        self.before_plot.plot(V[:,0].cpu().numpy(), V[:,1].cpu().numpy(), pen=None, symbol='o', symbolBrush='r', symbolSize=10)
-        self.before_plot.setTitle("Before Optimization")
+        self.before_items.set_shape(V, shape.edges)
         # Center of Mass and Stability
         try:
-            from shape_mass_center import calculate_center_of_mass
-            from shape_stability import is_shape_stable
-            E_tensor = torch.tensor(E, dtype=torch.long, device=V.device)
-            area_b, com_b = calculate_center_of_mass(V, E_tensor)
-            cx_b, cy_b = float(com_b[0].item()), float(com_b[1].item())
-            self.before_plot.plot([cx_b], [cy_b], pen=None, symbol='+', symbolBrush='red', symbolPen='red', symbolSize=20)
-            is_stable_b, _, _, _ = is_shape_stable(V, E_tensor)
-            if is_stable_b:
-                stability_text_b = pg.TextItem(text='Stable', color='green', anchor=(0.5, -0.5))
+            area_b, com_b = calculate_center_of_mass(V, E)
+            is_stable_b, _, _, _ = is_shape_stable(V, E, com=com_b)
+            self.before_items.set_com(com_b.tolist(), is_stable_b, show_coordinates=False)
+        except Exception as e:
+            self.before_items.set_com(None)
+
+    def plot_optimized_shape(self, V_opt, shape, cut=None):
+        """Shows the optimized vertices V_opt of shape (and the line y = b x + c if cut = (b, c)) on the After plot."""
+        self.after_items.set_shape(V_opt, shape.edges)
+        E = shape.topology
+        self.after_plot.setTitle("After Optimization")
+        try:
+            if cut is not None:
+                # Carved shape: draw the cut line and use the carved center of mass
+                b, c = cut
+                x_min, x_max = V_opt[:, 0].min().item(), V_opt[:, 0].max().item()
+                self.cut_line.setData([x_min, x_max], [b.item() * x_min + c.item(), b.item() * x_max + c.item()])
+                with torch.no_grad():
+                    area_a, com_a = carved_center_of_mass(V_opt, E, b, c, WALL_THICKNESS)
             else:
-                stability_text_b = pg.TextItem(text='Will fall!', color='red', anchor=(0.5, -0.5))
-            stability_text_b.setPos(cx_b, cy_b)
-            self.before_plot.addItem(stability_text_b)
+                self.cut_line.setData([], [])
+                area_a, com_a = calculate_center_of_mass(V_opt, E)
+            is_stable_a, _, _, _ = is_shape_stable(V_opt, E, com=com_a)
+            self.after_items.set_com(com_a.tolist(), is_stable_a, show_coordinates=False)
         except Exception as e:
-            pass
+            self.after_items.set_com(None)
 
     def run_optimization(self):
         shape = self.main_window.shape
+        if self.worker is not None and self.worker.isRunning():
+            return
         # Use last optimized vertices if available, else use original
         if self.last_optimized_vertices is not None:
             V_og = self.last_optimized_vertices
@@ -110,65 +158,79 @@ class OptimizationTab(QWidget):
         if V_og is None or len(V_og) < 3 or len(shape.edges) < 3:
             self.info_label.setText("No valid shape loaded.")
             return
-        E = torch.tensor(shape.edges, dtype=torch.long, device=V_og.device)
-        V0 = V_og.clone()  # No perturbation
-        def loss_fn(V):
-            return total_loss(V, E, V_og, lambda1=0.33, lambda2=0.33, lambda3=0.34)
-        max_iters = self.iter_spinbox.value()
-        V_opt = gradient_descent(loss_fn, V0, lr=0.05, max_iters=max_iters, verbose=True)
-        # Logging for debugging
-        print("V_opt after optimization:", V_opt)
-        print("Any NaN in V_opt?", torch.isnan(V_opt).any().item())
-        final_loss = loss_fn(V_opt)
-        print("Final loss:", final_loss.item())
+        # Runs on a QThread; the After plot follows the progress signals
+        self.worker_shape = shape
+        self.worker = OptimizationWorker(V_og, shape.topology, method=self.method_combo.currentText(),
+                                         max_iters=self.iter_spinbox.value(), carving=self.carve_checkbox.isChecked(),
+                                         weights={'lambda1': 0.33, 'lambda2': 0.33, 'lambda3': 0.34},
+                                         thickness=WALL_THICKNESS)
+        self.worker.progress.connect(self.on_optimization_progress)
+        self.worker.done.connect(self.on_optimization_done)
+        self.worker.failed.connect(self.on_optimization_failed)
+        self.set_running(True)
+        self.info_label.setText("Optimizing...")
+        self.worker.start()
+
+    def set_running(self, running):
+        self.run_btn.setEnabled(not running)
+        self.reset_btn.setEnabled(not running)
+        self.carve_checkbox.setEnabled(not running)
+        self.method_combo.setEnabled(not running and not self.carve_checkbox.isChecked())
+        self.iter_spinbox.setEnabled(not running)
+        self.cancel_btn.setEnabled(running)
+        if running:
+            self.save_optimized_btn.setEnabled(False)
+
+    def cancel_optimization(self):
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.cancel()
+            self.cancel_btn.setEnabled(False)
+            self.info_label.setText("Cancelling...")
+
+    def on_optimization_progress(self, iteration, loss, V, cut):
+        self.plot_optimized_shape(V, self.worker_shape, cut)
+        self.info_label.setText(f"Iteration {iteration}: loss = {loss:.6f}")
+
+    def on_optimization_done(self, result):
+        self.set_running(False)
+        V_opt = result['vertices']
+        self.last_cut = result['cut']
+        if self.last_cut is not None:
+            b, c = self.last_cut
+            print(f"Carving line: y = {b.item():.4f} x + {c.item():.4f}")
+        print(f"Final loss: {result['loss']:.6f} after {result['iterations']} iterations")
         if torch.isnan(V_opt).any():
             self.info_label.setText("Optimization failed: NaN encountered in result.")
             return
         # Store the optimized vertices for possible re-optimization
-        self.last_optimized_vertices = V_opt.detach()
+        self.last_optimized_vertices = V_opt
         # Plot before (edges) -- show the previous input
         self.plot_current_shape(use_last_optimized=False)
-        # Plot after (edges)
-        self.after_plot.clear()
-        self.after_plot.showGrid(x=True, y=True, alpha=0.3)
-        for i, j in shape.edges:
-            self.after_plot.plot(
-                [V_opt[i, 0].item(), V_opt[j, 0].item()],
-                [V_opt[i, 1].item(), V_opt[j, 1].item()],
-                pen=pg.mkPen('g', width=2)
-            )
-        self.after_plot.plot(V_opt[:,0].cpu().numpy(), V_opt[:,1].cpu().numpy(), pen=None, symbol='o', symbolBrush='r', symbolSize=10)
-        self.after_plot.setTitle("After Optimization")
-        # --- Center of Mass and Stability (After) ---
-        try:
-            from shape_mass_center import calculate_center_of_mass
-            from shape_stability import is_shape_stable
-            area_a, com_a = calculate_center_of_mass(V_opt, E)
-            cx_a, cy_a = float(com_a[0].item()), float(com_a[1].item())
-            self.after_plot.plot([cx_a], [cy_a], pen=None, symbol='+', symbolBrush='red', symbolPen='red', symbolSize=20)
-            is_stable_a, _, _, _ = is_shape_stable(V_opt, E)
-            if is_stable_a:
-                stability_text_a = pg.TextItem(text='Stable', color='green', anchor=(0.5, -0.5))
-            else:
-                stability_text_a = pg.TextItem(text='Will fall!', color='red', anchor=(0.5, -0.5))
-            stability_text_a.setPos(cx_a, cy_a)
-            self.after_plot.addItem(stability_text_a)
-        except Exception as e:
-            pass
-        self.info_label.setText("Optimization complete! Run again to further optimize the result.")
+        # Plot after
+        self.plot_optimized_shape(V_opt, self.worker_shape, self.last_cut)
+        if result['cancelled']:
+            self.info_label.setText(f"Optimization cancelled; kept the best iterate (loss {result['loss']:.6f}).")
+        else:
+            self.info_label.setText("Optimization complete! Run again to further optimize the result.")
         # Enable save button after successful optimization
         self.save_optimized_btn.setEnabled(True)
 
+    def on_optimization_failed(self, message):
+        self.set_running(False)
+        self.info_label.setText(f"Optimization failed: {message}")
+
     def reset_to_original(self):
         self.last_optimized_vertices = None
+        self.last_cut = None
         self.plot_current_shape(use_last_optimized=False)
-        self.after_plot.clear()
+        self.after_items.clear()
+        self.cut_line.setData([], [])
         self.info_label.setText("Reset to original shape. Ready to optimize again.")
         # Disable save button when resetting
         self.save_optimized_btn.setEnabled(False)
 
     def save_optimized_shape(self):
-        """Save the optimized shape to a JSON file."""
+        """Save the optimized shape to a JSON or .s2d file."""
         if self.last_optimized_vertices is None:
             return
             
@@ -186,16 +248,15 @@ class OptimizationTab(QWidget):
         # Open file dialog for saving
         path, _ = QFileDialog.getSaveFileName(
             self, 
-            'Save Optimized Shape JSON', 
+            'Save Optimized Shape', 
             shapes_dir, 
-            'JSON Files (*.json)'
+            SHAPE_FILE_FILTER
         )
         
         if path:
-            optimized_shape.save_to_json(path)
+            optimized_shape.save(path)
             self.info_label.setText(f"Optimized shape saved to: {os.path.basename(path)}")
             # Refresh the shape dropdowns in other tabs
-            if hasattr(self.main_window, 'visualize_tab'):
-                self.main_window.visualize_tab.refresh_shape_dropdown()
-            if hasattr(self.main_window, 'compare_tab'):
+            self.main_window.visualize_tab.refresh_shape_dropdown()
+            if self.main_window.compare_tab is not None:
                 self.main_window.compare_tab.refresh_shape_dropdowns() 
\ No newline at end of file
@@ -54,7 +54,7 @@ class ProcessTab(QWidget):
                 initial_score = calculate_smoothing_score(self.main_window.shape).item()
                 # Apply smoothing
                 new_vertices = smooth_shape(self.main_window.shape, iterations, strength)
-                self.main_window.shape = Shape2D(new_vertices, self.main_window.shape.edges.copy())
+                self.main_window.shape = Shape2D(new_vertices, self.main_window.shape.edges.clone())
                 self.main_window.update_plot()
                 # Calculate final score
                 final_score = calculate_smoothing_score(self.main_window.shape).item()
@@ -2,6 +2,7 @@ from PyQt5.QtWidgets import QWidget, QHBoxLayout, QVBoxLayout, QComboBox, QPushB
 import os
 import pyqtgraph as pg
 from .custom_viewbox import CustomViewBox
+from .catalog_watcher import fill_shape_dropdown
 
 class VisualizeTab(QWidget):
     def __init__(self, main_window):
@@ -47,20 +48,13 @@ class VisualizeTab(QWidget):
         self.grid_checkbox.setChecked(False)
 
     def refresh_shape_dropdown(self):
-        SHAPES_DIR = self.main_window.SHAPES_DIR
-        self.shape_dropdown.blockSignals(True)
-        self.shape_dropdown.clear()
-        self.shape_dropdown.addItem('Select shape from folder...')
-        if os.path.isdir(SHAPES_DIR):
-            for fname in sorted(os.listdir(SHAPES_DIR)):
-                if fname.endswith('.json'):
-                    self.shape_dropdown.addItem(fname)
-        self.shape_dropdown.blockSignals(False)
+        # Listed from the shape catalog (no directory scan); entries show their metadata
+        fill_shape_dropdown(self.shape_dropdown, 'Select shape from folder...', self.main_window.shape_catalog)
 
     def on_dropdown_change(self, idx):
         if idx == 0:
             return
-        fname = self.shape_dropdown.currentText()
+        fname = self.shape_dropdown.itemData(idx)
         path = os.path.join(self.main_window.SHAPES_DIR, fname)
         if os.path.isfile(path):
             self.main_window.load_shape_from_path(path)